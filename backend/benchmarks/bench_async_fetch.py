@@ -0,0 +1,70 @@
+"""Concurrent job-page extraction: blocking requests vs the async pipeline, against a slow local stub.
+
+    python benchmarks/bench_async_fetch.py --requests 50 --delay 0.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import extract_job_description, extract_job_description_async  # noqa: E402
+from fetcher import close_http_client  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+async def _loop_lag(stop, samples, interval=0.01):
+    """Record how late the event loop wakes up; large values mean something blocked it."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+
+async def run_blocking_in_loop(url, n):
+    # What the old endpoint did: a sync fetch inside the event loop, one request at a time
+    stop, lag = asyncio.Event(), []
+    ticker = asyncio.create_task(_loop_lag(stop, lag))
+    start = time.perf_counter()
+    for _ in range(n):
+        extract_job_description(url)
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return elapsed, max(lag, default=0.0)
+
+
+async def run_async(url, n):
+    stop, lag = asyncio.Event(), []
+    ticker = asyncio.create_task(_loop_lag(stop, lag))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(extract_job_description_async(url) for _ in range(n)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    await close_http_client()
+    errors = sum(1 for r in results if r.startswith("Error"))
+    return elapsed, max(lag, default=0.0), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.5, help="Stub server response delay in seconds")
+    args = parser.parse_args()
+
+    with StubServer(delay=args.delay) as stub:
+        blocking_time, blocking_lag = asyncio.run(run_blocking_in_loop(stub.url, args.requests))
+        async_time, async_lag, errors = asyncio.run(run_async(stub.url, args.requests))
+
+    print(f"{args.requests} requests, stub delay {args.delay}s")
+    print(f"blocking: {blocking_time:7.2f}s  {args.requests / blocking_time:7.1f} req/s  max loop lag {blocking_lag * 1000:8.1f} ms")
+    print(f"async:    {async_time:7.2f}s  {args.requests / async_time:7.1f} req/s  max loop lag {async_lag * 1000:8.1f} ms  errors {errors}")
+
+
+if __name__ == "__main__":
+    main()
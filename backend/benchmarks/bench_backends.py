@@ -0,0 +1,75 @@
+"""Search latency of the Chroma backend vs the in-process NumPy index, without any embedding calls.
+
+Query vectors are stored document embeddings plus noise, so only retrieval is timed.
+Requires a prepared vector database and its exported NumPy index (main.py --export-index).
+
+    python benchmarks/bench_backends.py --queries 500 --k 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retriever import DEFAULT_PERSIST_DIRECTORY, ChromaBackend, numpy_index_path  # noqa: E402
+from vector_index import NumpyBackend  # noqa: E402
+
+SAMPLE_QUERIES = [
+    "Java developer 40 minutes",
+    "sales graduate personality",
+    "remote adaptive cognitive test for a manager",
+    "entry-level customer service in spanish",
+    "python sql coding knowledge",
+]
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def time_backend(search, vectors, filters, k):
+    samples = []
+    for i, vector in enumerate(vectors):
+        where, candidates = filters[i % len(filters)]
+        start = time.perf_counter()
+        search(vector, k, where, candidates)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db_path", default=DEFAULT_PERSIST_DIRECTORY)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Neither backend embeds anything here, so no embedding client is needed
+    chroma = ChromaBackend(args.db_path, embeddings=None)
+    numpy_backend = NumpyBackend(numpy_index_path(args.db_path), embeddings=None)
+
+    rng = np.random.default_rng(args.seed)
+    base = np.asarray(numpy_backend.index.vectors)
+    rows = rng.integers(0, len(base), size=args.queries)
+    vectors = base[rows] + rng.normal(0, 0.05, size=(args.queries, base.shape[1])).astype(np.float32)
+    # Filters are pre-evaluated to candidate bitsets, as AssessmentRetriever does before searching
+    wheres = [numpy_backend.facet_extractor.extract(q).to_filter() for q in SAMPLE_QUERIES]
+    filters = [(w, numpy_backend.filter_index.evaluate(w) if w else None) for w in wheres] + [(None, None)]
+
+    runs = {
+        "chroma": lambda v, k, f, c: chroma.similarity_search_by_vector(v.tolist(), k, f, c),
+        "numpy": lambda v, k, f, c: numpy_backend.similarity_search_by_vector(v, k, f, c),
+    }
+    for name, search in runs.items():
+        search(vectors[0], args.k, None, None)  # warm-up
+        samples = time_backend(search, vectors, filters, args.k)
+        print(f"{name:7s} p50 {percentile_ms(samples, 50):8.3f} ms   p99 {percentile_ms(samples, 99):8.3f} ms   "
+              f"({len(samples)} queries, k={args.k})")
+
+
+if __name__ == "__main__":
+    main()
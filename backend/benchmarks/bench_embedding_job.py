@@ -0,0 +1,91 @@
+"""Resumable, parallel embedding job, offline: a deterministic fake embedder with simulated latency.
+
+The first run fails partway through (an injected error after --fail-after chunks); the rerun
+resumes from the checkpoint and only embeds the rest. Serial vs parallel throughput follows.
+
+    python benchmarks/bench_embedding_job.py --texts 2000 --latency 0.05 --workers 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_job import EmbeddingJob, HashEmbeddings  # noqa: E402
+
+
+class SlowEmbeddings(HashEmbeddings):
+    """HashEmbeddings with a fixed per-call latency and an optional failure after N calls"""
+
+    def __init__(self, latency, fail_after=None):
+        super().__init__()
+        self.latency = latency
+        self.fail_after = fail_after
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.latency)
+        if self.fail_after is not None and call > self.fail_after:
+            raise RuntimeError("simulated rate limit")
+        return super().embed_documents(texts)
+
+
+def run(checkpoint_dir, texts, embeddings, workers, chunk_size):
+    job = EmbeddingJob(checkpoint_dir, embeddings, "fake", chunk_size=chunk_size, workers=workers,
+                       rate_limit=0, retries=0, backoff=0)
+    start = time.perf_counter()
+    vectors = job.run(texts)
+    return job, vectors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per simulated embedding call")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--fail-after", type=int, default=10, help="Chunks that succeed before the injected failure")
+    args = parser.parse_args()
+
+    texts = [f"assessment document {i}" for i in range(args.texts)]
+    expected = np.asarray(HashEmbeddings().embed_documents(texts), dtype=np.float32)
+    root = tempfile.mkdtemp(prefix="embedding-job-")
+    try:
+        checkpoint = os.path.join(root, "resume")
+        try:
+            run(checkpoint, texts, SlowEmbeddings(args.latency, args.fail_after), 1, args.chunk_size)
+            raise SystemExit("expected the first run to fail")
+        except RuntimeError:
+            pass
+        embeddings = SlowEmbeddings(args.latency)
+        job, vectors, _ = run(checkpoint, texts, embeddings, args.workers, args.chunk_size)
+        assert np.allclose(vectors, expected)
+        print(f"resume: {job.reused} texts reused from checkpoint, {job.embedded} embedded "
+              f"in {embeddings.calls} calls")
+
+        embeddings = SlowEmbeddings(0)
+        job, vectors, elapsed = run(checkpoint, texts, embeddings, args.workers, args.chunk_size)
+        assert np.allclose(vectors, expected) and embeddings.calls == 0
+        print(f"assemble from checkpoint: {elapsed * 1000:.1f} ms, no embedding calls")
+
+        for workers in (1, args.workers):
+            _, vectors, elapsed = run(os.path.join(root, f"w{workers}"), texts, SlowEmbeddings(args.latency),
+                                      workers, args.chunk_size)
+            assert np.allclose(vectors, expected)
+            print(f"{workers:3d} worker(s): {elapsed:6.2f} s for {args.texts} texts")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Query-embedding latency and known-item recall: a local embedding provider vs the existing index.
+
+Each query is the first sentence of an assessment's description; a hit is that assessment in the
+top k. The local provider is fitted and run in-process over the documents of the exported NumPy
+index (main.py --export-index). With --google, queries are also embedded with the hosted model and
+searched against the existing index, and the overlap of the two top-k lists is reported.
+
+    python benchmarks/bench_embedding_providers.py --provider hashed-tfidf --queries 200 --k 5
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_providers import EMBEDDING_MODEL, HashedTfidfEmbeddings, SentenceTransformerEmbeddings  # noqa: E402
+from retriever import DEFAULT_PERSIST_DIRECTORY, numpy_index_path  # noqa: E402
+from vector_index import NumpyIndex  # noqa: E402
+
+
+def known_item_queries(index, limit, seed):
+    rows = np.random.default_rng(seed).permutation(len(index))[:limit]
+    queries = []
+    for row in rows:
+        description = index.metadatas[row].get("description", "")
+        sentence = re.split(r"(?<=[.!?])\s", description.strip(), maxsplit=1)[0]
+        if sentence:
+            queries.append((int(row), sentence))
+    return queries
+
+
+def evaluate(name, embed_one, matrix, queries, k):
+    latencies, hits, rankings = [], 0, []
+    for row, query in queries:
+        start = time.perf_counter()
+        vector = np.asarray(embed_one(query), dtype=np.float32)
+        latencies.append(time.perf_counter() - start)
+        top = np.argsort(-(matrix @ (vector / (np.linalg.norm(vector) or 1.0))))[:k]
+        hits += row in top
+        rankings.append(set(top.tolist()))
+    print(f"{name:22s} embed p50 {np.percentile(latencies, 50) * 1000:8.2f} ms  "
+          f"p99 {np.percentile(latencies, 99) * 1000:8.2f} ms   recall@{k} {hits / len(queries):.3f}")
+    return rankings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db_path", default=DEFAULT_PERSIST_DIRECTORY)
+    parser.add_argument("--provider", default="hashed-tfidf", choices=["hashed-tfidf", "sentence-transformers"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--google", action="store_true", help="Also embed queries with the hosted model")
+    args = parser.parse_args()
+
+    index = NumpyIndex.load(numpy_index_path(args.db_path))
+    queries = known_item_queries(index, args.queries, args.seed)
+
+    start = time.perf_counter()
+    if args.provider == "hashed-tfidf":
+        local = HashedTfidfEmbeddings.fit(index.page_contents)
+    else:
+        local = SentenceTransformerEmbeddings()
+    local_matrix = local.encode(index.page_contents)
+    print(f"{len(index)} documents encoded locally in {time.perf_counter() - start:.2f} s "
+          f"({local_matrix.shape[1]} dimensions)")
+
+    start = time.perf_counter()
+    local.encode([query for _, query in queries])
+    print(f"batched encode of {len(queries)} queries: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    local_rankings = evaluate(args.provider, lambda q: local.encode([q])[0], local_matrix, queries, args.k)
+    if args.google:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        google = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+        google_rankings = evaluate("google (existing)", google.embed_query, np.asarray(index.vectors), queries, args.k)
+        overlap = np.mean([len(a & b) / args.k for a, b in zip(local_rankings, google_rankings)])
+        print(f"top-{args.k} overlap with the existing index: {overlap:.3f}")
+
+
+if __name__ == "__main__":
+    main()
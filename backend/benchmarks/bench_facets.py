@@ -0,0 +1,86 @@
+"""Facet extraction cost on long pasted job descriptions: per-term regex scans vs the compiled FacetExtractor.
+
+Reads assessment.csv with the csv module only, so it runs without the serving dependencies.
+
+    python benchmarks/bench_facets.py --sizes 500 5000 20000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_filter_index import compact_metadata, load_rows  # noqa: E402
+from facets import FacetExtractor  # noqa: E402
+from filter_index import FilterIndex  # noqa: E402
+
+LEGACY_JOB_LEVELS = [
+    "analyst", "director", "entry-level", "executive", "front line manager",
+    "general population", "graduate", "manager", "mid-professional",
+    "professional individual contributor", "supervisor"
+]
+LEGACY_LANGUAGES = [
+    "arabic", "chinese simplified", "chinese traditional", "czech", "danish",
+    "dutch", "english", "estonian", "finnish", "flemish", "french", "german",
+    "greek", "hungarian", "icelandic", "indonesian", "italian", "japanese",
+    "korean", "latvian", "lithuanian", "malay", "norwegian", "polish",
+    "portuguese", "romanian", "russian", "serbian", "slovak", "spanish",
+    "swedish", "thai", "turkish", "vietnamese"
+]
+
+
+def legacy_extract(query):
+    """The previous approach: one re.search (and one lower()) per vocabulary term and category,
+    plus the duration regexes run again by search_assessments() and search()"""
+    found = []
+    for level in LEGACY_JOB_LEVELS:
+        if re.search(r'\b' + re.escape(level) + r'\b', query.lower()):
+            found.append(level)
+    for pattern in (r'\b(cognitive|ability|aptitude)\b', r'\b(personality|behavior|behaviour)\b',
+                    r'\b(technical|knowledge|skill)\b', r'\b(soft skill|competenc|situational|judgment)\b'):
+        if re.search(pattern, query.lower()):
+            found.append(pattern)
+    re.search(r'(\d+)\s*(min|mins|minutes)', query.lower())
+    for lang in LEGACY_LANGUAGES:
+        if re.search(r'\b' + re.escape(lang) + r'\b', query.lower()):
+            found.append(lang)
+    "remote" in query.lower()
+    "adaptive" in query.lower()
+    re.search(r'(\d+)\s*minutes', query.lower())
+    re.search(r'(\d+)\s*minutes', query.lower())
+    return found
+
+
+def time_per_call(func, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(BACKEND_DIR, "assessment.csv"))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = load_rows(args.csv)
+    extractor = FacetExtractor.from_filter_index(FilterIndex.from_metadatas(compact_metadata(rows)))
+    corpus = " ".join(row["description"] for row in rows)
+    corpus += " Graduate role, remote, adaptive, English (USA), 40 minutes."
+
+    for size in args.sizes:
+        text = (corpus * (size // len(corpus) + 1))[-size:]
+        legacy = time_per_call(legacy_extract, text, args.repeat)
+        compiled = time_per_call(extractor.extract, text, args.repeat)
+        print(f"{size:7d} chars: per-term regex {legacy * 1e3:8.3f} ms   compiled {compiled * 1e3:8.3f} ms   "
+              f"({legacy / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Shared job-page fetcher against the local stub server: keep-alive pooling, per-host limits, circuit breaking.
+
+1. Sequential blocking fetches: a new connection per requests.get vs the pooled session.
+2. A burst of concurrent async fetches to one host: peak requests in flight at the server and
+   the start rate stay within --concurrency and --rate.
+3. The host starts timing out: after --threshold failures the breaker opens and calls fail
+   fast; once the host recovers and --reset seconds pass, one trial request closes it again.
+
+    python benchmarks/bench_fetcher.py --burst 40 --concurrency 4 --rate 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+import fetcher  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+def keep_alive(stub, n):
+    stub.reset_counters()
+    start = time.perf_counter()
+    for _ in range(n):
+        requests.get(stub.url, timeout=5).raise_for_status()
+    plain, plain_connections = time.perf_counter() - start, stub.connections
+
+    stub.reset_counters()
+    start = time.perf_counter()
+    for _ in range(n):
+        with fetcher.stream_page(stub.url) as response:
+            response.content
+    pooled = time.perf_counter() - start
+    print(f"keep-alive: {n} sequential fetches")
+    print(f"  requests.get     {plain * 1000:8.1f} ms  {plain_connections:3d} connections")
+    print(f"  pooled session   {pooled * 1000:8.1f} ms  {stub.connections:3d} connections")
+
+
+async def burst(stub, n):
+    stub.reset_counters()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(fetcher.fetch_text(stub.url) for _ in range(n)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    errors = sum(isinstance(r, Exception) for r in results)
+    print(f"\nburst: {n} concurrent async fetches, server delay {stub.delay * 1000:.0f} ms")
+    print(f"  {elapsed:6.2f} s  peak in flight at server {stub.max_active} (limit {config.HOST_MAX_CONCURRENCY})"
+          f"  {n / elapsed:6.1f} req/s (limit {config.HOST_RATE_LIMIT:g})  errors {errors}")
+
+
+async def breaker(stub, calls, reset):
+    stub.reset_counters()
+    stub.delay = 0.5
+    print(f"\nbreaker: host stalls for {stub.delay}s, client timeout 0.1s")
+    for i in range(calls):
+        start = time.perf_counter()
+        try:
+            await fetcher.fetch_text(stub.url, timeout=0.1)
+            outcome = "ok"
+        except fetcher.CircuitOpenError:
+            outcome = "circuit open (no request)"
+        except Exception as e:
+            outcome = type(e).__name__
+        print(f"  call {i + 1:2d}: {(time.perf_counter() - start) * 1000:7.1f} ms  {outcome}")
+    print(f"  server saw {stub.requests} of {calls} calls")
+
+    stub.delay = 0.0
+    await asyncio.sleep(reset)
+    await fetcher.fetch_text(stub.url)
+    print(f"  host recovered; after {reset}s the trial request succeeded: "
+          f"breaker {fetcher.host_policy(stub.url).stats()['state']}")
+
+
+async def run_async(stub, args):
+    await burst(stub, args.burst)
+    await breaker(stub, args.threshold + 4, args.reset)
+    print("\nfetcher stats:")
+    print(json.dumps(fetcher.fetcher_stats(), indent=2))
+    await fetcher.close_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sequential", type=int, default=50)
+    parser.add_argument("--burst", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.1, help="Stub server response delay in seconds")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=50)
+    parser.add_argument("--threshold", type=int, default=3)
+    parser.add_argument("--reset", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with StubServer(delay=0) as stub:
+        # Pooling alone first, without request spacing
+        config.HOST_RATE_LIMIT = 0
+        keep_alive(stub, args.sequential)
+
+        config.HOST_MAX_CONCURRENCY = args.concurrency
+        config.HOST_RATE_LIMIT = args.rate
+        config.BREAKER_FAILURE_THRESHOLD = args.threshold
+        config.BREAKER_RESET_TIMEOUT = args.reset
+        fetcher.reset_host_policies()
+        stub.delay = args.delay
+        asyncio.run(run_async(stub, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Metadata size and filter latency: legacy per-document boolean flags vs the bitset FilterIndex.
+
+Reads assessment.csv with the csv module only, so it runs without the serving dependencies.
+
+    python benchmarks/bench_filter_index.py --repeat 2000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from filter_index import (  # noqa: E402
+    CATEGORY_TEST_TYPES, FilterIndex, assessment_id_from_url, facet_key, join_list, split_list
+)
+
+# Filters in the shape extract_filters_from_query() produces
+SAMPLE_FILTERS = [
+    {"$or": [{"job_level_graduate": True}, {"contains_technical": True}, {"duration_range": "short"}, {"remote_testing": True}]},
+    {"$or": [{"job_level_entry_level": True}, {"language_english_(usa)": True}]},
+    {"contains_personality": True},
+    {"$or": [{"contains_cognitive": True}, {"adaptive_irt": True}, {"duration_under_45": True}]},
+]
+
+
+def load_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        for col in ("job_levels", "languages", "test_type"):
+            row[col] = split_list(row[col])
+        row["duration"] = float(row["duration"] or 0)
+        row["remote_testing"] = row["remote_testing"] == "True"
+        row["adaptive_irt"] = row["adaptive_irt"] == "True"
+    return rows
+
+
+def legacy_metadata(rows):
+    """Per-document flag metadata as prepare_documents() used to write it"""
+    levels = {level.lower() for row in rows for level in row["job_levels"]}
+    languages = {lang.lower() for row in rows for lang in row["languages"]}
+    out = []
+    for row in rows:
+        codes = {t.upper() for t in row["test_type"]}
+        metadata = {"name": row["name"], "url": row["url"], "description": row["description"],
+                    "duration": row["duration"], "remote_testing": row["remote_testing"],
+                    "adaptive_irt": row["adaptive_irt"]}
+        for level in levels:
+            metadata[f"job_level_{facet_key(level)}"] = any(jl.lower() == level for jl in row["job_levels"])
+        for lang in languages:
+            metadata[f"language_{facet_key(lang)}"] = any(l.lower() == lang for l in row["languages"])
+        for code in "ABCDEKPS":
+            metadata[f"test_type_{code}"] = code in codes
+        for category, category_codes in CATEGORY_TEST_TYPES.items():
+            metadata[f"contains_{category}"] = bool(category_codes & codes)
+        d = row["duration"]
+        metadata["duration_range"] = ("very_short" if d <= 15 else "short" if d <= 30 else
+                                      "medium" if d <= 45 else "standard" if d <= 60 else "long")
+        for limit in (30, 45, 60):
+            metadata[f"duration_under_{limit}"] = d <= limit
+        out.append(metadata)
+    return out
+
+
+def compact_metadata(rows):
+    return [{"assessment_id": assessment_id_from_url(row["url"]), "name": row["name"], "url": row["url"],
+             "description": row["description"], "duration": row["duration"],
+             "remote_testing": row["remote_testing"], "adaptive_irt": row["adaptive_irt"],
+             "job_levels": join_list(row["job_levels"]), "languages": join_list(row["languages"]),
+             "test_types": join_list(t.upper() for t in row["test_type"])} for row in rows]
+
+
+def legacy_match(metadata, where):
+    """Scan-style evaluation of a where filter against one document's flags"""
+    for key, condition in where.items():
+        if key == "$or":
+            if not any(legacy_match(metadata, clause) for clause in condition):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(BACKEND_DIR, "assessment.csv"))
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = load_rows(args.csv)
+    legacy, legacy_bytes = measure_memory(lambda: legacy_metadata(rows))
+    compact = compact_metadata(rows)
+    index, index_bytes = measure_memory(lambda: FilterIndex.from_metadatas(compact))
+    print(f"{len(rows)} documents")
+    print(f"legacy flag metadata:  {sum(len(m) for m in legacy) / len(rows):6.1f} keys/doc  "
+          f"{len(json.dumps(legacy)) / 1024:8.1f} KiB JSON  {legacy_bytes / 1024:8.1f} KiB in memory")
+    print(f"compact metadata:      {sum(len(m) for m in compact) / len(rows):6.1f} keys/doc  "
+          f"{len(json.dumps(compact)) / 1024:8.1f} KiB JSON")
+    print(f"bitset filter index:   {index_bytes / 1024:8.1f} KiB in memory")
+
+    for where in SAMPLE_FILTERS:
+        expected = sum(legacy_match(m, where) for m in legacy)
+        assert index.count(index.evaluate(where)) == expected, where
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for where in SAMPLE_FILTERS:
+            [i for i, m in enumerate(legacy) if legacy_match(m, where)]
+    scan = (time.perf_counter() - start) / (args.repeat * len(SAMPLE_FILTERS))
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for where in SAMPLE_FILTERS:
+            index.rows(index.evaluate(where))
+    bitset = (time.perf_counter() - start) / (args.repeat * len(SAMPLE_FILTERS))
+
+    print(f"filter latency: flag scan {scan * 1e6:8.1f} us   bitset {bitset * 1e6:8.1f} us   ({scan / bitset:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Streaming job-description extraction vs a full BeautifulSoup tree, on a corpus of saved pages.
+
+Each saved page is measured as-is and padded to --pad-mb with job-board boilerplate (related-job
+links and a large inline script) after the description, which is how multi-MB listing pages
+look. A padded copy with no description container exercises the capped fallback. Reported per
+parser: mean time, peak traced memory and whether the text matches the full-tree extraction.
+A last run fetches the largest page from the local stub server, streamed vs downloaded whole.
+
+    python benchmarks/bench_html_extract.py --pad-mb 4
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import config  # noqa: E402
+from html_extract import StreamingExtractor, etree, iter_chunks, parse_job_description_tree  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+FIXTURES = os.path.join(BENCH_DIR, "fixtures", "job_pages")
+RELATED_JOB = '<li class="related"><a href="/jobs/{0}">Related opening {0}</a><span>Full time</span></li>\n'
+
+
+def padding(size):
+    links = []
+    total = i = 0
+    while total < size // 2:
+        links.append(RELATED_JOB.format(i))
+        total += len(links[-1])
+        i += 1
+    script = '<script>window.__STATE__ = "' + 'x' * (size // 2) + '";</script>'
+    return '<aside><ul>' + ''.join(links) + '</ul></aside>' + script
+
+
+def corpus(pages_dir, pad_bytes):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        name = os.path.basename(path)
+        pages.append((name, html))
+        pages.append((f"{name} +pad", html.replace("</main>", "</main>" + padding(pad_bytes), 1)))
+    if pages:
+        html = pages[0][1].replace('class="job-description"', 'class="posting"')
+        pages.append(("no container +pad", html.replace("</main>", "</main>" + padding(pad_bytes), 1)))
+    return pages
+
+
+def stream(html, use_lxml, max_bytes):
+    extractor = StreamingExtractor(max_bytes=max_bytes, use_lxml=use_lxml)
+    for chunk in iter_chunks(html, config.SCRAPE_CHUNK_SIZE):
+        if extractor.feed(chunk):
+            break
+    return extractor.text()
+
+
+def measure(func, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        text = func(html)
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    func(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return text, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default=FIXTURES, help="Directory of saved job page .html files")
+    parser.add_argument("--pad-mb", type=float, default=4.0, help="Boilerplate added to the padded copies")
+    parser.add_argument("--max-bytes", type=int, default=config.SCRAPE_MAX_BYTES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = corpus(args.pages, int(args.pad_mb * 1024 * 1024))
+    if not pages:
+        raise SystemExit(f"No .html pages in {args.pages}")
+    parsers = {"bs4 html.parser tree": lambda html: parse_job_description_tree(html, "html.parser")}
+    if etree is not None:
+        parsers["stream lxml"] = lambda html: stream(html, True, args.max_bytes)
+    parsers["stream html.parser"] = lambda html: stream(html, False, args.max_bytes)
+
+    print(f"{'page':34s} {'size':>9s}  " + "  ".join(f"{name:>28s}" for name in parsers))
+    for name, html in pages:
+        reference = None
+        cells = []
+        for label, func in parsers.items():
+            text, elapsed, peak = measure(func, html, args.repeat)
+            reference = text if reference is None else reference
+            same = "" if text == reference else " *"
+            cells.append(f"{elapsed * 1000:9.2f} ms {peak / 2 ** 20:7.2f} MiB{same:2s}")
+        print(f"{name:34s} {len(html) / 1024:7.0f}KB  " + "  ".join(f"{cell:>28s}" for cell in cells))
+    print("(time, peak traced memory; * = text differs from the full tree, expected only for the"
+          " capped no-container page)")
+
+    name, html = max(pages, key=lambda page: len(page[1]) if "no container" not in page[0] else 0)
+    with StubServer(delay=0, body=html) as server:
+        start = time.perf_counter()
+        response = requests.get(server.url, timeout=30)
+        parse_job_description_tree(response.text, "html.parser")
+        whole = time.perf_counter() - start
+        start = time.perf_counter()
+        extractor = StreamingExtractor(max_bytes=args.max_bytes)
+        with requests.get(server.url, timeout=30, stream=True) as response:
+            for chunk in response.iter_content(config.SCRAPE_CHUNK_SIZE):
+                if extractor.feed(chunk):
+                    break
+        extractor.text()
+        streamed = time.perf_counter() - start
+    print(f"\nHTTP {name}: whole download + tree {whole * 1000:.1f} ms, "
+          f"streamed {streamed * 1000:.1f} ms reading {extractor.bytes_read / 1024:.0f} of "
+          f"{len(html.encode('utf-8')) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Offline benchmark and relevance-regression suite for the search pipeline.
+
+Everything runs in-process against assessment.csv: the catalog is ingested and embedded with the
+deterministic hashed-tfidf provider into a temporary NumPy + BM25 index and serving artifact,
+and the labelled queries and saved job pages in fixtures/relevance_queries.json go through the
+same functions the API serves (filter extraction, job-page parsing, local query generation,
+search). No network, Gemini or Chroma server is involved, and query-embedding caches are
+disabled so repeats measure the real work.
+
+Reported, and written as JSON with --output:
+- relevance: mean recall@k and MRR for the text queries and for the job pages
+- per stage: p50/p95/p99 latency and the process's peak RSS while the stage ran (the kernel
+  high-water mark is reset before each stage on Linux; elsewhere it is the lifetime peak)
+- throughput of the query and job-page paths with each --concurrency worker count
+
+With --baseline the run is compared with a stored result, and the exit status is 1 if
+relevance dropped or latency/throughput regressed beyond the tolerances. Relevance is
+deterministic; latency is only comparable against a baseline recorded on the same machine.
+
+    python benchmarks/bench_pipeline.py --output run.json --baseline benchmarks/fixtures/pipeline_baseline.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+# Local embeddings and index, no persistent caches: set before config is first imported
+os.environ.update({
+    "EMBEDDING_PROVIDER": "hashed-tfidf",
+    "RETRIEVAL_BACKEND": "numpy",
+    "NUMPY_INDEX_PATH": "",
+    "LEXICAL_INDEX_PATH": "",
+    "EMBEDDING_CACHE_SIZE": "0",
+    "EMBEDDING_CACHE_PATH": "",
+    "PAGE_CACHE_PATH": "",
+    "QUERY_CACHE_PATH": "",
+    "SHARED_CACHE_PATH": "",
+    "QUERY_GENERATION_POLICY": "local",
+})
+# The stored baseline was recorded with hybrid retrieval and re-ranking on; set these to compare
+# other settings
+os.environ.setdefault("HYBRID_SEARCH", "1")
+os.environ.setdefault("LEXICAL_FAST_PATH_MAX_TERMS", "2")
+os.environ.setdefault("RERANK", "1")
+
+import config  # noqa: E402
+from embedding_providers import create_embeddings, provider_directory  # noqa: E402
+from html_extract import parse_job_description  # noqa: E402
+from ingestion import parse_list_columns, prepare_documents  # noqa: E402
+from lexical import LexicalIndex  # noqa: E402
+from main import extract_filters_from_query, local_search_query, search_assessments  # noqa: E402
+from retriever import get_retriever, lexical_index_path, numpy_index_path  # noqa: E402
+from vector_index import NumpyIndex, write_serving_artifact  # noqa: E402
+
+CATALOG = os.path.join(BACKEND_DIR, "assessment.csv")
+LABELS = os.path.join(BENCH_DIR, "fixtures", "relevance_queries.json")
+PAGES = os.path.join(BENCH_DIR, "fixtures", "job_pages")
+PROVIDER = "hashed-tfidf"
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS counter (VmHWM) for this process; False where unsupported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mib() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(latencies):
+    ms = np.asarray(latencies) * 1000
+    return {
+        "samples": len(ms),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def run_stage(func, inputs, repeat):
+    """Call func on every input `repeat` times; latency percentiles and peak RSS of the stage"""
+    gc.collect()
+    reset = reset_peak_rss()
+    latencies = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - start)
+    return {**summarize(latencies), "peak_rss_mib": round(peak_rss_mib(), 1), "rss_reset": reset}
+
+
+def run_concurrent(func, inputs, repeat, workers):
+    """The same calls from `workers` threads at once: completed calls per second and latency under load"""
+    def timed(item):
+        start = time.perf_counter()
+        func(item)
+        return time.perf_counter() - start
+
+    work = list(inputs) * repeat
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(timed, work))
+        elapsed = time.perf_counter() - start
+    return {"workers": workers, "throughput_per_s": round(len(work) / elapsed, 1), **summarize(latencies)}
+
+
+def build_index(persist_directory, stages, repeat):
+    """Ingest and embed the catalog into a NumPy + BM25 index, timing each build step"""
+    def load(_):
+        return prepare_documents(parse_list_columns(pd.read_csv(CATALOG)))
+
+    stages["load_catalog"] = run_stage(load, [None], repeat)
+    documents = load(None)
+    texts = [document.page_content for document in documents]
+    metadatas = [document.metadata for document in documents]
+    directory = provider_directory(persist_directory, PROVIDER)
+
+    stages["fit_embedder"] = run_stage(lambda _: create_embeddings(PROVIDER, directory, fit_texts=texts), [None], repeat)
+    embeddings, model = create_embeddings(PROVIDER, directory, fit_texts=texts)
+    stages["embed_catalog"] = run_stage(lambda _: embeddings.embed_documents(texts), [None], repeat)
+    vectors = embeddings.embed_documents(texts)
+    ids = [metadata.get("assessment_id") or str(row) for row, metadata in enumerate(metadatas)]
+
+    def write(_):
+        NumpyIndex.save(numpy_index_path(directory), vectors, ids, texts, metadatas, model)
+        LexicalIndex.from_metadatas(metadatas).save(lexical_index_path(directory))
+
+    stages["write_index"] = run_stage(write, [None], 1)
+    stages["write_artifact"] = run_stage(
+        lambda _: write_serving_artifact(numpy_index_path(directory), lexical_index_path(directory)), [None], 1)
+    return len(documents)
+
+
+def score(ranked, relevant, ks):
+    """recall@k for each k and the reciprocal rank of the first relevant result"""
+    relevant = set(relevant)
+    first = next((rank for rank, url in enumerate(ranked, 1) if url in relevant), None)
+    record = {f"recall@{k}": round(len(relevant & set(ranked[:k])) / len(relevant), 4) for k in ks}
+    record["rr"] = round(1 / first, 4) if first else 0.0
+    record["first_relevant_rank"] = first
+    return record
+
+
+def relevance(cases, ks):
+    records = [{**case["info"], **score(case["ranked"], case["relevant"], ks)} for case in cases]
+    summary = {f"recall@{k}": round(float(np.mean([r[f"recall@{k}"] for r in records])), 4) for k in ks}
+    summary["mrr"] = round(float(np.mean([r["rr"] for r in records])), 4)
+    return {"summary": summary, "details": records}
+
+
+def compare(results, baseline, max_latency_regression, min_latency_delta_ms, max_relevance_drop):
+    """Regressions of `results` against `baseline` as readable strings; empty when within tolerance"""
+    failures = []
+    for name, stored in baseline.get("relevance", {}).items():
+        current = results["relevance"].get(name, {}).get("summary", {})
+        for metric, expected in stored["summary"].items():
+            value = current.get(metric)
+            if value is not None and value < expected - max_relevance_drop:
+                failures.append(f"relevance {name} {metric}: {value:.4f} < baseline {expected:.4f}")
+    for stage, expected in baseline.get("stages", {}).items():
+        current = results["stages"].get(stage)
+        if current is None:
+            continue
+        # Percentiles of a handful of samples are noise (the one-off build steps unless
+        # --build-repeat is raised); tails are compared only for well-sampled stages
+        samples = min(expected.get("samples", 0), current["samples"])
+        metrics = ("p50_ms", "p95_ms") if samples >= 100 else ("p50_ms",) if samples >= 10 else ()
+        for metric in metrics:
+            limit = max(expected[metric] * (1 + max_latency_regression), expected[metric] + min_latency_delta_ms)
+            if current[metric] > limit:
+                failures.append(f"latency {stage} {metric}: {current[metric]:.3f} > {limit:.3f} "
+                                f"(baseline {expected[metric]:.3f})")
+    for path, runs in baseline.get("throughput", {}).items():
+        current = {run["workers"]: run for run in results["throughput"].get(path, [])}
+        for expected in runs:
+            run = current.get(expected["workers"])
+            floor = expected["throughput_per_s"] * (1 - max_latency_regression)
+            if run is not None and run["throughput_per_s"] < floor:
+                failures.append(f"throughput {path} x{run['workers']}: {run['throughput_per_s']:.1f}/s "
+                                f"< {floor:.1f}/s (baseline {expected['throughput_per_s']:.1f})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", default=LABELS, help="Labelled queries and job pages (JSON)")
+    parser.add_argument("--pages", default=PAGES, help="Directory of the saved job pages named in --labels")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10], help="Cutoffs for recall@k")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the inputs per stage")
+    parser.add_argument("--build-repeat", type=int, default=3, help="Repeats of the index build steps")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Stored results to compare with; exit 1 on regression")
+    parser.add_argument("--max-latency-regression", type=float, default=0.5,
+                        help="Allowed latency increase / throughput decrease as a fraction of the baseline")
+    parser.add_argument("--min-latency-delta-ms", type=float, default=0.5,
+                        help="Latency increases smaller than this are noise, whatever the fraction")
+    parser.add_argument("--max-relevance-drop", type=float, default=0.0,
+                        help="Allowed absolute drop in recall@k and MRR")
+    args = parser.parse_args()
+
+    with open(args.labels, encoding="utf-8") as f:
+        labels = json.load(f)
+    pages = []
+    for case in labels["job_pages"]:
+        with open(os.path.join(args.pages, case["page"]), encoding="utf-8") as f:
+            pages.append(f.read())
+    queries = [case["query"] for case in labels["queries"]]
+    depth = max(args.k)
+    stages = {}
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        db_path = os.path.join(tmp, "shl_vector_db")
+        documents = build_index(db_path, stages, args.build_repeat)
+        retriever = get_retriever(db_path)
+        stages["open_index"] = run_stage(lambda _: retriever.warm(), [None], 1)
+
+        def urls(query):
+            return [doc.metadata.get("url") for doc in search_assessments(query, db_path, k=depth)]
+
+        def job_page(html):
+            return urls(local_search_query(parse_job_description(html), db_path).query)
+
+        # One untimed pass so lazily built structures (facet vocabulary, masks) are not charged to a stage
+        for query in queries:
+            urls(query)
+        descriptions = [parse_job_description(html) for html in pages]
+        generated = [local_search_query(description, db_path).query for description in descriptions]
+
+        search_stages = {}
+
+        def search(query):
+            debug = {}
+            search_assessments(query, db_path, k=depth, debug=debug)
+            for stage, ms in debug["timings_ms"].items():
+                search_stages.setdefault(f"search.{stage}", []).append(ms / 1000)
+
+        stages["filter_extraction"] = run_stage(lambda q: extract_filters_from_query(q, db_path), queries, args.repeat)
+        stages["search"] = run_stage(search, queries + generated, args.repeat)
+        for stage, latencies in sorted(search_stages.items()):
+            stages[stage] = summarize(latencies)
+        stages["parse_job_page"] = run_stage(parse_job_description, pages, args.repeat)
+        stages["query_generation"] = run_stage(lambda d: local_search_query(d, db_path), descriptions, args.repeat)
+        stages["job_page_end_to_end"] = run_stage(job_page, pages, args.repeat)
+
+        throughput = {
+            "query": [run_concurrent(urls, queries, args.repeat, n) for n in args.concurrency],
+            "job_page": [run_concurrent(job_page, pages, args.repeat, n) for n in args.concurrency],
+        }
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "embedding_provider": PROVIDER,
+                "retrieval_backend": config.RETRIEVAL_BACKEND,
+                "hybrid_search": config.HYBRID_SEARCH,
+                "rerank": config.RERANK,
+                "documents": documents,
+                "queries": len(queries),
+                "job_pages": len(pages),
+                "repeat": args.repeat,
+            },
+            "relevance": {
+                "queries": relevance([{"info": {"id": case["id"], "query": case["query"]},
+                                       "ranked": urls(case["query"]), "relevant": case["relevant"]}
+                                      for case in labels["queries"]], args.k),
+                "job_pages": relevance([{"info": {"page": case["page"], "query": query},
+                                         "ranked": urls(query), "relevant": case["relevant"]}
+                                        for case, query in zip(labels["job_pages"], generated)], args.k),
+            },
+            "stages": stages,
+            "throughput": throughput,
+        }
+
+    print(f"{documents} documents, {len(queries)} queries, {len(pages)} job pages, {args.repeat} passes\n")
+    for name, result in results["relevance"].items():
+        print(f"{name:10s} " + "  ".join(f"{metric} {value:.3f}" for metric, value in result["summary"].items()))
+    print(f"\n{'stage':24s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'peak RSS':>10s}")
+    for stage, stats in stages.items():
+        rss = f"{stats['peak_rss_mib']:7.1f} MiB" if "peak_rss_mib" in stats else ""
+        print(f"{stage:24s} {stats['p50_ms']:9.3f} {stats['p95_ms']:9.3f} {stats['p99_ms']:9.3f} {rss:>10s}")
+    for path, runs in throughput.items():
+        print(f"\n{path} throughput")
+        for run in runs:
+            print(f"  {run['workers']:2d} workers {run['throughput_per_s']:9.1f}/s  "
+                  f"p50 {run['p50_ms']:8.3f} ms  p99 {run['p99_ms']:8.3f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = compare(results, baseline, args.max_latency_regression, args.min_latency_delta_ms,
+                           args.max_relevance_drop)
+        print(f"\nCompared with {args.baseline}: " + ("no regressions" if not failures else "REGRESSIONS"))
+        for failure in failures:
+            print(f"  {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Cost of turning ranked hits into a /search response body at max_results=10, alone and under load.
+
+An offline hashed-tfidf index is built as in bench_pipeline.py and every labelled query is
+searched once. The timed part is what happens after the search, for each of:
+
+- rebuild + jsonable_encoder: an AssessmentResult built per hit, then FastAPI's response_model
+  path (dump, validate, jsonable_encoder, json.dumps)
+- rebuild + dump_json: the same results, validated and written by pydantic's own serializer
+- fragments (orjson / json): the results ResultFragments keeps (filled by the untimed check
+  pass), joined from their encoded fragments by render_search_response, which also computes the ETag
+
+"miss" builds the response from the hits, as a response cache miss does; "hit" only encodes a
+response already built, as a cache hit does. The load runs call the same function from
+--concurrency threads at once.
+
+    python benchmarks/bench_serialization.py --repeat 200 --concurrency 1 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import LABELS, build_index, run_concurrent, run_stage  # noqa: E402
+import fragments  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from main import (  # noqa: E402
+    SearchResponse, build_assessment_result, render_search_response, result_fragments, search_assessments
+)
+from pydantic import TypeAdapter  # noqa: E402
+
+RESPONSE_ADAPTER = TypeAdapter(SearchResponse)
+
+
+def envelope(query, results):
+    return SearchResponse(search_query=query, original_query=query, is_url=False,
+                          job_description_url=None, results=results, next_cursor="cursor.10")
+
+
+def encode_jsonable(response):
+    # FastAPI's classic response_model path: dump, validate against the model, encode
+    validated = SearchResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def encode_dump_json(response):
+    return RESPONSE_ADAPTER.dump_json(RESPONSE_ADAPTER.validate_python(response))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the queries per variant")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    with open(LABELS, encoding="utf-8") as f:
+        queries = [case["query"] for case in json.load(f)["queries"]]
+
+    with tempfile.TemporaryDirectory(prefix="bench_serialization_") as tmp:
+        db_path = os.path.join(tmp, "shl_vector_db")
+        build_index(db_path, {}, 1)
+        table = result_fragments(db_path)
+        hits = [(query, search_assessments(query, db_path, k=10)) for query in queries]
+
+        def rebuilt(item):
+            query, docs = item
+            return envelope(query, [build_assessment_result(doc.page_content, doc.metadata) for doc in docs])
+
+        def prebuilt(item):
+            query, docs = item
+            return envelope(query, [table.result(doc.page_content, doc.metadata) for doc in docs])
+
+        def render(response):
+            return render_search_response(response, table)[0]
+
+        built = [prebuilt(item) for item in hits]
+        # Every variant writes the same document
+        for item, response in zip(hits, built):
+            expected = encode_dump_json(rebuilt(item))
+            assert render(response) == expected == encode_jsonable(response), "serializations differ"
+
+        # (miss, hit, orjson): whether the fragment encoder may use orjson; None when not used
+        variants = {
+            "rebuild + jsonable_encoder": (lambda item: encode_jsonable(rebuilt(item)), encode_jsonable, None),
+            "rebuild + dump_json": (lambda item: encode_dump_json(rebuilt(item)), encode_dump_json, None),
+            "fragments (orjson)": (lambda item: render(prebuilt(item)), render, True),
+            "fragments (json)": (lambda item: render(prebuilt(item)), render, False),
+        }
+        results = {"documents": len(table), "max_results": 10, "variants": {}}
+        installed = fragments.orjson
+        for name, (miss, hit, use_orjson) in variants.items():
+            if use_orjson and installed is None:
+                continue
+            if use_orjson is False:
+                fragments.orjson = None
+            try:
+                results["variants"][name] = {
+                    "miss": run_stage(miss, hits, args.repeat),
+                    "hit": run_stage(hit, built, args.repeat),
+                    "load": [run_concurrent(hit, built, args.repeat, n) for n in args.concurrency],
+                }
+            finally:
+                fragments.orjson = installed
+
+    print(f"{results['documents']} cached results, max_results=10, {len(hits)} queries x {args.repeat}")
+    print(f"{'':28s} {'miss p50':>10s} {'miss p99':>10s} {'hit p50':>10s} {'hit p99':>10s}   "
+          + "  ".join(f"{n:>2d} thr/s  p99" for n in args.concurrency))
+    for name, v in results["variants"].items():
+        load = "  ".join(f"{run['throughput_per_s']:8.0f} {run['p99_ms'] * 1000:5.0f}us" for run in v["load"])
+        print(f"{name:28s} {v['miss']['p50_ms'] * 1000:8.1f}us {v['miss']['p99_ms'] * 1000:8.1f}us "
+              f"{v['hit']['p50_ms'] * 1000:8.1f}us {v['hit']['p99_ms'] * 1000:8.1f}us   {load}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
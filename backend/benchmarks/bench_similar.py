@@ -0,0 +1,108 @@
+"""Similar-assessment lookups: the precomputed neighbor graph against an exact scan of the catalog.
+
+An offline hashed-tfidf index is built as in bench_pipeline.py, which writes the neighbor graph
+into the serving artifact. For every catalog document and each filter, the top --k similar
+documents are looked up with AssessmentRetriever.similar (stored neighbors, exact fallback when
+too few match) and with an exact scan of the stored vectors under the same filter. Reported are
+the latency of both, how often the fallback ran, the overlap of their answers and the graph's
+size and build time.
+
+    python benchmarks/bench_similar.py --k 5 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import build_index, run_stage  # noqa: E402
+import config  # noqa: E402
+from main import similar_filter  # noqa: E402
+from neighbors import NeighborGraph  # noqa: E402
+from retriever import get_retriever  # noqa: E402
+from vector_index import bitset_mask  # noqa: E402
+
+FILTERS = {
+    "none": {},
+    "max_duration=30": {"max_duration": 30},
+    "language=English (USA)": {"languages": ["English (USA)"]},
+    "test_type=K,S": {"test_types": ["K", "S"]},
+    "adaptive, max_duration=20": {"adaptive": True, "max_duration": 20},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=5, help="Similar assessments per lookup")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the catalog per filter")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_similar_") as tmp:
+        db_path = os.path.join(tmp, "shl_vector_db")
+        build_index(db_path, {}, 1)
+        retriever = get_retriever(db_path)
+        backend = retriever.backend
+        index, filter_index = backend.matrix_index
+        ids = [index.document(row).metadata["assessment_id"] for row in range(len(index))]
+        graph = backend.neighbor_graph
+
+        start = time.perf_counter()
+        NeighborGraph.build(index.vectors, config.KNN_NEIGHBORS)
+        build_ms = (time.perf_counter() - start) * 1000
+        results = {
+            "documents": len(index), "k": args.k, "depth": graph.depth, "build_ms": round(build_ms, 1),
+            "graph_bytes": graph.neighbors.nbytes + graph.scores.nbytes, "filters": {},
+        }
+
+        for name, facets in FILTERS.items():
+            where = similar_filter(**facets)
+
+            def exact(assessment_id):
+                row = filter_index.row(assessment_id)
+                candidates = (filter_index.evaluate(where) if where else (1 << len(index)) - 1) & ~(1 << row)
+                return index.search_by_vector(index.vectors[row], args.k, mask=bitset_mask(candidates, len(index)))
+
+            def similar(assessment_id):
+                return retriever.similar(assessment_id, args.k, where)
+
+            overlap, fallbacks = [], 0
+            for assessment_id in ids:
+                row = filter_index.row(assessment_id)
+                candidates = filter_index.evaluate(where) & ~(1 << row) if where else None
+                if len(graph.similar(row, args.k, candidates)) < min(
+                        args.k, filter_index.count(candidates) if candidates is not None else args.k):
+                    fallbacks += 1
+                expected = {neighbor for neighbor, _ in exact(assessment_id)}
+                found = {doc.metadata["assessment_id"] for doc, _ in similar(assessment_id)[1]}
+                if expected:
+                    overlap.append(len(found & {ids[neighbor] for neighbor in expected}) / len(expected))
+
+            results["filters"][name] = {
+                "graph": run_stage(similar, ids, args.repeat),
+                "exact": run_stage(exact, ids, args.repeat),
+                "fallback_rate": round(fallbacks / len(ids), 3),
+                "overlap": round(sum(overlap) / len(overlap), 3) if overlap else None,
+            }
+
+    print(f"{results['documents']} documents, k={args.k}, graph depth {results['depth']}: "
+          f"{results['graph_bytes'] / 1024:.1f} KiB, built in {results['build_ms']:.1f} ms")
+    print(f"{'':28s} {'graph p50':>10s} {'graph p99':>10s} {'exact p50':>10s} {'exact p99':>10s} "
+          f"{'fallback':>9s} {'overlap':>8s}")
+    for name, v in results["filters"].items():
+        print(f"{name:28s} {v['graph']['p50_ms'] * 1000:8.1f}us {v['graph']['p99_ms'] * 1000:8.1f}us "
+              f"{v['exact']['p50_ms'] * 1000:8.1f}us {v['exact']['p99_ms'] * 1000:8.1f}us "
+              f"{v['fallback_rate']:9.1%} {v['overlap']:8.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
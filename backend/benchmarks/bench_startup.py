@@ -0,0 +1,126 @@
+"""Cold start of a serving process: import time, index open and first query, in fresh interpreters.
+
+An offline hashed-tfidf index is built as in bench_pipeline.py, once with the serving artifact
+and once without it (vectors.npy + documents.json + lexical JSON, the filter, BM25 and keyphrase
+indexes rebuilt at open). Each configuration is started --runs times in a new interpreter,
+which imports main, opens the retriever and answers one query; medians are reported with the
+peak RSS and which of the heavy modules kept off the serving path were loaded. The import
+cost of those modules, each in its own interpreter, shows what a cold start no longer pays.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import PROVIDER, build_index  # noqa: E402
+from embedding_providers import provider_directory  # noqa: E402
+from retriever import numpy_index_path  # noqa: E402
+from serving_artifact import artifact_path  # noqa: E402
+
+# Imported by the old eager main.py, now only by ingestion, Gemini calls or the bs4 fallback
+DEFERRED_MODULES = ("pandas", "bs4", "langchain_chroma", "langchain_google_genai", "ingestion", "pipeline")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+retriever = main.get_retriever(sys.argv[1])
+retriever.warm()
+opened = time.perf_counter()
+main.search_assessments(sys.argv[2], sys.argv[1], k=10)
+done = time.perf_counter()
+loaded = [m for m in sys.argv[3].split(",") if m in sys.modules]
+from bench_pipeline import peak_rss_mib
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "open_ms": (opened - imported) * 1000,
+    "first_query_ms": (done - opened) * 1000,
+    "total_ms": (done - start) * 1000,
+    "peak_rss_mib": peak_rss_mib(),
+    "loaded": loaded,
+}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([BACKEND_DIR, BENCH_DIR, env.get("PYTHONPATH", "")])
+    return env
+
+
+def start_process(db_path, query, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD, db_path, query, ",".join(DEFERRED_MODULES)],
+            cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    summary = {key: round(statistics.median(s[key] for s in samples), 1)
+               for key in ("import_ms", "open_ms", "first_query_ms", "total_ms", "peak_rss_mib")}
+    summary["loaded"] = samples[-1]["loaded"]
+    return summary
+
+
+def import_cost(module, runs):
+    code = f"import time; s = time.perf_counter(); import {module}; print((time.perf_counter() - s) * 1000)"
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=child_env(),
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        times.append(float(result.stdout.strip()))
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per configuration")
+    parser.add_argument("--query", default="Java developer with SQL, 40 minutes")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    results = {"start": {}, "deferred_import_ms": {}}
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as tmp:
+        with_artifact = os.path.join(tmp, "artifact", "shl_vector_db")
+        build_index(with_artifact, {}, 1)
+        # Same files without the artifact; copytree keeps the mtimes the staleness check compares
+        without_artifact = os.path.join(tmp, "legacy", "shl_vector_db")
+        shutil.copytree(os.path.dirname(with_artifact), os.path.dirname(without_artifact))
+        os.remove(artifact_path(numpy_index_path(provider_directory(without_artifact, PROVIDER))))
+
+        for name, db_path in (("json indexes", without_artifact), ("serving artifact", with_artifact)):
+            results["start"][name] = start_process(db_path, args.query, args.runs)
+
+    for module in DEFERRED_MODULES:
+        results["deferred_import_ms"][module] = import_cost(module, min(args.runs, 3))
+
+    print(f"median of {args.runs} fresh processes: import main, open index, first query")
+    print(f"{'':18s} {'import':>9s} {'open':>9s} {'query':>9s} {'total':>9s} {'peak RSS':>10s}  heavy modules loaded")
+    for name, s in results["start"].items():
+        print(f"{name:18s} {s['import_ms']:7.1f}ms {s['open_ms']:7.1f}ms {s['first_query_ms']:7.1f}ms "
+              f"{s['total_ms']:7.1f}ms {s['peak_rss_mib']:6.1f} MiB  {', '.join(s['loaded']) or 'none'}")
+    print("\nimport cost kept off the serving path (own interpreter, median):")
+    for module, ms in results["deferred_import_ms"].items():
+        print(f"  {module:24s} " + (f"{ms:8.1f} ms" if ms is not None else "  not importable here"))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
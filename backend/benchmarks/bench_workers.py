@@ -0,0 +1,260 @@
+"""Multi-worker serving: memory per extra worker and /search throughput against the worker count.
+
+An offline hashed-tfidf index is built as in bench_pipeline.py, with the serving artifact and
+as a copy without it (JSON indexes, each worker holding its own decoded copy). For each
+configuration and worker count, `main.py --serve` is started and --clients load-generator
+processes send /search requests for --seconds, with the response cache off so every request
+runs the search. Memory is then read from /proc for the workers: RSS, PSS (shared pages split
+between the processes mapping them) and the part of each worker's RSS that maps index files.
+
+A last run with the largest worker count sends one query and one pagination cursor repeatedly
+over new connections, with and without SHARED_CACHE_PATH, to show that workers answer each
+other's cached responses and cursors.
+
+    python benchmarks/bench_workers.py --workers 1,2,4 --seconds 5
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlencode
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import LABELS, PROVIDER, build_index  # noqa: E402
+from embedding_providers import provider_directory  # noqa: E402
+from retriever import numpy_index_path  # noqa: E402
+from serving_artifact import artifact_path  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(port, path, params):
+    """One GET on a new connection; returns (status, headers, body)"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        connection.request("GET", f"{path}?{urlencode(params)}")
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def worker_pids(pid):
+    """uvicorn runs a single worker in its own process, several as spawned children"""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return [pid]
+    workers = []
+    for child in children:
+        try:
+            with open(f"/proc/{child}/cmdline", "rb") as f:
+                if b"spawn_main" in f.read():
+                    workers.append(child)
+        except OSError:
+            continue
+    return workers or [pid]
+
+
+def memory(pid, index_root):
+    """RSS, PSS and private memory of a process in MiB, and the RSS/PSS of its index file mappings"""
+    totals = {"rss": 0, "pss": 0, "private": 0, "index_rss": 0, "index_pss": 0}
+    in_index = False
+    with open(f"/proc/{pid}/smaps") as f:
+        for line in f:
+            fields = line.split()
+            if not fields[0].endswith(":"):
+                # Mapping header: address range, perms, offset, device, inode, optional path
+                in_index = len(fields) >= 6 and fields[5].startswith(index_root)
+                continue
+            if len(fields) != 3 or fields[2] != "kB":
+                continue
+            name, kib = fields[0][:-1], int(fields[1])
+            if name == "Rss":
+                totals["rss"] += kib
+                totals["index_rss"] += kib if in_index else 0
+            elif name == "Pss":
+                totals["pss"] += kib
+                totals["index_pss"] += kib if in_index else 0
+            elif name in ("Private_Clean", "Private_Dirty"):
+                totals["private"] += kib
+    return {key: value / 1024 for key, value in totals.items()}
+
+
+def start_server(db_path, workers, env):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "--serve", "--workers", str(workers), "--host", "127.0.0.1",
+         "--port", str(port), "--db_path", db_path, "--provider", PROVIDER],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with {process.returncode}")
+        try:
+            if len(worker_pids(process.pid)) == workers and get(port, "/ready", {})[0] == 200:
+                return process, port
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError("Server did not become ready")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def client(port, queries, seconds):
+    """Send /search requests over one keep-alive connection until the deadline"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors, i = [], 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        connection.request("GET", "/search?" + urlencode({"query": queries[i % len(queries)], "max_results": 10}))
+        response = connection.getresponse()
+        response.read()
+        if response.status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+        i += 1
+    connection.close()
+    return latencies, errors
+
+
+def load(port, queries, clients, seconds):
+    with ProcessPoolExecutor(clients) as pool:
+        # Stagger query order per client so they do not all ask the same thing at once
+        futures = [pool.submit(client, port, queries[i:] + queries[:i], seconds) for i in range(clients)]
+        runs = [future.result() for future in futures]
+    latencies = sorted(latency for run, _ in runs for latency in run)
+    errors = sum(errors for _, errors in runs)
+    return {
+        "requests_per_s": round(len(latencies) / seconds, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3) if latencies else None,
+        "errors": errors,
+    }
+
+
+def serve_and_measure(db_path, index_root, workers, queries, args, env):
+    process, port = start_server(db_path, workers, env)
+    try:
+        # Warm every worker before measuring
+        load(port, queries, args.clients, 1)
+        result = load(port, queries, args.clients, args.seconds)
+        pids = worker_pids(process.pid)
+        per_worker = [memory(pid, index_root) for pid in pids]
+        supervisor = memory(process.pid, index_root) if pids != [process.pid] else None
+    finally:
+        stop_server(process)
+    result.update({
+        "workers": workers,
+        "rss_per_worker_mib": round(statistics.mean(m["rss"] for m in per_worker), 1),
+        "private_per_worker_mib": round(statistics.mean(m["private"] for m in per_worker), 1),
+        "index_rss_per_worker_mib": round(statistics.mean(m["index_rss"] for m in per_worker), 2),
+        "index_pss_total_mib": round(sum(m["index_pss"] for m in per_worker), 2),
+        "pss_total_mib": round(sum(m["pss"] for m in per_worker) + (supervisor["pss"] if supervisor else 0), 1),
+    })
+    return result
+
+
+def shared_cache_check(db_path, workers, env, repeats):
+    """MISS count for one repeated query and how many cursor pages were found, over new connections"""
+    process, port = start_server(db_path, workers, env)
+    try:
+        statuses = [get(port, "/search", {"query": "Java developer with SQL", "max_results": 3})[1].get("x-cache")
+                    for _ in range(repeats)]
+        _, _, body = get(port, "/search", {"query": "Python data analyst", "max_results": 3})
+        cursor = json.loads(body)["next_cursor"]
+        pages = [get(port, "/search/page", {"cursor": cursor, "max_results": 3})[0] for _ in range(repeats)]
+    finally:
+        stop_server(process)
+    return {"misses": statuses.count("MISS"), "hits": statuses.count("HIT"),
+            "pages_found": pages.count(200), "pages_expired": pages.count(410)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--clients", type=int, default=8, help="Load-generator processes")
+    parser.add_argument("--seconds", type=float, default=5, help="Measured load per run")
+    parser.add_argument("--repeats", type=int, default=20, help="Requests per shared-cache check")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+    worker_counts = [int(n) for n in args.workers.split(",")]
+
+    with open(LABELS, encoding="utf-8") as f:
+        queries = [case["query"] for case in json.load(f)["queries"]]
+
+    results = {"cpu_count": os.cpu_count(), "runs": {}, "shared_cache": {}}
+    with tempfile.TemporaryDirectory(prefix="bench_workers_") as tmp:
+        with_artifact = os.path.join(tmp, "artifact", "shl_vector_db")
+        build_index(with_artifact, {}, 1)
+        # Same files without the artifact; copytree keeps the mtimes the staleness check compares
+        without_artifact = os.path.join(tmp, "legacy", "shl_vector_db")
+        shutil.copytree(os.path.dirname(with_artifact), os.path.dirname(without_artifact))
+        os.remove(artifact_path(numpy_index_path(provider_directory(without_artifact, PROVIDER))))
+
+        # Every request runs the search: no response cache, local or shared
+        env = dict(os.environ, RESPONSE_CACHE_SIZE="0", SHARED_CACHE_PATH="")
+        for name, db_path in (("json indexes", without_artifact), ("serving artifact", with_artifact)):
+            index_root = os.path.dirname(db_path)
+            results["runs"][name] = [serve_and_measure(db_path, index_root, n, queries, args, env)
+                                     for n in worker_counts]
+
+        cache_workers = max(2, max(worker_counts))
+        for name, shared_path in (("per-process caches", ""), ("shared cache", os.path.join(tmp, "shared.sqlite3"))):
+            env = dict(os.environ, SHARED_CACHE_PATH=shared_path)
+            results["shared_cache"][name] = shared_cache_check(with_artifact, cache_workers, env, args.repeats)
+
+    print(f"{results['cpu_count']} CPU(s), {args.clients} clients, {args.seconds:g}s per run, /search max_results=10")
+    print(f"{'':18s} {'workers':>7s} {'req/s':>8s} {'p50':>9s} {'p99':>9s} {'RSS/wkr':>9s} "
+          f"{'USS/wkr':>9s} {'PSS all':>9s} {'+/wkr':>8s} {'index RSS/wkr':>14s} {'index PSS all':>14s}")
+    for name, runs in results["runs"].items():
+        base = runs[0]
+        for run in runs:
+            extra = run["workers"] - base["workers"]
+            per_extra = f"{(run['pss_total_mib'] - base['pss_total_mib']) / extra:6.1f}" if extra else "     -"
+            print(f"{name:18s} {run['workers']:7d} {run['requests_per_s']:8.1f} {run['p50_ms']:7.2f}ms "
+                  f"{run['p99_ms']:7.2f}ms {run['rss_per_worker_mib']:5.1f} MiB {run['private_per_worker_mib']:5.1f} MiB "
+                  f"{run['pss_total_mib']:5.1f} MiB {per_extra} MiB {run['index_rss_per_worker_mib']:10.2f} MiB "
+                  f"{run['index_pss_total_mib']:10.2f} MiB")
+    print(f"\nrepeated query and cursor over new connections, {cache_workers} workers, {args.repeats} requests each:")
+    for name, check in results["shared_cache"].items():
+        print(f"  {name:20s} search MISS {check['misses']:3d}  HIT {check['hits']:3d}   "
+              f"page found {check['pages_found']:3d}  expired {check['pages_expired']:3d}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
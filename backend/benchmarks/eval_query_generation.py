@@ -0,0 +1,92 @@
+"""Local keyphrase queries vs Gemini-generated queries on saved job pages: retrieval overlap and latency.
+
+For every fixture page the job description is parsed, a query is built locally and (unless
+--local-only) by Gemini with the query cache bypassed, and both are searched. Reported per page:
+each query, its generation latency, the local confidence, what the "auto" policy would choose,
+and the overlap of the two top-k result lists. Needs a prepared vector database.
+
+    python benchmarks/eval_query_generation.py --k 10
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import config  # noqa: E402
+from html_extract import parse_job_description  # noqa: E402
+from main import (  # noqa: E402
+    DEFAULT_PERSIST_DIRECTORY, build_search_query_prompt, get_query_model, local_search_query,
+    search_assessments
+)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "job_pages")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def result_urls(query, db_path, k):
+    return [doc.metadata.get("url") for doc in search_assessments(query, db_path, k=k)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default=FIXTURES, help="Directory of saved job page .html files")
+    parser.add_argument("--db_path", default=DEFAULT_PERSIST_DIRECTORY)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--local-only", action="store_true", help="Skip Gemini; report local queries only")
+    parser.add_argument("--output", help="Also write the per-page records as JSON")
+    args = parser.parse_args()
+
+    records = []
+    for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            description = parse_job_description(f.read())
+        local, local_seconds = timed(local_search_query, description, args.db_path)
+        record = {
+            "page": os.path.basename(path),
+            "local_query": local.query,
+            "local_confidence": round(local.confidence, 3),
+            "local_ms": round(local_seconds * 1000, 2),
+            "auto_uses_llm": local.confidence < config.QUERY_LOCAL_MIN_CONFIDENCE,
+        }
+        local_results = result_urls(local.query, args.db_path, args.k)
+        if not args.local_only:
+            response, llm_seconds = timed(get_query_model().invoke, build_search_query_prompt(description))
+            llm_query = response.strip()
+            llm_results = result_urls(llm_query, args.db_path, args.k)
+            record.update({
+                "llm_query": llm_query,
+                "llm_ms": round(llm_seconds * 1000, 1),
+                f"overlap@{args.k}": round(len(set(local_results) & set(llm_results)) / args.k, 3),
+            })
+        records.append(record)
+        print(f"\n{record['page']}  (confidence {record['local_confidence']}, "
+              f"auto -> {'llm' if record['auto_uses_llm'] else 'local'})")
+        print(f"  local {record['local_ms']:9.2f} ms  {local.query}")
+        if not args.local_only:
+            print(f"  llm   {record['llm_ms']:9.1f} ms  {record['llm_query']}")
+            print(f"  overlap@{args.k}: {record[f'overlap@{args.k}']}")
+
+    if not records:
+        raise SystemExit(f"No .html pages in {args.pages}")
+    mean = lambda key: sum(r[key] for r in records) / len(records)  # noqa: E731
+    print(f"\n{len(records)} pages   local mean {mean('local_ms'):.2f} ms", end="")
+    if not args.local_only:
+        print(f"   llm mean {mean('llm_ms'):.1f} ms   mean overlap@{args.k} {mean(f'overlap@{args.k}'):.3f}", end="")
+    print(f"   auto would call the LLM for {sum(r['auto_uses_llm'] for r in records)}/{len(records)} pages")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
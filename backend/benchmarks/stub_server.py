@@ -0,0 +1,97 @@
+"""Local stub job board used by the benchmarks: serves a fixed job page after a configurable delay.
+
+The server counts TCP connections, requests and the peak number of requests in flight. Its
+delay and status can be changed while it runs, so client pooling, per-host limits and circuit
+breakers can be observed against a host that slows down, fails and recovers.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+JOB_PAGE = """<html><head><title>Java Developer</title></head><body>
+<main><div class="job-description">
+<h2>Responsibilities</h2>
+<p>Build Java services, write SQL queries and collaborate with business stakeholders.</p>
+<h2>Requirements</h2>
+<p>Graduate level, strong problem solving, 40 minutes assessment window.</p>
+</div></main></body></html>"""
+
+
+def make_handler(stub):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; without this, delayed ACKs add ~40 ms per keep-alive request
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            stub.record("connections")
+
+        def do_GET(self):
+            stub.enter()
+            try:
+                time.sleep(stub.delay)
+                payload = stub.body.encode("utf-8")
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                # Streaming clients hang up once they have read what they need
+                pass
+            finally:
+                stub.leave()
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+class StubServer:
+    """Threaded HTTP server on a free localhost port, usable as a context manager."""
+
+    def __init__(self, delay=0.5, body=JOB_PAGE, status=200):
+        self.delay = delay
+        self.body = body
+        self.status = status
+        self.connections = 0
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(self))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/job"
+
+    def record(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def enter(self):
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def leave(self):
+        with self._lock:
+            self.active -= 1
+
+    def reset_counters(self):
+        with self._lock:
+            self.connections = self.requests = self.max_active = 0
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,579 @@
+import os
+import asyncio
+import json
+import re
+import time
+import secrets
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+_MISSING = object()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for use as a cache key: case-folded, whitespace collapsed"""
+    return re.sub(r'\s+', ' ', query or '').strip().casefold()
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries also expire after `ttl` seconds.
+
+    A ttl of None (or <= 0) disables expiry. Hit, miss and eviction counts are kept for stats().
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl and ttl > 0 else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def touch(self, key: Hashable, ttl: Optional[float] = None) -> bool:
+        """Restart an entry's ttl and mark it recently used; False when it is missing or expired"""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return False
+            now = self._clock()
+            if entry[1] is not None and now >= entry[1]:
+                del self._data[key]
+                self.expirations += 1
+                return False
+            self._data[key] = (entry[0], now + ttl if ttl and ttl > 0 else None)
+            self._data.move_to_end(key)
+            return True
+
+    def pop(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+            return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLiteStore:
+    """Small persistent key -> bytes store so caches survive restarts.
+
+    Entries older than `ttl` seconds are ignored on read and pruned on open; the table is
+    capped at `max_entries` rows, dropping the least recently written first.
+    """
+
+    def __init__(self, path: str, table: str = "cache", ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', table):
+            raise ValueError(f"Invalid table name: {table}")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.table = table
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.prune()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl is not None and time.time() - created_at >= self.ttl:
+            return None
+        return bytes(value)
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(value), time.time())
+            )
+
+    def touch(self, key: str) -> bool:
+        """Restart a row's ttl without rewriting its value; False when there is no such row"""
+        with self._lock:
+            return self._conn.execute(
+                f"UPDATE {self.table} SET created_at = ? WHERE key = ?", (time.time(), key)
+            ).rowcount > 0
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def prune(self):
+        """Drop expired rows and rows beyond max_entries"""
+        with self._lock:
+            if self.ttl is not None:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - self.ttl,))
+            if self.max_entries:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key NOT IN "
+                    f"(SELECT key FROM {self.table} ORDER BY created_at DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PersistentCache:
+    """In-memory TTLCache in front of an optional SQLiteStore table, for JSON-serializable values.
+
+    Each instance has its own size bound, TTL and table, so independent tiers can be tuned
+    and persisted separately.
+    """
+
+    def __init__(self, table: str, max_entries: int = 1024, ttl: Optional[float] = None,
+                 persist_path: Optional[str] = None):
+        self.table = table
+        self.memory = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.store = SQLiteStore(persist_path, table=table, ttl=ttl,
+                                 max_entries=max_entries * 4) if persist_path else None
+        self.persistent_hits = 0
+
+    def get(self, key: str, default=None):
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.store is not None:
+            blob = self.store.get(key)
+            if blob is not None:
+                value = json.loads(blob.decode("utf-8"))
+                self.persistent_hits += 1
+                self.memory.set(key, value)
+                return value
+        return default
+
+    def set(self, key: str, value):
+        self.memory.set(key, value)
+        if self.store is not None:
+            self.store.set(key, json.dumps(value).encode("utf-8"))
+
+    def delete(self, key: str):
+        self.memory.pop(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        stats["persistent"] = self.store is not None
+        stats["persistent_hits"] = self.persistent_hits
+        return stats
+
+
+def _pack_vector(vector: List[float]) -> bytes:
+    return array('d', vector).tobytes()
+
+
+def _unpack_vector(blob: bytes) -> List[float]:
+    values = array('d')
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that caches query vectors keyed on model name and normalized query text.
+
+    Lookups go to the in-memory LRU/TTL cache first, then to the optional SQLite store.
+    Document embedding (ingestion) is passed straight through. Batched query misses go to
+    embed_documents with `query_task_type` when the provider takes one (Google), or as is
+    when it embeds queries and documents alike (`symmetric` local embedders); any other
+    provider gets one embed_query call per text.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, max_entries: int = 4096,
+                 ttl: Optional[float] = None, persist_path: Optional[str] = None,
+                 query_task_type: Optional[str] = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.query_task_type = query_task_type
+        self.memory = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.store = SQLiteStore(persist_path, table="query_embeddings", ttl=ttl,
+                                 max_entries=max_entries * 4) if persist_path else None
+        self.persistent_hits = 0
+
+    def cache_key(self, text: str) -> str:
+        return f"{self.model_name}\x00{normalize_query(text)}"
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache_key(text)
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector
+        if self.store is not None:
+            blob = self.store.get(key)
+            if blob is not None:
+                vector = _unpack_vector(blob)
+                self.persistent_hits += 1
+                self.memory.set(key, vector)
+                return vector
+        vector = self.embeddings.embed_query(text)
+        self.memory.set(key, vector)
+        if self.store is not None:
+            self.store.set(key, _pack_vector(vector))
+        return vector
+
+    def embed_queries(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+        """Embed many queries, serving repeats from cache and sending the rest in batched calls"""
+        keys = [self.cache_key(text) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            vector = self.memory.get(key)
+            if vector is None and self.store is not None:
+                blob = self.store.get(key)
+                if blob is not None:
+                    vector = _unpack_vector(blob)
+                    self.persistent_hits += 1
+                    self.memory.set(key, vector)
+            if vector is None:
+                missing[key] = text
+            else:
+                vectors[key] = vector
+        pending = list(missing.items())
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            for (key, _), vector in zip(chunk, self._embed_query_batch([text for _, text in chunk])):
+                vectors[key] = vector
+                self.memory.set(key, vector)
+                if self.store is not None:
+                    self.store.set(key, _pack_vector(vector))
+        return [vectors[key] for key in keys]
+
+    def _embed_query_batch(self, texts: List[str]) -> List[List[float]]:
+        if self.query_task_type:
+            return self.embeddings.embed_documents(texts, task_type=self.query_task_type)
+        if getattr(self.embeddings, "symmetric", False):
+            return self.embeddings.embed_documents(texts)
+        return [self.embeddings.embed_query(text) for text in texts]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def clear(self):
+        self.memory.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        stats["model"] = self.model_name
+        stats["persistent"] = self.store is not None
+        stats["persistent_hits"] = self.persistent_hits
+        if self.store is not None:
+            stats["persistent_entries"] = len(self.store)
+        return stats
+
+
+class ResponseCache:
+    """Async response cache with request coalescing and stale-while-revalidate.
+
+    Concurrent callers for the same key share one in-flight computation. Entries are fresh
+    for `ttl` seconds; entries stored with allow_stale=True are then served stale for up to
+    `stale_ttl` more seconds while a background task recomputes them. invalidate() drops
+    everything, e.g. after the vector store is rebuilt.
+
+    With `shared_path`, entries are also written to a SQLite table that every process opening
+    the same file reads on a local miss, so serving workers answer each other's repeats. Shared
+    keys are prefixed with `namespace()` (the loaded index version), which keeps a worker still on
+    an old index and one already on the new one from reading each other's results. `dumps`
+    and `loads` turn values into text and back (JSON by default).
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300, stale_ttl: float = 3600,
+                 shared_path: Optional[str] = None, namespace: Callable[[], str] = lambda: "",
+                 dumps: Callable[[Any], str] = json.dumps, loads: Callable[[str], Any] = json.loads):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries = TTLCache(max_entries=max_entries)
+        self.shared = SQLiteStore(shared_path, table="responses", ttl=ttl + stale_ttl,
+                                  max_entries=max_entries * 4) if shared_path else None
+        self.namespace = namespace
+        self._dumps = dumps
+        self._loads = loads
+        self.generation = 0
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
+        self.coalesced = 0
+        self.stale_served = 0
+        self.refreshes = 0
+        self.shared_hits = 0
+
+    async def get_or_compute(self, key: Hashable, compute, allow_stale: bool = False, cacheable=None):
+        """Return (value, status, age) where status is HIT, STALE, COALESCED or MISS"""
+        shared_key = key
+        key = (self.generation, key)
+        entry = self.entries.get(key)
+        if entry is None and self.shared is not None:
+            entry = await self._load_shared(key, shared_key, allow_stale)
+        if entry is not None:
+            value, created_at = entry
+            age = time.monotonic() - created_at
+            if age < self.ttl:
+                return value, "HIT", age
+            if allow_stale:
+                self.stale_served += 1
+                if key not in self._inflight:
+                    self.refreshes += 1
+                    task = self._start(key, compute, allow_stale, cacheable)
+                    task.add_done_callback(_consume_exception)
+                return value, "STALE", age
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start(key, compute, allow_stale, cacheable)
+            status = "MISS"
+        else:
+            self.coalesced += 1
+            status = "COALESCED"
+        # Shield so a disconnecting client does not cancel the computation other callers share
+        return await asyncio.shield(task), status, 0.0
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self.namespace()}\x00{json.dumps(key, default=str)}"
+
+    async def _load_shared(self, key, shared_key, allow_stale):
+        """Copy an entry another process stored into the local tier, keeping its age"""
+        # SQLite reads and writes run on a thread so they never block the event loop
+        blob = await asyncio.to_thread(self.shared.get, self._shared_key(shared_key))
+        if blob is None:
+            return None
+        created, _, payload = blob.partition(b"\n")
+        age = max(0.0, time.time() - float(created))
+        remaining = self.ttl + (self.stale_ttl if allow_stale else 0) - age
+        if remaining <= 0:
+            return None
+        entry = (self._loads(payload.decode("utf-8")), time.monotonic() - age)
+        self.entries.set(key, entry, ttl=remaining)
+        self.shared_hits += 1
+        return entry
+
+    def _start(self, key, compute, allow_stale, cacheable):
+        task = asyncio.ensure_future(self._run(key, compute, allow_stale, cacheable))
+        self._inflight[key] = task
+        return task
+
+    async def _run(self, key, compute, allow_stale, cacheable):
+        try:
+            value = await compute()
+            if cacheable is None or cacheable(value):
+                ttl = self.ttl + (self.stale_ttl if allow_stale else 0)
+                self.entries.set(key, (value, time.monotonic()), ttl=ttl)
+                if self.shared is not None and key[0] == self.generation:
+                    await asyncio.to_thread(self.shared.set, self._shared_key(key[1]),
+                                            repr(time.time()).encode() + b"\n" + self._dumps(value).encode("utf-8"))
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self):
+        """Drop every cached response; in-flight computations finish but are not reused.
+        Shared entries stay for processes still on the previous index version."""
+        self.generation += 1
+        self.entries.clear()
+
+    def close(self):
+        if self.shared is not None:
+            self.shared.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.entries.stats()
+        stats.update({
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "generation": self.generation,
+            "inflight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "stale_served": self.stale_served,
+            "refreshes": self.refreshes,
+            "shared": self.shared is not None,
+            "shared_hits": self.shared_hits,
+        })
+        return stats
+
+
+def _consume_exception(task):
+    # Background refreshes have no awaiting caller; read the exception so it is not reported as lost
+    if not task.cancelled():
+        task.exception()
+
+
+class CursorStore:
+    """Short-lived server-side storage for ranked result lists behind pagination cursors.
+
+    A cursor token is "<id>.<offset>": the id names the stored list, the offset where the
+    next page starts, so every page after the first is a slice. With `shared_path` the lists
+    are also kept in a SQLite table, so a page can be served by another worker process than
+    the one that ran the search.
+
+    A cursor is created once per ranked list, when the /search response holding it is cached;
+    every later response handing it out calls renew(), which only restarts its ttl. The shared
+    row is kept a quarter ttl longer and touched at most once per quarter ttl, so it never
+    expires before the local entry.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 900, shared_path: Optional[str] = None,
+                 dumps: Callable[[Any], str] = json.dumps, loads: Callable[[str], Any] = json.loads):
+        self.entries = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.shared = SQLiteStore(shared_path, table="cursors", ttl=ttl * 1.25,
+                                  max_entries=max_entries * 4) if shared_path else None
+        # Ids whose shared row was written or touched within the last quarter ttl
+        self._shared_written = TTLCache(max_entries=max_entries, ttl=ttl / 4)
+        self._dumps = dumps
+        self._loads = loads
+
+    def put(self, value) -> str:
+        cursor_id = secrets.token_urlsafe(12)
+        self._store(cursor_id, value)
+        return cursor_id
+
+    def _store(self, cursor_id: str, value):
+        self.entries.set(cursor_id, value)
+        if self.shared is not None:
+            self.shared.set(cursor_id, self._dumps(value).encode("utf-8"))
+            self._shared_written.set(cursor_id, True)
+
+    def renew(self, cursor_id: str, restore: Callable[[], Any]):
+        """Give a cursor another ttl; `restore()` rebuilds its list if it was already evicted"""
+        if not self.entries.touch(cursor_id):
+            self._store(cursor_id, restore())
+        elif self.shared is not None and cursor_id not in self._shared_written:
+            if not self.shared.touch(cursor_id):
+                self.shared.set(cursor_id, self._dumps(self.entries.get(cursor_id)).encode("utf-8"))
+            self._shared_written.set(cursor_id, True)
+
+    def get(self, cursor_id: str):
+        value = self.entries.get(cursor_id)
+        if value is None and self.shared is not None:
+            value = self._load_shared(cursor_id)
+        return value
+
+    def _load_shared(self, cursor_id: str):
+        blob = self.shared.get(cursor_id)
+        if blob is None:
+            return None
+        value = self._loads(blob.decode("utf-8"))
+        self.entries.set(cursor_id, value)
+        return value
+
+    async def put_async(self, value) -> str:
+        """put() for the event loop: the shared SQLite write runs on a thread"""
+        if self.shared is None:
+            return self.put(value)
+        return await asyncio.to_thread(self.put, value)
+
+    async def get_async(self, cursor_id: str):
+        """get() for the event loop: a local miss reads the shared table on a thread"""
+        value = self.entries.get(cursor_id)
+        if value is None and self.shared is not None:
+            value = await asyncio.to_thread(self._load_shared, cursor_id)
+        return value
+
+    async def renew_async(self, cursor_id: str, restore: Callable[[], Any]):
+        """renew() for the event loop: usually an in-memory touch; SQLite writes run on a thread"""
+        if self.shared is None:
+            self.renew(cursor_id, restore)
+        elif not (cursor_id in self._shared_written and self.entries.touch(cursor_id)):
+            await asyncio.to_thread(self.renew, cursor_id, restore)
+
+    @staticmethod
+    def encode(cursor_id: str, offset: int) -> str:
+        return f"{cursor_id}.{offset}"
+
+    @staticmethod
+    def decode(token: str):
+        cursor_id, _, offset = token.rpartition(".")
+        if not cursor_id or not offset.isdigit():
+            raise ValueError(f"Malformed cursor: {token}")
+        return cursor_id, int(offset)
+
+    def close(self):
+        if self.shared is not None:
+            self.shared.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.entries.stats()
+        stats["shared"] = self.shared is not None
+        return stats
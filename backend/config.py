@@ -0,0 +1,170 @@
+import os
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Per-stage timeouts for the /search pipeline, in seconds
+SCRAPE_TIMEOUT = _env_float("SCRAPE_TIMEOUT", 10)
+LLM_TIMEOUT = _env_float("LLM_TIMEOUT", 30)
+SEARCH_TIMEOUT = _env_float("SEARCH_TIMEOUT", 15)
+
+# Job pages are streamed through an incremental parser: the download stops once a container for the
+# most preferred job-description selector has been parsed, and never reads more than SCRAPE_MAX_BYTES
+SCRAPE_MAX_BYTES = _env_int("SCRAPE_MAX_BYTES", 2 * 1024 * 1024)
+SCRAPE_CHUNK_SIZE = _env_int("SCRAPE_CHUNK_SIZE", 64 * 1024)
+
+# Send a Server-Timing header with per-stage durations on every response, not only on ?timing=true
+SERVER_TIMING = _env_bool("SERVER_TIMING", False)
+
+# Worker threads for blocking work (vector search, HTML parsing) run off the event loop
+SEARCH_WORKERS = _env_int("SEARCH_WORKERS", 8)
+
+# Connection pool for outgoing job-page requests
+HTTP_MAX_CONNECTIONS = _env_int("HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE = _env_int("HTTP_MAX_KEEPALIVE", 20)
+
+# Per job-board host: requests in flight, requests started per second (0 disables the limit), and a
+# circuit breaker that fails fast for BREAKER_RESET_TIMEOUT seconds after that many consecutive
+# timeouts, connection errors or 5xx/429 responses
+HOST_MAX_CONCURRENCY = _env_int("HOST_MAX_CONCURRENCY", 6)
+HOST_RATE_LIMIT = _env_float("HOST_RATE_LIMIT", 10)
+BREAKER_FAILURE_THRESHOLD = _env_int("BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_RESET_TIMEOUT = _env_float("BREAKER_RESET_TIMEOUT", 30)
+
+# Query-embedding cache; an empty EMBEDDING_CACHE_PATH keeps it in memory only
+EMBEDDING_CACHE_SIZE = _env_int("EMBEDDING_CACHE_SIZE", 4096)
+EMBEDDING_CACHE_TTL = _env_float("EMBEDDING_CACHE_TTL", 7 * 24 * 3600)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "database/cache/embeddings.sqlite3")
+
+# Full /search response cache; URL-derived entries are served stale for RESPONSE_CACHE_STALE_TTL
+# more seconds while they are refreshed in the background
+RESPONSE_CACHE_SIZE = _env_int("RESPONSE_CACHE_SIZE", 1024)
+RESPONSE_CACHE_TTL = _env_float("RESPONSE_CACHE_TTL", 300)
+RESPONSE_CACHE_STALE_TTL = _env_float("RESPONSE_CACHE_STALE_TTL", 3600)
+
+# Job-page text cache: pages are reused without any request for PAGE_CACHE_FRESH_TTL seconds,
+# then revalidated with conditional GETs (ETag / Last-Modified) until PAGE_CACHE_MAX_AGE
+PAGE_CACHE_SIZE = _env_int("PAGE_CACHE_SIZE", 512)
+PAGE_CACHE_FRESH_TTL = _env_float("PAGE_CACHE_FRESH_TTL", 3600)
+PAGE_CACHE_MAX_AGE = _env_float("PAGE_CACHE_MAX_AGE", 7 * 24 * 3600)
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "database/cache/pages.sqlite3")
+
+# Shared cross-process cache for /search responses, pagination cursors and /metrics, so every
+# serving worker sees the others' entries. Empty keeps all of them per process; --serve with more
+# than one worker falls back to DEFAULT_SHARED_CACHE_PATH
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+DEFAULT_SHARED_CACHE_PATH = "database/cache/shared.sqlite3"
+
+# Each serving process writes its /metrics snapshot to SHARED_CACHE_PATH this often (seconds), so any
+# worker can answer a scrape with the totals of all of them
+METRICS_FLUSH_INTERVAL = _env_float("METRICS_FLUSH_INTERVAL", 5)
+
+# Production serving (--serve): worker processes, each mapping the same read-only serving artifact
+# but adding its own interpreter and libraries (about 75 MiB), so more than one is opt-in per
+# deployment; the port falls back to the platform-provided PORT
+SERVE_WORKERS = _env_int("SERVE_WORKERS", 1)
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = _env_int("SERVE_PORT", os.getenv("PORT", 8000))
+
+# Generated search queries, keyed on a hash of the job description text
+QUERY_CACHE_SIZE = _env_int("QUERY_CACHE_SIZE", 2048)
+QUERY_CACHE_TTL = _env_float("QUERY_CACHE_TTL", 30 * 24 * 3600)
+QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH", "database/cache/queries.sqlite3")
+
+# Vector database directory the API serves from (the --db_path default)
+PERSIST_DIRECTORY = os.getenv("PERSIST_DIRECTORY", "database/shl_vector_db")
+
+# Retrieval backend: "chroma" (persisted Chroma store) or "numpy" (in-process matrix index).
+# NUMPY_INDEX_PATH defaults to "<persist directory>_numpy"
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "chroma")
+NUMPY_INDEX_PATH = os.getenv("NUMPY_INDEX_PATH", "")
+
+# The Chroma backend loads a second, in-memory copy of the vectors for /assessments/{id}/similar;
+# above this many documents it refuses (the numpy backend serves similar() from its own index)
+CHROMA_MATRIX_MAX_DOCUMENTS = _env_int("CHROMA_MATRIX_MAX_DOCUMENTS", 20000)
+
+# Filtered-search planning: filters matching at least this share of the catalog are answered by
+# over-fetching PLANNER_OVERFETCH times the expected hits and post-filtering; narrower filters
+# restrict the vector search to the candidate set
+PLANNER_POSTFILTER_MIN_SELECTIVITY = _env_float("PLANNER_POSTFILTER_MIN_SELECTIVITY", 0.3)
+PLANNER_OVERFETCH = _env_float("PLANNER_OVERFETCH", 1.5)
+
+# Depth of the ranked list kept per search for pagination, and how long its cursor lives
+SEARCH_DEPTH = _env_int("SEARCH_DEPTH", 30)
+CURSOR_TTL = _env_float("CURSOR_TTL", 900)
+CURSOR_STORE_SIZE = _env_int("CURSOR_STORE_SIZE", 2048)
+
+# Batch search: items per request, concurrent job-page scrapes per batch, and queries per embedding call
+BATCH_MAX_ITEMS = _env_int("BATCH_MAX_ITEMS", 1000)
+BATCH_URL_CONCURRENCY = _env_int("BATCH_URL_CONCURRENCY", 8)
+BATCH_EMBED_SIZE = _env_int("BATCH_EMBED_SIZE", 100)
+
+# Ingestion: documents per embedding call / upsert, and retries with exponential backoff (seconds)
+INGEST_BATCH_SIZE = _env_int("INGEST_BATCH_SIZE", 100)
+INGEST_MAX_RETRIES = _env_int("INGEST_MAX_RETRIES", 5)
+INGEST_RETRY_BACKOFF = _env_float("INGEST_RETRY_BACKOFF", 2.0)
+
+# Resumable embedding job: parallel chunk requests, request rate cap (per second, 0 = no cap) and
+# checkpoint directory (defaults to "<persist directory>_embeddings")
+INGEST_WORKERS = _env_int("INGEST_WORKERS", 4)
+INGEST_RATE_LIMIT = _env_float("INGEST_RATE_LIMIT", 0)
+INGEST_CHECKPOINT_DIR = os.getenv("INGEST_CHECKPOINT_DIR", "")
+
+# Hybrid retrieval: vector and BM25 keyword rankings, each HYBRID_DEPTH deep, fused by reciprocal
+# rank (RRF_K damps the weight of top ranks). Queries of at most LEXICAL_FAST_PATH_MAX_TERMS indexed
+# words skip the embedding call (0 disables the fast path). LEXICAL_INDEX_PATH defaults to
+# "<persist directory>_lexical.json". Off until benchmarks/bench_pipeline.py shows no recall loss
+# with the production embeddings: offline it helps text queries but costs job pages recall@5
+HYBRID_SEARCH = _env_bool("HYBRID_SEARCH", False)
+HYBRID_DEPTH = _env_int("HYBRID_DEPTH", 20)
+RRF_K = _env_int("RRF_K", 60)
+LEXICAL_FAST_PATH_MAX_TERMS = _env_int("LEXICAL_FAST_PATH_MAX_TERMS", 0)
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "")
+
+# Query/document embedding provider: "google" (hosted), or "hashed-tfidf" / "sentence-transformers"
+# on the local CPU. Each provider has its own collection ("<persist directory>_<provider>")
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "google")
+LOCAL_EMBEDDING_DIMENSIONS = _env_int("LOCAL_EMBEDDING_DIMENSIONS", 1024)
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+LOCAL_EMBEDDING_WORKERS = _env_int("LOCAL_EMBEDDING_WORKERS", 2)
+
+# Query generation for job description URLs: "llm" (always Gemini), "auto" (Gemini only when the local
+# query's confidence is below QUERY_LOCAL_MIN_CONFIDENCE) or "local" (keyphrase extraction only).
+# Stays "llm" until benchmarks/eval_query_generation.py shows the local queries retrieve as well
+QUERY_GENERATION_POLICY = os.getenv("QUERY_GENERATION_POLICY", "llm")
+QUERY_LOCAL_MIN_CONFIDENCE = _env_float("QUERY_LOCAL_MIN_CONFIDENCE", 0.7)
+
+# Two-stage retrieval: the first stage fetches RERANK_DEPTH candidates, which are re-ranked by a
+# weighted sum of first-stage rank, requested facet values matched, duration fit and keyword overlap.
+# Re-ranking is skipped when the search has already taken RERANK_BUDGET_MS. Off until
+# benchmarks/bench_pipeline.py shows no loss: offline it lifts text-query MRR but drops job pages
+RERANK = _env_bool("RERANK", False)
+RERANK_DEPTH = _env_int("RERANK_DEPTH", 50)
+RERANK_BUDGET_MS = _env_float("RERANK_BUDGET_MS", 500)
+RERANK_WEIGHT_RANK = _env_float("RERANK_WEIGHT_RANK", 1.0)
+RERANK_WEIGHT_FACETS = _env_float("RERANK_WEIGHT_FACETS", 0.3)
+RERANK_WEIGHT_DURATION = _env_float("RERANK_WEIGHT_DURATION", 0.2)
+RERANK_WEIGHT_LEXICAL = _env_float("RERANK_WEIGHT_LEXICAL", 0.5)
+
+# Item-to-item similarity: neighbors precomputed per catalog document when the serving artifact is
+# written. Filters on /assessments/{id}/similar are applied to this list, so it is deeper than a page
+KNN_NEIGHBORS = _env_int("KNN_NEIGHBORS", 50)
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+import config
+from ingestion import with_retries
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+def text_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class RateLimiter:
+    """Spaces calls at least 1 / rate seconds apart across threads (rate <= 0 disables it)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic offline embeddings: a unit vector seeded from the SHA-256 of the text.
+
+    Equal texts always get equal vectors and no network is involved, which makes ingestion
+    runs reproducible in tests and benchmarks. The vectors carry no meaning.
+    """
+
+    def __init__(self, dimensions: int = 64):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class EmbeddingJob:
+    """Embeds documents in chunks on a thread pool, checkpointing every finished chunk to disk.
+
+    Each chunk is saved as `chunk-<n>.npy` and recorded in `manifest.json` with the keys
+    (hash of model and text) of its rows. A rerun after a crash or rate-limit failure only
+    embeds texts that no checkpoint covers, and the vectors for the whole run are then
+    assembled from the checkpoint files without further remote calls. prune() drops what the
+    current catalog no longer needs once its vectors are safely stored.
+    """
+
+    def __init__(self, checkpoint_dir: str, embeddings: Embeddings, model: str,
+                 chunk_size: Optional[int] = None, workers: Optional[int] = None,
+                 rate_limit: Optional[float] = None, retries: Optional[int] = None,
+                 backoff: Optional[float] = None):
+        self.checkpoint_dir = checkpoint_dir
+        self.embeddings = embeddings
+        self.model = model
+        self.chunk_size = chunk_size or config.INGEST_BATCH_SIZE
+        self.workers = workers or config.INGEST_WORKERS
+        self.rate_limiter = RateLimiter(config.INGEST_RATE_LIMIT if rate_limit is None else rate_limit)
+        self.retries = config.INGEST_MAX_RETRIES if retries is None else retries
+        self.backoff = config.INGEST_RETRY_BACKOFF if backoff is None else backoff
+        self.embedded = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, MANIFEST_FILE)
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {"chunks": {}}
+        # Drop chunks whose file did not make it to disk
+        manifest["chunks"] = {name: keys for name, keys in manifest.get("chunks", {}).items()
+                              if os.path.exists(os.path.join(self.checkpoint_dir, name))}
+        return manifest
+
+    def _locations(self) -> Dict[str, Tuple[str, int]]:
+        return {key: (name, row) for name, keys in self._manifest["chunks"].items() for row, key in enumerate(keys)}
+
+    def _chunk_path(self) -> Tuple[str, str]:
+        """A chunk file name not yet taken, and its path; call with the lock held"""
+        name = f"chunk-{len(self._manifest['chunks']):06d}.npy"
+        while os.path.exists(os.path.join(self.checkpoint_dir, name)):
+            name = f"chunk-{int(name[6:12]) + 1:06d}.npy"
+        return name, os.path.join(self.checkpoint_dir, name)
+
+    def _write_manifest(self):
+        with open(self.manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+    @staticmethod
+    def _write_vectors(path: str, vectors):
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, np.asarray(vectors, dtype=np.float32))
+        os.replace(path + ".tmp", path)
+
+    def _save_chunk(self, keys: List[str], vectors: List[List[float]]):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        with self._lock:
+            name, path = self._chunk_path()
+            # Vectors land on disk before the manifest names them, each via an atomic rename
+            self._write_vectors(path, vectors)
+            self._manifest["chunks"][name] = keys
+            self._write_manifest()
+
+    def prune(self, texts: Sequence[str]) -> int:
+        """Delete checkpointed vectors for anything but texts, e.g. after a model or catalog
+        change. Chunks holding some of them are compacted. Returns the number of rows dropped."""
+        wanted = {text_key(self.model, text) for text in texts}
+        dropped = 0
+        with self._lock:
+            if not os.path.isdir(self.checkpoint_dir):
+                return 0
+            chunks = dict(self._manifest["chunks"])
+            for name, keys in list(chunks.items()):
+                rows = [row for row, key in enumerate(keys) if key in wanted]
+                if len(rows) == len(keys):
+                    continue
+                dropped += len(keys) - len(rows)
+                del chunks[name]
+                if rows:
+                    vectors = np.load(os.path.join(self.checkpoint_dir, name))[rows]
+                    compacted, path = self._chunk_path()
+                    self._write_vectors(path, vectors)
+                    chunks[compacted] = [keys[row] for row in rows]
+            # The manifest stops naming old chunks before their files go, so a crash leaves only strays
+            self._manifest["chunks"] = chunks
+            self._write_manifest()
+            for name in os.listdir(self.checkpoint_dir):
+                if name.startswith("chunk-") and name not in chunks:
+                    os.remove(os.path.join(self.checkpoint_dir, name))
+        if dropped:
+            logger.info("Pruned %d stale rows from the embedding checkpoint", dropped)
+        return dropped
+
+    def _embed_chunk(self, index: int, keys: List[str], texts: List[str]):
+        def call():
+            self.rate_limiter.acquire()
+            return self.embeddings.embed_documents(texts)
+        vectors = with_retries(call, self.retries, self.backoff, f"embedding chunk {index}")
+        self._save_chunk(keys, vectors)
+        with self._lock:
+            self.embedded += len(texts)
+
+    def run(self, texts: Sequence[str]) -> np.ndarray:
+        """Vectors for texts, in order, embedding only what the checkpoint does not hold yet"""
+        keys = [text_key(self.model, text) for text in texts]
+        known = self._locations()
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in known:
+                missing.setdefault(key, text)
+        self.reused = len(set(keys)) - len(missing)
+        pending = list(missing.items())
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+        if chunks:
+            logger.info("Embedding %d texts in %d chunks (%d reused from checkpoint)",
+                        len(pending), len(chunks), self.reused)
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed") as executor:
+                futures = [executor.submit(self._embed_chunk, i, [k for k, _ in chunk], [t for _, t in chunk])
+                           for i, chunk in enumerate(chunks)]
+                done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+                for future in not_done:
+                    future.cancel()
+                # Chunks already finished stay checkpointed; the first failure is re-raised
+                for future in futures:
+                    if future.done() and not future.cancelled() and future.exception() is not None:
+                        raise future.exception()
+        return self.assemble(keys)
+
+    def assemble(self, keys: Sequence[str]) -> np.ndarray:
+        """Stack the checkpointed vectors for keys without any remote calls"""
+        locations = self._locations()
+        matrices: Dict[str, np.ndarray] = {}
+        rows = []
+        for key in keys:
+            name, row = locations[key]
+            if name not in matrices:
+                matrices[name] = np.load(os.path.join(self.checkpoint_dir, name), mmap_mode="r")
+            rows.append(matrices[name][row])
+        if not rows:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(rows).astype(np.float32, copy=False)
@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+import config
+from lexical import tokenize
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "models/embedding-001"
+# "google" is the hosted model; the others run on the local CPU and never leave the process
+EMBEDDING_PROVIDERS = ("google", "hashed-tfidf", "sentence-transformers")
+
+
+def provider_directory(persist_directory: str, provider: str) -> str:
+    """Each provider gets its own collection; the Google one keeps the original directory"""
+    if provider == "google":
+        return persist_directory
+    return f"{os.path.normpath(persist_directory)}_{provider}"
+
+
+def embedder_state_path(directory: str) -> str:
+    """Fitted state of a local embedder, kept next to the collection it embedded"""
+    return os.path.normpath(directory) + "_embedder.json"
+
+
+class LocalEmbeddings(Embeddings):
+    """Base for in-process embedders: a batched encode() plus async methods on a dedicated thread pool"""
+
+    model_name = "local"
+    # Queries and documents are encoded the same way, so query batches can go through embed_documents
+    symmetric = True
+
+    def __init__(self, batch_size: int = 64, workers: Optional[int] = None):
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=workers or config.LOCAL_EMBEDDING_WORKERS,
+                                            thread_name_prefix="embed")
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """L2-normalized float32 vectors for texts, encoded batch_size at a time"""
+        batches = [self._encode_batch(list(texts[i:i + self.batch_size]))
+                   for i in range(0, len(texts), self.batch_size)]
+        if not batches:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(batches)
+
+    async def aencode(self, texts: Sequence[str]) -> np.ndarray:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.encode, texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return (await self.aencode(texts)).tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aencode([text]))[0].tolist()
+
+
+def _feature_hash(feature: str) -> int:
+    # Python's hash() is salted per process; vectors must be stable across runs
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _features(text: str) -> Counter:
+    """Word unigrams and bigrams, plus character trigrams of each word for spelling variants"""
+    tokens = tokenize(text)
+    features = Counter(tokens)
+    for token in tokens:
+        if '_' not in token and len(token) > 3:
+            padded = f"<{token}>"
+            features.update(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+class HashedTfidfEmbeddings(LocalEmbeddings):
+    """TF-IDF vectors projected into a fixed number of dimensions with the signed hashing trick.
+
+    Sublinear term frequency times IDF, where IDF is fitted on the catalog at ingestion time
+    and saved next to the collection (features unseen during fitting get the maximum IDF).
+    Hashing into `dimensions` buckets with a random sign per feature is a sparse random
+    projection, so cosine similarity between vectors approximates TF-IDF cosine similarity.
+    """
+
+    def __init__(self, dimensions: int = 1024, idf: Optional[Dict[int, float]] = None,
+                 documents: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.dimensions = dimensions
+        self.idf = idf or {}
+        self.documents = documents
+        self.default_idf = math.log((documents + 1) / 1) + 1 if documents else 1.0
+
+    @property
+    def model_name(self) -> str:
+        digest = hashlib.sha256(json.dumps(sorted(self.idf.items())).encode("utf-8")).hexdigest()[:12]
+        return f"hashed-tfidf-{self.dimensions}-{digest}"
+
+    @classmethod
+    def fit(cls, texts: Iterable[str], dimensions: int = 1024, **kwargs) -> "HashedTfidfEmbeddings":
+        document_frequency: Counter = Counter()
+        count = 0
+        for text in texts:
+            count += 1
+            document_frequency.update({_feature_hash(f) for f in _features(text)})
+        idf = {feature: math.log((count + 1) / (df + 1)) + 1 for feature, df in document_frequency.items()}
+        return cls(dimensions, idf, count, **kwargs)
+
+    def save(self, path: str):
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"dimensions": self.dimensions, "documents": self.documents,
+                       "idf": {str(k): v for k, v in self.idf.items()}}, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "HashedTfidfEmbeddings":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["dimensions"], {int(k): v for k, v in data["idf"].items()}, data["documents"], **kwargs)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, tf in _features(text).items():
+                h = _feature_hash(feature)
+                weight = (1 + math.log(tf)) * self.idf.get(h, self.default_idf)
+                matrix[row, h % self.dimensions] += weight if (h >> 63) & 1 else -weight
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class SentenceTransformerEmbeddings(LocalEmbeddings):
+    """A small sentence-transformers model on the CPU (optional dependency)"""
+
+    def __init__(self, model: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("The sentence-transformers provider needs `pip install sentence-transformers`") from e
+        self.model_name = model or config.LOCAL_EMBEDDING_MODEL
+        self.model = SentenceTransformer(self.model_name, device="cpu")
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True),
+                          dtype=np.float32)
+
+
+def create_embeddings(provider: str, directory: str,
+                      fit_texts: Optional[Sequence[str]] = None) -> Tuple[Embeddings, str]:
+    """The embedding client for a provider's collection and the model name that keys its caches.
+
+    fit_texts (the catalog documents, at ingestion time) refit and save any fitted state;
+    at query time the saved state is loaded instead.
+    """
+    if provider not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"Unknown embedding provider: {provider}")
+    if provider == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        return GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL
+    if provider == "sentence-transformers":
+        embeddings = SentenceTransformerEmbeddings()
+        return embeddings, embeddings.model_name
+
+    state_path = embedder_state_path(directory)
+    if fit_texts is not None:
+        embeddings = HashedTfidfEmbeddings.fit(fit_texts, dimensions=config.LOCAL_EMBEDDING_DIMENSIONS)
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+        embeddings.save(state_path)
+    elif os.path.exists(state_path):
+        embeddings = HashedTfidfEmbeddings.load(state_path)
+    else:
+        logger.warning("No fitted state at %s; hashed-tfidf embeddings fall back to uniform IDF", state_path)
+        embeddings = HashedTfidfEmbeddings(config.LOCAL_EMBEDDING_DIMENSIONS)
+    return embeddings, embeddings.model_name
@@ -0,0 +1,149 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from filter_index import FilterIndex, facet_key
+
+# Placeholder values in the catalog that are not real job levels or languages
+PLACEHOLDER_VALUES = {'default'}
+
+# Query words that select a test category, in match priority order ("soft skill" before "skill")
+CATEGORY_PATTERNS = {
+    'soft_skill': r'soft\s+skills?|competenc\w*|situational|judge?ment',
+    'cognitive': r'cognitive|ability|aptitude',
+    'personality': r'personality|behaviou?r',
+    'technical': r'technical|knowledge|skills?',
+}
+DURATION_PATTERN = r'(?P<minutes>\d+)\s*(?:minutes|mins|min)'
+
+
+@dataclass
+class QueryFacets:
+    """Facets detected in a query; job levels, languages and categories are facet keys"""
+    job_levels: List[str] = field(default_factory=list)
+    languages: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+    max_duration: Optional[int] = None
+    remote_testing: bool = False
+    adaptive_irt: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.job_levels or self.languages or self.categories or self.max_duration is not None
+                    or self.remote_testing or self.adaptive_irt)
+
+    def facet_filters(self, include_duration: bool = True) -> List[Dict[str, Any]]:
+        """One Chroma-style condition per detected facet, OR-ing the values within each facet"""
+        facets = []
+        for prefix, values in (('job_level_', self.job_levels), ('contains_', self.categories)):
+            if values:
+                facets.append(_any_of([{prefix + value: True} for value in values]))
+        if self.max_duration is not None and include_duration:
+            # A stated time is an upper bound; unknown durations (stored as 0) cannot be shown to fit
+            facets.append({"duration": {"$gt": 0}})
+            facets.append({"duration": {"$lte": self.max_duration}})
+        if self.languages:
+            facets.append(_any_of([{'language_' + value: True} for value in self.languages]))
+        if self.remote_testing:
+            facets.append({"remote_testing": True})
+        if self.adaptive_irt:
+            facets.append({"adaptive_irt": True})
+        return facets
+
+    def to_filter(self) -> Optional[Dict[str, Any]]:
+        """Chroma-style filter: OR within a facet, AND across facets (None when nothing was detected)"""
+        facets = self.facet_filters()
+        if not facets:
+            return None
+        return facets[0] if len(facets) == 1 else {"$and": facets}
+
+
+def _any_of(conditions):
+    return conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+
+def _words(label: str) -> List[str]:
+    return [w for w in re.split(r'[\s_\-()]+', label.strip().lower()) if w]
+
+
+def _term_pattern(term: str) -> str:
+    # Spaces, hyphens, underscores and parentheses are interchangeable separators:
+    # "entry level" matches "Entry-Level" and "english usa" matches "English (USA)"
+    return r'[\s_\-()]+'.join(re.escape(w) for w in term.split(' '))
+
+
+class FacetExtractor:
+    """One-pass facet extraction with a single compiled alternation over the catalog vocabulary.
+
+    The vocabulary (job levels and languages) comes from the catalog data rather than
+    hard-coded lists. Each label also matches by its base name, so "english" finds
+    "English (USA)" and "English International", and "spanish" finds "Latin American Spanish".
+    """
+
+    def __init__(self, vocabulary: Dict[str, Iterable[str]]):
+        self.terms: Dict[str, Dict[str, set]] = {}
+        for facet in ('job_level', 'language'):
+            labels = [l for l in vocabulary.get(facet, []) if facet_key(l) not in PLACEHOLDER_VALUES]
+            self._add_terms(facet, labels)
+        alternatives = sorted(
+            {term for facet_terms in self.terms.values() for term in facet_terms},
+            key=len, reverse=True
+        )
+        groups = [DURATION_PATTERN]
+        if alternatives:
+            groups.append('(?P<term>' + '|'.join(_term_pattern(t) for t in alternatives) + ')')
+        groups += [f'(?P<{name}>{pattern})' for name, pattern in CATEGORY_PATTERNS.items()]
+        groups += [r'(?P<remote>remote)', r'(?P<adaptive>adaptive)']
+        self.pattern = re.compile(r'(?<!\w)(?:' + '|'.join(groups) + r')(?!\w)', re.IGNORECASE)
+
+    def _add_terms(self, facet: str, labels: List[str]):
+        terms = self.terms.setdefault(facet, {})
+        bases = {}
+        for label in labels:
+            base = ' '.join(_words(re.sub(r'\(.*?\)', ' ', label)))
+            bases[label] = base
+            for term in {' '.join(_words(label)), base}:
+                if term:
+                    terms.setdefault(term, set()).add(facet_key(label))
+        if facet == 'language':
+            # A qualified label ("Latin American Spanish") also answers to its plain language name
+            base_names = set(bases.values())
+            for label in labels:
+                for word in _words(label):
+                    if word in base_names and word != bases[label]:
+                        terms.setdefault(word, set()).add(facet_key(label))
+
+    @classmethod
+    def from_filter_index(cls, filter_index: FilterIndex) -> "FacetExtractor":
+        return cls({facet: filter_index.labels.get(facet, {}).values() for facet in ('job_level', 'language')})
+
+    def language_keys(self, value: str) -> List[str]:
+        """Facet keys of the catalog languages a language name stands for, matched like query text:
+        "English" gives every English variant, "english usa" or "English (USA)" just that one"""
+        keys = self.terms.get('language', {}).get(' '.join(_words(value)))
+        return sorted(keys) if keys else [facet_key(value)]
+
+    def extract(self, query: str) -> QueryFacets:
+        facets = QueryFacets()
+        seen = set()
+        for match in self.pattern.finditer(query or ''):
+            group = match.lastgroup
+            if group == 'minutes':
+                if facets.max_duration is None:
+                    facets.max_duration = int(match.group('minutes'))
+            elif group == 'term':
+                term = ' '.join(_words(match.group('term')))
+                for facet, facet_terms in self.terms.items():
+                    target = facets.job_levels if facet == 'job_level' else facets.languages
+                    for key in sorted(facet_terms.get(term, ())):
+                        if (facet, key) not in seen:
+                            seen.add((facet, key))
+                            target.append(key)
+            elif group in CATEGORY_PATTERNS:
+                if group not in facets.categories:
+                    facets.categories.append(group)
+            elif group == 'remote':
+                facets.remote_testing = True
+            elif group == 'adaptive':
+                facets.adaptive_irt = True
+        return facets
@@ -0,0 +1,393 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop = None
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised without making a request while a host's circuit breaker is open"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"{host} is failing; not retrying for {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def _is_host_failure(error: BaseException) -> bool:
+    """Errors that say the host is unhealthy (timeouts, refused connections, 5xx, 429), as opposed
+    to a bad URL or a missing page"""
+    if isinstance(error, (httpx.TransportError, requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    elif isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+    else:
+        return False
+    return status >= 500 or status == 429
+
+
+class _AsyncWaiter:
+    """A coroutine queued for a host slot; `granted` is set when a finishing request hands it over"""
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: "asyncio.Future", delay: float):
+    if not future.done():
+        future.set_result(delay)
+
+
+def _is_response(error: Optional[BaseException]) -> bool:
+    """Whether a request ended with the host answering, including with a 4xx status"""
+    return error is None or isinstance(error, (httpx.HTTPStatusError, requests.HTTPError))
+
+
+class HostPolicy:
+    """Per-host concurrency limit, request spacing and circuit breaker.
+
+    At most `concurrency` requests to the host are in flight at once, across threads and the
+    event loop, and requests start at least 1 / rate_limit seconds apart. After
+    `failure_threshold` consecutive host failures the breaker opens and requests fail fast
+    with CircuitOpenError; after `reset_timeout` one trial request is let through (half-open)
+    and its outcome closes or reopens the breaker. Only an answer from the host counts as a
+    success; a cancelled call or an error of the caller's own leaves the failure count as it is.
+    """
+
+    def __init__(self, host: str, concurrency: int, rate_limit: float, failure_threshold: int,
+                 reset_timeout: float):
+        self.host = host
+        self.concurrency = max(1, concurrency)
+        self.interval = 1.0 / rate_limit if rate_limit > 0 else 0.0
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.in_flight = 0
+        self.counts = {"requests": 0, "successes": 0, "failures": 0, "aborted": 0, "rejected": 0, "throttled": 0}
+        self._trial_running = False
+        self._next_slot = 0.0
+        # Reentrant: slot() waits on the condition while _try_acquire() takes the same lock
+        self._lock = threading.RLock()
+        self._slots = threading.Condition(self._lock)
+        # Coroutines waiting for a slot, first come first served, each woken on its own event loop
+        self._async_waiters = deque()
+
+    def _admit(self):
+        """Breaker check before queueing; raises CircuitOpenError while the breaker is open"""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.counts["rejected"] += 1
+                    raise CircuitOpenError(self.host, remaining)
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._trial_running:
+                    self.counts["rejected"] += 1
+                    raise CircuitOpenError(self.host, self.reset_timeout)
+                self._trial_running = True
+
+    def _try_acquire(self) -> Optional[float]:
+        """Take a concurrency slot and a rate slot; returns the delay before the request may
+        start, or None when the host is at its concurrency limit"""
+        with self._lock:
+            if self.in_flight >= self.concurrency:
+                return None
+            self.in_flight += 1
+            self.counts["requests"] += 1
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            if slot > now:
+                self.counts["throttled"] += 1
+            return slot - now
+
+    def _release_slot(self):
+        """Hand a finished request's slot to the longest-waiting coroutine, or else wake a thread"""
+        with self._lock:
+            self.in_flight -= 1
+            while self._async_waiters:
+                waiter = self._async_waiters.popleft()
+                delay = self._try_acquire()
+                try:
+                    waiter.loop.call_soon_threadsafe(_wake, waiter.future, delay)
+                except RuntimeError:
+                    # Its event loop has closed; nobody is left to take the slot
+                    self.in_flight -= 1
+                    continue
+                waiter.granted = True
+                return
+            self._slots.notify()
+
+    def _release(self, error: Optional[BaseException]):
+        with self._lock:
+            self._release_slot()
+            trial, self._trial_running = self._trial_running and self.state == HALF_OPEN, False
+            if error is not None and _is_host_failure(error):
+                self.counts["failures"] += 1
+                self.consecutive_failures += 1
+                if trial or self.consecutive_failures >= self.failure_threshold:
+                    self.state = OPEN
+                    self.opened_at = time.monotonic()
+            elif _is_response(error):
+                self.counts["successes"] += 1
+                self.consecutive_failures = 0
+                self.state = CLOSED
+            else:
+                # Says nothing about the host; a half-open breaker lets the next request be the trial
+                self.counts["aborted"] += 1
+
+    def _abandon(self):
+        # Admitted but never started (cancelled while queueing): give back a half-open trial
+        with self._lock:
+            self._trial_running = False
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one request slot for the host, blocking the thread while it is at its limits"""
+        self._admit()
+        try:
+            with self._slots:
+                while (delay := self._try_acquire()) is None:
+                    self._slots.wait()
+        except BaseException:
+            self._abandon()
+            raise
+        error = None
+        try:
+            if delay:
+                time.sleep(delay)
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(error)
+
+    @asynccontextmanager
+    async def slot_async(self) -> AsyncIterator[None]:
+        """slot() for coroutines: waits on the event loop instead of blocking a thread.
+
+        Waiting coroutines are queued in arrival order and each is handed its slot directly by
+        the request that frees it, so none is woken only to find the slot taken."""
+        self._admit()
+        waiter = None
+        with self._lock:
+            delay = None if self._async_waiters else self._try_acquire()
+            if delay is None:
+                waiter = _AsyncWaiter(asyncio.get_running_loop())
+                self._async_waiters.append(waiter)
+        if waiter is not None:
+            try:
+                delay = await waiter.future
+            except BaseException:
+                with self._lock:
+                    if waiter.granted:
+                        # Cancelled after a slot was handed over: pass it on
+                        self._release_slot()
+                    else:
+                        self._async_waiters.remove(waiter)
+                self._abandon()
+                raise
+        error = None
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(error)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self.state
+            if state == OPEN and time.monotonic() >= self.opened_at + self.reset_timeout:
+                state = HALF_OPEN
+            return {"state": state, "in_flight": self.in_flight,
+                    "consecutive_failures": self.consecutive_failures, **self.counts}
+
+
+_hosts: Dict[str, HostPolicy] = {}
+_hosts_lock = threading.Lock()
+
+
+def host_policy(url: str) -> HostPolicy:
+    """The shared policy for a URL's host, created with the configured limits on first use"""
+    host = urlparse(url).netloc.lower()
+    with _hosts_lock:
+        policy = _hosts.get(host)
+        if policy is None:
+            policy = _hosts[host] = HostPolicy(
+                host,
+                concurrency=config.HOST_MAX_CONCURRENCY,
+                rate_limit=config.HOST_RATE_LIMIT,
+                failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=config.BREAKER_RESET_TIMEOUT
+            )
+        return policy
+
+
+def reset_host_policies():
+    """Forget all per-host state, e.g. after changing the limits in config"""
+    with _hosts_lock:
+        _hosts.clear()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared pooled HTTP client, creating it for the running event loop if needed"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            timeout=config.SCRAPE_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE
+            )
+        )
+        _client_loop = loop
+    return _client
+
+
+def get_http_session() -> requests.Session:
+    """Return the shared keep-alive session for blocking fetches (CLI and worker threads)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers['User-Agent'] = USER_AGENT
+            adapter = HTTPAdapter(pool_connections=config.HTTP_MAX_KEEPALIVE,
+                                  pool_maxsize=config.HOST_MAX_CONCURRENCY)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+async def close_http_client():
+    """Close the shared HTTP client and session, used at application shutdown"""
+    global _client, _client_loop, _session
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool occupancy of the shared client and session (best effort: pool internals)"""
+    stats: Dict[str, Any] = {"async": None, "sync": None}
+    pool = getattr(getattr(_client, '_transport', None), '_pool', None)
+    if _client is not None and not _client.is_closed and pool is not None:
+        connections = list(getattr(pool, 'connections', []))
+        stats["async"] = {"connections": len(connections),
+                          "idle": sum(1 for c in connections if c.is_idle())}
+    if _session is not None:
+        hosts = {}
+        for adapter in _session.adapters.values():
+            manager = adapter.poolmanager
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                        "connections_opened": pool.num_connections,
+                        "requests": pool.num_requests,
+                        "idle": pool.pool.qsize() if pool.pool is not None else 0
+                    }
+        stats["sync"] = hosts
+    return stats
+
+
+def fetcher_stats() -> Dict[str, Any]:
+    with _hosts_lock:
+        policies = list(_hosts.values())
+    return {"pool": pool_stats(), "hosts": {policy.host: policy.stats() for policy in policies}}
+
+
+def conditional_headers(etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, str]:
+    """Request headers that let the server answer 304 Not Modified for a cached copy"""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+async def fetch_text(url: str, timeout: float = None) -> str:
+    """Fetch a page body as text with the shared client"""
+    async with host_policy(url).slot_async():
+        response = await get_http_client().get(url, timeout=timeout or config.SCRAPE_TIMEOUT)
+        response.raise_for_status()
+        return response.text
+
+
+@asynccontextmanager
+async def stream_conditional(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                             timeout: float = None) -> AsyncIterator[Optional[httpx.Response]]:
+    """Open a streamed GET that revalidates a cached copy; yields None on 304, else the response
+    with its body unread. Leaving the block early closes the connection without reading the rest.
+    The host's slot is held until the block exits."""
+    async with host_policy(url).slot_async():
+        async with get_http_client().stream(
+            'GET',
+            url,
+            headers=conditional_headers(etag, last_modified),
+            timeout=timeout or config.SCRAPE_TIMEOUT
+        ) as response:
+            if response.status_code == 304:
+                yield None
+                return
+            response.raise_for_status()
+            yield response
+
+
+@contextmanager
+def stream_page(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                timeout: float = None) -> Iterator[Optional[requests.Response]]:
+    """Blocking stream_conditional() over the shared keep-alive session"""
+    with host_policy(url).slot():
+        with get_http_session().get(
+            url,
+            headers=conditional_headers(etag, last_modified),
+            timeout=timeout or config.SCRAPE_TIMEOUT,
+            stream=True
+        ) as response:
+            if response.status_code == 304:
+                yield None
+                return
+            response.raise_for_status()
+            yield response
@@ -0,0 +1,277 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Test type codes used in the catalog and the categories they roll up into
+TEST_TYPE_NAMES = {
+    'A': 'Ability & Aptitude',
+    'B': 'Biodata & Situational Judgment',
+    'C': 'Competencies',
+    'D': 'Development and 360',
+    'E': 'Assessment Exercises',
+    'K': 'Knowledge & Skills',
+    'P': 'Personality & Behavior',
+    'S': 'Simulation'
+}
+CATEGORY_TEST_TYPES = {
+    'cognitive': {'A', 'K'},
+    'personality': {'P'},
+    'technical': {'K', 'S'},
+    'soft_skill': {'C', 'B', 'P'},
+}
+# Legacy duration buckets (upper bounds in minutes) used by duration_range filters
+DURATION_RANGES = {
+    'very_short': (None, 15),
+    'short': (15, 30),
+    'medium': (30, 45),
+    'standard': (45, 60),
+    'long': (60, None),
+}
+LIST_SEPARATOR = ','
+
+
+def facet_key(value: str) -> str:
+    """Normalize a facet value the way the metadata flag keys spell it, e.g. 'Entry-Level' -> 'entry_level'"""
+    return (str(value).strip().lower()
+            .replace(' ', '_').replace('-', '_').replace('#', 'sharp').replace('+', 'plus'))
+
+
+def join_list(values: Iterable[str]) -> str:
+    """Pack a list field into one metadata string (Chroma metadata values must be scalars)"""
+    return LIST_SEPARATOR.join(str(v).strip() for v in values if str(v).strip())
+
+
+def split_list(value) -> List[str]:
+    """Unpack a list field written by join_list()"""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return [v.strip() for v in str(value).split(LIST_SEPARATOR) if v.strip()]
+
+
+def assessment_id_from_url(url: str) -> str:
+    """Stable short id for an assessment: the last path segment of its catalog URL"""
+    slug = str(url).rstrip('/').rsplit('/', 1)[-1]
+    return re.sub(r'[^a-z0-9_-]+', '-', slug.lower()).strip('-') or str(url)
+
+
+def facets_from_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Facet values of one document, from compact metadata or the legacy per-value boolean flags"""
+    if 'test_types' in metadata:
+        job_levels = split_list(metadata.get('job_levels'))
+        languages = split_list(metadata.get('languages'))
+        test_types = [t.upper() for t in split_list(metadata.get('test_types'))]
+    else:
+        job_levels = [k[len('job_level_'):] for k, v in metadata.items() if k.startswith('job_level_') and v is True]
+        languages = [k[len('language_'):] for k, v in metadata.items() if k.startswith('language_') and v is True]
+        test_types = [k[len('test_type_'):].upper() for k, v in metadata.items() if k.startswith('test_type_') and v is True]
+    try:
+        duration = float(metadata.get('duration') or 0.0)
+    except (TypeError, ValueError):
+        duration = 0.0
+    return {
+        'job_level': job_levels,
+        'language': languages,
+        'test_type': test_types,
+        'remote_testing': bool(metadata.get('remote_testing')),
+        'adaptive_irt': bool(metadata.get('adaptive_irt')),
+        'duration': duration,
+    }
+
+
+def bit_count(bits: int) -> int:
+    return bin(bits).count('1')
+
+
+class FilterIndex:
+    """Columnar filter index over the catalog: one bitset per facet value plus a sorted duration array.
+
+    Row i of the index is bit i of every bitset, so combining filters is plain integer
+    AND/OR/NOT and the result is the candidate set scored by the vector search. Facets are
+    job_level, language, test_type, category, remote_testing and adaptive_irt; values are
+    stored normalized with facet_key().
+    """
+
+    def __init__(self, ids: List[Optional[str]], facets: List[Dict[str, Any]],
+                 labels: Optional[Dict[str, Dict[str, str]]] = None):
+        self.ids = list(ids)
+        self.size = len(self.ids)
+        self._row_by_id = {id_: row for row, id_ in enumerate(self.ids) if id_}
+        self.all = (1 << self.size) - 1
+        self.bitsets: Dict[str, Dict[str, int]] = {}
+        self.labels: Dict[str, Dict[str, str]] = labels or {}
+        self.durations: List[float] = []
+        for row, doc in enumerate(facets):
+            bit = 1 << row
+            for facet in ('job_level', 'language'):
+                for value in doc[facet]:
+                    self._add(facet, value, bit)
+            for code in doc['test_type']:
+                self._add('test_type', code.upper(), bit, normalize=False)
+            for category, codes in CATEGORY_TEST_TYPES.items():
+                if codes.intersection(doc['test_type']):
+                    self._add('category', category, bit, normalize=False)
+            for flag in ('remote_testing', 'adaptive_irt'):
+                if doc[flag]:
+                    self._add(flag, 'true', bit, normalize=False)
+            self.durations.append(doc['duration'])
+        self._index_durations()
+
+    def _index_durations(self):
+        # Rows sorted by duration, with prefix bitsets so any duration range is two lookups
+        self._duration_order = sorted(range(self.size), key=lambda r: self.durations[r])
+        self._sorted_durations = [self.durations[r] for r in self._duration_order]
+        self._duration_prefix = [0]
+        for row in self._duration_order:
+            self._duration_prefix.append(self._duration_prefix[-1] | (1 << row))
+
+    def _add(self, facet: str, value: str, bit: int, normalize: bool = True):
+        key = facet_key(value) if normalize else value
+        values = self.bitsets.setdefault(facet, {})
+        values[key] = values.get(key, 0) | bit
+        if normalize:
+            self.labels.setdefault(facet, {}).setdefault(key, str(value))
+
+    @classmethod
+    def from_metadatas(cls, metadatas: List[Dict[str, Any]]) -> "FilterIndex":
+        ids = [m.get('assessment_id') for m in metadatas]
+        return cls(ids, [facets_from_metadata(m) for m in metadatas])
+
+    def packed(self) -> Tuple[List[Tuple[str, str]], bytes]:
+        """(facet, value) keys and their bitsets packed back to back, (size + 7) // 8 little-endian
+        bytes each, for the serving artifact"""
+        keys = [(facet, value) for facet, values in sorted(self.bitsets.items()) for value in sorted(values)]
+        width = (self.size + 7) // 8
+        return keys, b''.join(self.bitsets[facet][value].to_bytes(width, 'little') for facet, value in keys)
+
+    @classmethod
+    def from_packed(cls, ids: List[Optional[str]], keys: List[Tuple[str, str]], bitsets,
+                    durations: List[float], labels: Dict[str, Dict[str, str]]) -> "FilterIndex":
+        """Rebuild an index from packed() output without reading any document metadata"""
+        index = cls.__new__(cls)
+        index.ids = list(ids)
+        index.size = len(index.ids)
+        index._row_by_id = {id_: row for row, id_ in enumerate(index.ids) if id_}
+        index.all = (1 << index.size) - 1
+        index.bitsets = {}
+        index.labels = labels
+        width = (index.size + 7) // 8
+        for i, (facet, value) in enumerate(keys):
+            index.bitsets.setdefault(facet, {})[value] = int.from_bytes(bitsets[i * width:(i + 1) * width], 'little')
+        index.durations = list(durations)
+        index._index_durations()
+        return index
+
+    @property
+    def has_ids(self) -> bool:
+        """True when every row carries an assessment_id that a backend can filter on"""
+        return all(self.ids)
+
+    def row(self, assessment_id: Optional[str]) -> Optional[int]:
+        """Row number of the document with this assessment_id, if the index has ids"""
+        return self._row_by_id.get(assessment_id)
+
+    def contains(self, bits: int, assessment_id: Optional[str]) -> bool:
+        """Whether the document with this assessment_id is in a bitset"""
+        row = self._row_by_id.get(assessment_id)
+        return row is not None and bool(bits >> row & 1)
+
+    def values(self, facet: str) -> List[str]:
+        return sorted(self.bitsets.get(facet, {}))
+
+    def facet(self, facet: str, value: str) -> int:
+        """Rows having one facet value"""
+        key = str(value).upper() if facet == 'test_type' else facet_key(value)
+        return self.bitsets.get(facet, {}).get(key, 0)
+
+    def any_of(self, facet: str, values: Iterable[str]) -> int:
+        """Rows having at least one of the facet values"""
+        bits = 0
+        for value in values:
+            bits |= self.facet(facet, value)
+        return bits
+
+    def duration_between(self, low: Optional[float] = None, high: Optional[float] = None,
+                         include_low: bool = True) -> int:
+        """Rows whose duration lies in [low, high] (or (low, high] when include_low is False)"""
+        if low is None:
+            start = 0
+        elif include_low:
+            start = bisect_left(self._sorted_durations, low)
+        else:
+            start = bisect_right(self._sorted_durations, low)
+        end = self.size if high is None else bisect_right(self._sorted_durations, high)
+        if end <= start:
+            return 0
+        return self._duration_prefix[end] & ~self._duration_prefix[start]
+
+    def _flag(self, key: str) -> int:
+        """Rows where a legacy boolean metadata flag is True"""
+        for prefix, facet in (('job_level_', 'job_level'), ('language_', 'language'), ('test_type_', 'test_type')):
+            if key.startswith(prefix):
+                return self.facet(facet, key[len(prefix):])
+        if key.startswith('contains_'):
+            return self.facet('category', key[len('contains_'):])
+        if key in ('remote_testing', 'adaptive_irt'):
+            return self.bitsets.get(key, {}).get('true', 0)
+        match = re.fullmatch(r'duration_under_(\d+)', key)
+        if match:
+            return self.duration_between(high=float(match.group(1)))
+        return 0
+
+    def _condition(self, key: str, condition) -> int:
+        if key == 'duration_range':
+            low, high = DURATION_RANGES.get(condition, (0, -1))
+            return self.duration_between(low, high, include_low=False)
+        if key == 'duration' and isinstance(condition, dict):
+            bits = self.all
+            for op, value in condition.items():
+                value = float(value)
+                if op == '$lte':
+                    bits &= self.duration_between(high=value)
+                elif op == '$lt':
+                    bits &= self.duration_between(high=value) & ~self.duration_between(value, value)
+                elif op == '$gte':
+                    bits &= self.duration_between(low=value)
+                elif op == '$gt':
+                    bits &= self.duration_between(low=value, include_low=False)
+                else:
+                    raise ValueError(f"Unsupported duration operator: {op}")
+            return bits
+        if isinstance(condition, dict) and set(condition) == {'$eq'}:
+            condition = condition['$eq']
+        if isinstance(condition, bool):
+            bits = self._flag(key)
+            return bits if condition else self.all & ~bits
+        raise ValueError(f"Unsupported filter condition for {key}: {condition!r}")
+
+    def evaluate(self, where: Optional[Dict[str, Any]]) -> int:
+        """Evaluate a Chroma-style `where` filter over the flag keys to a candidate bitset"""
+        if not where:
+            return self.all
+        bits = self.all
+        for key, condition in where.items():
+            if key == '$or':
+                any_bits = 0
+                for clause in condition:
+                    any_bits |= self.evaluate(clause)
+                bits &= any_bits
+            elif key == '$and':
+                for clause in condition:
+                    bits &= self.evaluate(clause)
+            else:
+                bits &= self._condition(key, condition)
+        return bits
+
+    def rows(self, bits: int) -> List[int]:
+        """Row numbers set in a bitset, ascending"""
+        rows = []
+        while bits:
+            lowest = bits & -bits
+            rows.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        return rows
+
+    def count(self, bits: int) -> int:
+        return bit_count(bits)
@@ -0,0 +1,97 @@
+"""Search results serialized once per catalog document.
+
+A result depends only on its document, never on the query, so each document's API result
+and its JSON encoding are built the first time the document is returned and reused until
+the index changes. Responses are then assembled by concatenating the encoded results inside
+the per-request envelope, and carry an ETag so a repeated request can be answered with 304
+Not Modified.
+"""
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder writes the same compact JSON, slower
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+def etag(data: bytes) -> str:
+    """Strong entity tag from bytes that change whenever the response body does"""
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """If-None-Match check: * or any listed tag, compared weakly as RFC 9110 requires"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+class ResultFragments:
+    """Each returned catalog document's API result model, its encoded JSON and that JSON's digest,
+    keyed by URL and built on first use, so loading an index decodes no document.
+
+    `build(page_content, metadata)` makes the result model. A document is served from the
+    table only while it is the one the table was filled from for its URL; documents sharing
+    a URL with it, and results not built here (another index version, or decoded from the
+    shared cache with different content), are built and encoded per hit.
+    """
+
+    def __init__(self, build: Callable[[str, Dict[str, Any]], Any], version: str = ""):
+        self.version = version
+        self._build = build
+        # url -> (page_content, metadata, result); encoded fragments are added on first encode
+        self._results: Dict[str, Tuple[str, Dict[str, Any], Any]] = {}
+        self._fragments: Dict[str, Tuple[bytes, bytes]] = {}
+
+    def result(self, page_content: str, metadata: Dict[str, Any]):
+        """The result built earlier for this document, or one built (and kept) now"""
+        url = metadata.get("url")
+        entry = self._results.get(url)
+        if entry is not None:
+            source_content, source_metadata, result = entry
+            # The index hands out the same decoded row objects, so identity is the usual match
+            if ((source_content is page_content or source_content == page_content)
+                    and (source_metadata is metadata or source_metadata == metadata)):
+                return result
+            return self._build(page_content, metadata)
+        result = self._build(page_content, metadata)
+        if url is not None:
+            self._results.setdefault(url, (page_content, metadata, result))
+        return result
+
+    def encode(self, result) -> Tuple[bytes, bytes]:
+        """A result's JSON and its digest"""
+        entry = self._results.get(result.url)
+        if entry is not None and (entry[2] is result or entry[2] == result):
+            encoded = self._fragments.get(result.url)
+            if encoded is None:
+                fragment = dumps(entry[2].model_dump())
+                encoded = self._fragments.setdefault(result.url, (fragment, digest(fragment)))
+            return encoded
+        fragment = dumps(result.model_dump())
+        return fragment, digest(fragment)
+
+    def encode_list(self, results: List[Any]) -> Tuple[bytes, bytes]:
+        """A JSON array of results joined from their fragments, and the fragments' digests, which
+        stand in for the array when hashing a response for its ETag"""
+        encoded = [self.encode(result) for result in results]
+        return (b"[" + b",".join([fragment for fragment, _ in encoded]) + b"]",
+                b"".join([fragment_digest for _, fragment_digest in encoded]))
+
+    def __len__(self):
+        return len(self._fragments)
@@ -0,0 +1,311 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+try:
+    from lxml import etree
+except ImportError:  # optional: the stdlib parser is the fallback
+    etree = None
+
+# Elements that usually hold the job description, most specific first
+JOB_DESCRIPTION_SELECTORS = (
+    'div.description', 'div.job-description', '#job-description',
+    '.job-details', '.description', '[data-test="job-description"]',
+    'section.description', 'div.details', '.details-pane',
+    '.job-desc', '.show-more-less-html'
+)
+JOB_KEYWORDS = ('responsibilities', 'requirements', 'qualifications', 'about the job', 'job summary',
+                'what you&nbspll do', 'what we&nbspre looking for')
+# Their text is not page content (BeautifulSoup's get_text leaves it out too)
+NON_TEXT_TAGS = frozenset(('script', 'style'))
+
+SELECTOR_PATTERN = re.compile(
+    r'^(?P<tag>[a-z][a-z0-9]*)?(?:#(?P<id>[\w-]+))?(?:\.(?P<cls>[\w-]+))?'
+    r'(?:\[(?P<attr>[\w-]+)="(?P<value>[^"]*)"\])?$'
+)
+
+
+class Selector:
+    """A simple CSS selector (tag, #id, .class and [attr="value"] parts) matched against one start tag"""
+
+    def __init__(self, selector: str):
+        match = SELECTOR_PATTERN.match(selector)
+        if not match or not any(match.groups()):
+            raise ValueError(f"Unsupported selector: {selector}")
+        self.selector = selector
+        self.tag = match.group('tag')
+        self.id = match.group('id')
+        self.cls = match.group('cls')
+        self.attr = match.group('attr')
+        self.value = match.group('value')
+
+    def matches(self, tag: str, attrs: Dict[str, str]) -> bool:
+        if self.tag and tag != self.tag:
+            return False
+        if self.id and attrs.get('id') != self.id:
+            return False
+        if self.cls and self.cls not in (attrs.get('class') or '').split():
+            return False
+        if self.attr and attrs.get(self.attr) != self.value:
+            return False
+        return True
+
+    def __repr__(self):
+        return f"Selector({self.selector!r})"
+
+
+def compile_selectors(selectors: Iterable[str]) -> List[Selector]:
+    return [Selector(selector) for selector in selectors]
+
+
+DEFAULT_SELECTORS = compile_selectors(JOB_DESCRIPTION_SELECTORS)
+
+
+class _Capture:
+    __slots__ = ('tag', 'depth', 'priority', 'strings')
+
+    def __init__(self, tag: str, priority: int):
+        self.tag = tag
+        self.depth = 1
+        self.priority = priority
+        self.strings: List[str] = []
+
+
+class ContainerTarget:
+    """Parser target (lxml's start/end/data/close interface) that keeps the text of the
+    best job-description container.
+
+    Selectors are tried in priority order like select_one() over a full tree: a match for an
+    earlier selector beats any match for a later one, and among matches for the same selector
+    the first in the document wins. `finished` turns True once a container for the first
+    selector has closed, since nothing later in the page can beat it; otherwise the whole page
+    (up to the caller's byte cap) has to be read before the best match is known. Only the open
+    containers' text and the best match so far are held, so memory does not grow with the page.
+    """
+
+    def __init__(self, selectors: Sequence[Selector]):
+        self.selectors = selectors
+        self.captures: List[_Capture] = []
+        self.result: Optional[str] = None
+        self.priority: Optional[int] = None
+        self._skip = 0
+        self._pending: List[str] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.priority == 0
+
+    def _flush(self):
+        if self._pending:
+            text = ''.join(self._pending).strip()
+            self._pending = []
+            if text and not self._skip:
+                for capture in self.captures:
+                    capture.strings.append(text)
+
+    def _match(self, tag, attrib) -> Optional[int]:
+        for priority, selector in enumerate(self.selectors):
+            if selector.matches(tag, attrib):
+                return priority
+        return None
+
+    def start(self, tag, attrib):
+        self._flush()
+        tag = tag.lower()
+        if tag in NON_TEXT_TAGS:
+            self._skip += 1
+        for capture in self.captures:
+            if capture.tag == tag:
+                capture.depth += 1
+        if self.finished:
+            return
+        priority = self._match(tag, attrib)
+        # A later match for the same selector loses to the one already found
+        if priority is not None and (self.priority is None or priority < self.priority):
+            self.captures.append(_Capture(tag, priority))
+
+    def end(self, tag):
+        self._flush()
+        tag = tag.lower()
+        if tag in NON_TEXT_TAGS and self._skip:
+            self._skip -= 1
+        for capture in list(self.captures):
+            if capture.tag != tag:
+                continue
+            capture.depth -= 1
+            if capture.depth == 0:
+                self.captures.remove(capture)
+                self._close_capture(capture)
+
+    def _close_capture(self, capture: _Capture):
+        if not capture.strings or (self.priority is not None and capture.priority >= self.priority):
+            return
+        if any(open_capture.priority <= capture.priority for open_capture in self.captures):
+            # An enclosing match starts earlier in the document and is at least as preferred
+            return
+        self.result = '\n'.join(capture.strings)
+        self.priority = capture.priority
+        # Enclosing matches for less preferred selectors can no longer win
+        self.captures = [open_capture for open_capture in self.captures if open_capture.priority < self.priority]
+
+    def data(self, data):
+        if self.captures:
+            self._pending.append(data)
+
+    def close(self):
+        self._flush()
+        return self.result
+
+
+class _StdlibParser(HTMLParser):
+    """html.parser driving a ContainerTarget, for installs without lxml"""
+
+    def __init__(self, target: ContainerTarget):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {name: value or '' for name, value in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+class StreamingExtractor:
+    """Incremental job-description extraction over a page that arrives in chunks.
+
+    feed() returns True once a container for the most preferred selector has been parsed, so
+    the caller can stop reading; other matches only win once the page (at most max_bytes of it)
+    has been read without finding a better one. Until some container is found the part read is
+    kept so text() can fall back to the full-tree heuristics.
+    """
+
+    def __init__(self, encoding: Optional[str] = None, max_bytes: Optional[int] = None,
+                 selectors: Optional[Sequence[Selector]] = None, use_lxml: Optional[bool] = None):
+        self.target = ContainerTarget(selectors or DEFAULT_SELECTORS)
+        self.backend = 'lxml' if (etree is not None if use_lxml is None else use_lxml) else 'html.parser'
+        if self.backend == 'lxml':
+            self.parser = etree.HTMLParser(target=self.target, recover=True, no_network=True)
+        else:
+            self.parser = _StdlibParser(self.target)
+        try:
+            self.decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+        self._chunks: List[str] = []
+        self._closed = False
+
+    @property
+    def done(self) -> bool:
+        return self.target.finished
+
+    def feed(self, chunk: Union[bytes, str]) -> bool:
+        """Parse the next chunk; True when extraction is finished (found, or the size cap was hit)"""
+        if self.done or self.truncated:
+            return True
+        if self.max_bytes is not None and self.bytes_read + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.bytes_read]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+        text = chunk if isinstance(chunk, str) else self.decoder.decode(chunk)
+        if text:
+            self.parser.feed(text)
+            if self.target.result is None:
+                self._chunks.append(text)
+            else:
+                # A container was found, so the heuristics fallback is no longer needed
+                self._chunks = []
+        return self.done or self.truncated
+
+    def _close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.parser.close()
+        except Exception:
+            # lxml raises on an empty or hopelessly broken document; the fallback handles it
+            pass
+
+    def text(self) -> str:
+        """The best container's text, or the full-tree heuristics over the part of the page read"""
+        if not self.done:
+            # Closing ends any still-open elements, which can complete a container at the very end
+            self._close()
+        if self.target.result is not None:
+            return self.target.result
+        return parse_job_description_tree(''.join(self._chunks), selectors=False)
+
+
+def extract_streaming(chunks: Iterable[Union[bytes, str]], encoding: Optional[str] = None,
+                      max_bytes: Optional[int] = None) -> str:
+    """Job description text from a page read chunk by chunk, stopping as early as possible"""
+    extractor = StreamingExtractor(encoding, max_bytes)
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            break
+    return extractor.text()
+
+
+def iter_chunks(text: str, size: int = 64 * 1024) -> Iterable[str]:
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def parse_job_description(html: str, max_bytes: Optional[int] = None) -> str:
+    """Extract job description text from a job listing page's HTML."""
+    return extract_streaming(iter_chunks(html), max_bytes=max_bytes)
+
+
+def parse_job_description_tree(html: str, features: Optional[str] = None, selectors: bool = True) -> str:
+    """Job description text from a full parse tree: container selectors, then section headings,
+    then the main content area. The fallback when streaming finds no container, which passes
+    selectors=False since it has already ruled them out."""
+    # Only pages without a recognizable container get here, so bs4 is not imported until then
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, features or ('lxml' if etree is not None else 'html.parser'))
+
+    # First try to find job description by common class names or IDs
+    for selector in JOB_DESCRIPTION_SELECTORS if selectors else ():
+        job_desc = soup.select_one(selector)
+        if job_desc:
+            return job_desc.get_text(separator='\n', strip=True)
+
+    # If specific selectors fail, use a more generic approach
+    # Find sections with job-related terms in them
+    for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'strong']):
+        heading_text = heading.get_text().lower()
+        if any(keyword in heading_text for keyword in JOB_KEYWORDS):
+            # Get the next sibling elements which likely contain the job description
+            description = []
+            current = heading.find_next_sibling()
+            while current and current.name not in ['h1', 'h2', 'h3', 'h4']:
+                if current.get_text(strip=True):
+                    description.append(current.get_text(strip=True))
+                current = current.find_next_sibling()
+            if description:
+                return '\n'.join(description)
+
+    # If all else fails, get the main content area and try to extract job details
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
+    if main_content:
+        text = main_content.get_text(separator='\n', strip=True)
+        # Clean up the text
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        return '\n'.join(chunk for chunk in chunks if chunk)
+
+    # Last resort: just get the page title and any text
+    title = soup.title.string if soup.title else "Job Listing"
+    return f"{title}{soup.get_text(strip=True)[:2000]}"
@@ -0,0 +1,266 @@
+import ast
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+from langchain_core.documents import Document
+
+import config
+from filter_index import TEST_TYPE_NAMES, assessment_id_from_url, join_list
+
+logger = logging.getLogger(__name__)
+
+LIST_COLUMNS = ('job_levels', 'languages', 'test_type')
+
+
+def checkpoint_path(persist_directory: str) -> str:
+    """Directory of the embedding checkpoint kept next to a Chroma persist directory"""
+    return config.INGEST_CHECKPOINT_DIR or os.path.normpath(persist_directory) + "_embeddings"
+
+
+def clean_list_field(field):
+    """Parse a list cell: a real list, a stringified list ("['a', 'b']") or a comma-separated string"""
+    if isinstance(field, list):
+        return field
+    if field is None or (isinstance(field, float) and pd.isna(field)) or field == '':
+        return []
+    if isinstance(field, str):
+        text = field.strip()
+        if text.startswith('[') and text.endswith(']'):
+            try:
+                result = ast.literal_eval(text)
+                if isinstance(result, (list, tuple)):
+                    return [str(item).strip() for item in result if str(item).strip()]
+            except (ValueError, SyntaxError):
+                pass
+        return [item.strip() for item in text.split(',') if item.strip()]
+    return []
+
+
+def parse_list_column(series: pd.Series) -> pd.Series:
+    """Parse a whole list column, running clean_list_field once per distinct cell value.
+
+    Catalog list columns repeat a small set of values ("English (USA)", "K,P"), so
+    parsing the distinct strings and mapping them back is far cheaper than a per-row call.
+    """
+    if series.map(lambda value: isinstance(value, list)).any():
+        return series.map(clean_list_field)
+    text = series.fillna('').astype(str)
+    parsed = {value: clean_list_field(value) for value in text.unique()}
+    # Copy per row so no two documents share one mutable list
+    return text.map(lambda value: list(parsed[value]))
+
+
+def parse_list_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for col in LIST_COLUMNS:
+        if col in df.columns:
+            df[col] = parse_list_column(df[col])
+        else:
+            df[col] = [[] for _ in range(len(df))]
+    return df
+
+
+def _duration(value) -> float:
+    try:
+        duration = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if pd.isna(duration) else duration
+
+
+def _flag(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    return bool(value) and not (isinstance(value, float) and pd.isna(value))
+
+
+def _test_types_detailed(codes: List[str]) -> str:
+    if not codes:
+        return "No test types specified"
+    return ", ".join(f"{code}: {TEST_TYPE_NAMES.get(code, f'Unknown ({code})')}" for code in codes)
+
+
+def prepare_documents(df: pd.DataFrame) -> List[Document]:
+    """Convert catalog rows (list columns already parsed) to Documents, building each field column-wise"""
+    n = len(df)
+    names = df['name'].astype(str).tolist()
+    urls = df['url'].astype(str).tolist()
+    descriptions = df['description'].astype(str).tolist()
+    raw_durations = df['duration'].tolist()
+    durations = [_duration(d) for d in raw_durations]
+    remote = [_flag(v) for v in df['remote_testing'].tolist()]
+    adaptive = [_flag(v) for v in df['adaptive_irt'].tolist()]
+    job_levels = [l if isinstance(l, list) else [] for l in df['job_levels'].tolist()]
+    languages = [l if isinstance(l, list) else [] for l in df['languages'].tolist()]
+    test_types = [[str(t).upper() for t in l] if isinstance(l, list) else [] for l in df['test_type'].tolist()]
+
+    documents = []
+    for i in range(n):
+        job_levels_str = ' and '.join(job_levels[i]) if job_levels[i] else 'various job levels'
+        languages_str = ' and '.join(languages[i]) if languages[i] else 'multiple languages'
+        test_types_str = ', '.join(test_types[i]) if test_types[i] else 'various assessments'
+        page_content = (
+            f"{names[i]}: A {job_levels_str} position in {languages_str}. "
+            f"Job Description: {descriptions[i]} "
+            f"Test Types: {test_types_str} "
+            f"Detailed Test Types: {_test_types_detailed(test_types[i])} "
+            f"Duration: {raw_durations[i]} minutes "
+            f"Remote Testing: {'Available' if remote[i] else 'Not available'} "
+            f"Adaptive Testing: {'Yes' if adaptive[i] else 'No'}"
+        )
+        # Only the essential fields are stored; job level, language, test type, category and
+        # duration filters are answered by the bitset FilterIndex built from these at load time
+        metadata = {
+            "assessment_id": assessment_id_from_url(urls[i]),
+            "name": names[i],
+            "url": urls[i],
+            "description": descriptions[i],
+            "duration": durations[i],
+            "remote_testing": remote[i],
+            "adaptive_irt": adaptive[i],
+            "job_levels": join_list(job_levels[i]),
+            "languages": join_list(languages[i]),
+            "test_types": join_list(test_types[i]),
+            "search_keywords": " ".join([names[i], descriptions[i], *job_levels[i], *languages[i],
+                                         *test_types[i]]).lower(),
+        }
+        documents.append(Document(page_content=page_content, metadata=metadata))
+    return documents
+
+
+def content_hash(document: Document, model: str) -> str:
+    """Fingerprint of everything that goes into a stored document, including the embedding model"""
+    metadata = {key: value for key, value in document.metadata.items() if key != "content_hash"}
+    payload = json.dumps([model, document.page_content, metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def with_retries(func: Callable[[], Any], retries: int, backoff: float, what: str = "call"):
+    """Call func, retrying failures with exponential backoff and jitter"""
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt) * (0.5 + random.random())
+            logger.warning("%s failed (%s); retry %d/%d in %.1fs", what, e, attempt + 1, retries, delay)
+            time.sleep(delay)
+
+
+def embed_in_batches(embeddings, texts: Sequence[str], batch_size: Optional[int] = None,
+                     retries: Optional[int] = None, backoff: Optional[float] = None) -> List[List[float]]:
+    """Embed documents in fixed-size batches, retrying each batch on transient failures"""
+    batch_size = batch_size or config.INGEST_BATCH_SIZE
+    retries = config.INGEST_MAX_RETRIES if retries is None else retries
+    backoff = config.INGEST_RETRY_BACKOFF if backoff is None else backoff
+    vectors: List[List[float]] = []
+    for start in range(0, len(texts), batch_size):
+        batch = list(texts[start:start + batch_size])
+        vectors.extend(with_retries(lambda: embeddings.embed_documents(batch), retries, backoff,
+                                    f"embedding batch {start // batch_size + 1}"))
+    return vectors
+
+
+@dataclass
+class IngestReport:
+    """What one ingestion run changed and how long each stage took"""
+    added: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.deleted)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def summary(self) -> str:
+        stages = "  ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items())
+        return (f"{self.added} added, {self.updated} updated, {self.deleted} deleted, "
+                f"{self.unchanged} unchanged\nStage timings: {stages}")
+
+
+def document_ids(documents: List[Document]) -> List[str]:
+    """Stable store ids: the assessment id, with a numeric suffix for any repeated slug"""
+    ids, seen = [], {}
+    for document in documents:
+        base = document.metadata["assessment_id"]
+        seen[base] = seen.get(base, 0) + 1
+        ids.append(base if seen[base] == 1 else f"{base}-{seen[base]}")
+    return ids
+
+
+def sync_vector_store(vector_store, documents: List[Document], embeddings, model: str,
+                      report: Optional[IngestReport] = None, checkpoint_dir: Optional[str] = None) -> IngestReport:
+    """Bring a Chroma collection in line with documents, embedding only new or changed rows.
+
+    Each document is stored under its assessment id with a content hash in its metadata.
+    Rows whose hash matches the stored one are skipped, changed and new rows are embedded
+    in batches and upserted, and ids no longer in the catalog are deleted. A store written
+    before content hashes existed is replaced wholesale on its first incremental run.
+
+    With a checkpoint_dir, embedding runs as a resumable EmbeddingJob: chunks are embedded
+    in parallel and checkpointed, so a failed run picks up where it stopped. After a
+    successful upsert the checkpoint is pruned to the current catalog's texts.
+    """
+    report = report or IngestReport()
+    with report.stage("diff"):
+        ids = document_ids(documents)
+        for doc_id, document in zip(ids, documents):
+            document.metadata["content_hash"] = content_hash(document, model)
+        existing = vector_store.get(include=["metadatas"])
+        stored = {doc_id: (metadata or {}).get("content_hash")
+                  for doc_id, metadata in zip(existing["ids"], existing["metadatas"])}
+        wanted = set(ids)
+        removed = [doc_id for doc_id in stored if doc_id not in wanted]
+        todo = [(doc_id, document) for doc_id, document in zip(ids, documents)
+                if stored.get(doc_id) != document.metadata["content_hash"]]
+        report.added = sum(1 for doc_id, _ in todo if doc_id not in stored)
+        report.updated = len(todo) - report.added
+        report.unchanged = len(documents) - len(todo)
+        report.deleted = len(removed)
+
+    if removed:
+        with report.stage("delete"):
+            vector_store.delete(ids=removed)
+    if todo:
+        with report.stage("embed"):
+            texts = [document.page_content for _, document in todo]
+            if checkpoint_dir:
+                from embedding_job import EmbeddingJob
+                vectors = EmbeddingJob(checkpoint_dir, embeddings, model).run(texts).tolist()
+            else:
+                vectors = embed_in_batches(embeddings, texts)
+        with report.stage("upsert"):
+            batch_size = config.INGEST_BATCH_SIZE
+            for start in range(0, len(todo), batch_size):
+                batch = todo[start:start + batch_size]
+                vector_store._collection.upsert(
+                    ids=[doc_id for doc_id, _ in batch],
+                    embeddings=vectors[start:start + batch_size],
+                    documents=[document.page_content for _, document in batch],
+                    metadatas=[document.metadata for _, document in batch],
+                )
+    if checkpoint_dir:
+        # Everything is stored now; keep only the current catalog's vectors so the checkpoint
+        # does not grow with every model or catalog change
+        from embedding_job import EmbeddingJob
+        EmbeddingJob(checkpoint_dir, embeddings, model).prune([document.page_content for document in documents])
+    return report
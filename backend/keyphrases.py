@@ -0,0 +1,96 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from lexical import LexicalIndex, tokenize
+
+# Words in assessment names that say what kind of product it is rather than what it measures
+GENERIC_NAME_TERMS = frozenset(
+    "new test tests assessment assessments solution solutions report reports form short long level levels "
+    "version edition universal professional individual contributor focus plus interview simulation hiring "
+    "next screen split multi job".split()
+)
+# Job-advert filler that is rare in the catalog (so scores a high IDF) but says nothing about the role
+COMMON_WORDS = frozenset(
+    "we our us you your they their i me my he she his her them its about above after again against all "
+    "also am any because been before being below between both but can could did do does doing down during "
+    "each etc few further had has have having here how if into just like looking more most must need needs "
+    "no nor not now off once only other own per plus same should so some such than then there these those "
+    "through too under until up very was were what when where which while whom why would join team role "
+    "position candidate candidates ideal company opportunity apply work working years year strong "
+    "including include includes within across ability able responsibilities requirements qualifications "
+    "hiring jobs job provided full non".split()
+)
+# A name term found in more than this share of the catalog is too common to count as a skill
+MAX_SKILL_DOCUMENT_SHARE = 0.2
+
+
+def _has_letter(word: str) -> bool:
+    return any(c.isalpha() for c in word)
+
+
+@dataclass
+class KeyphraseQuery:
+    """A search query built locally from a job description, and how much to trust it"""
+    query: str
+    skills: List[str] = field(default_factory=list)
+    terms: List[str] = field(default_factory=list)
+    confidence: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"query": self.query, "skills": self.skills, "terms": self.terms,
+                "confidence": round(self.confidence, 3)}
+
+
+class KeyphraseExtractor:
+    """Builds a search query from job description text without calling an LLM.
+
+    Skills are the distinctive terms of catalog assessment names ("java", "sql_server",
+    "excel") found in the text. Other terms are ranked by TF-IDF salience, with term
+    frequency from the job description and IDF from the catalog's BM25 index, so only words
+    the catalog can actually match are kept. Confidence grows with the number of skills and
+    salient terms found; a description that names no catalog skill gets a low score.
+    """
+
+    def __init__(self, lexical_index: LexicalIndex, skill_terms: List[str],
+                 max_skills: int = 8, max_terms: int = 8, target_skills: int = 3, target_terms: int = 6):
+        self.lexical_index = lexical_index
+        self.skill_terms = frozenset(skill_terms)
+        self.max_skills = max_skills
+        self.max_terms = max_terms
+        self.target_skills = target_skills
+        self.target_terms = target_terms
+
+    @classmethod
+    def from_catalog(cls, lexical_index: LexicalIndex, metadatas: List[Dict[str, Any]], **kwargs) -> "KeyphraseExtractor":
+        limit = max(1, int(len(lexical_index) * MAX_SKILL_DOCUMENT_SHARE))
+        skills = set()
+        for metadata in metadatas:
+            for term in tokenize((metadata or {}).get('name', '')):
+                words = term.split('_')
+                if any(w in GENERIC_NAME_TERMS or w in COMMON_WORDS or not _has_letter(w) for w in words):
+                    continue
+                if len(lexical_index.term_frequencies.get(term, ())) <= limit:
+                    skills.add(term)
+        return cls(lexical_index, sorted(skills), **kwargs)
+
+    def extract(self, text: str) -> KeyphraseQuery:
+        counts = Counter(t for t in tokenize(text) if t in self.lexical_index.idf
+                         and not any(w in COMMON_WORDS or not _has_letter(w) for w in t.split('_')))
+        salience = {term: tf * self.lexical_index.idf[term] for term, tf in counts.items()}
+        ranked = sorted(salience, key=lambda term: (-salience[term], term))
+
+        skills: List[str] = []
+        for term in ranked:
+            if term in self.skill_terms and not any(term in other.split('_') for other in skills):
+                skills.append(term)
+            if len(skills) == self.max_skills:
+                break
+        covered = {w for skill in skills for w in skill.split('_')}
+        terms = [term for term in ranked
+                 if term not in self.skill_terms and '_' not in term and term not in covered][:self.max_terms]
+
+        confidence = (0.7 * min(1.0, len(skills) / self.target_skills)
+                      + 0.3 * min(1.0, len(terms) / self.target_terms))
+        phrases = [skill.replace('_', ' ') for skill in skills] + terms
+        return KeyphraseQuery(query=' '.join(phrases), skills=skills, terms=terms, confidence=confidence)
@@ -0,0 +1,228 @@
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, List, Optional, Tuple
+
+# Keeps skill names whole: ".net", "asp.net", "c++", "c#", "node.js"
+TOKEN_PATTERN = re.compile(r'\.?[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*')
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the this to with who will your you".split()
+)
+INDEX_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens plus adjacent-word bigrams ("java 8" -> "java", "8", "java_8")"""
+    words = [w for w in TOKEN_PATTERN.findall((text or '').lower()) if w not in STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def document_key(metadata: Dict[str, Any]) -> Optional[str]:
+    """Identity of a stored document: its assessment id, or its URL in stores without ids"""
+    return metadata.get('assessment_id') or metadata.get('url')
+
+
+def keyword_text(metadata: Dict[str, Any]) -> str:
+    return metadata.get('search_keywords') or f"{metadata.get('name', '')} {metadata.get('description', '')}"
+
+
+class PackedPostings(Mapping):
+    """Read-only term -> [(row, value), ...] view over postings stored in CSR form (the serving
+    artifact's memory-mapped arrays); a term's list is decoded on first access"""
+
+    def __init__(self, vocabulary: Dict[str, int], offsets, rows, values):
+        self._vocabulary = vocabulary
+        self._offsets = offsets
+        self._rows = rows
+        self._values = values
+        self._decoded: Dict[str, List[Tuple[int, Any]]] = {}
+
+    def __getitem__(self, term: str) -> List[Tuple[int, Any]]:
+        postings = self._decoded.get(term)
+        if postings is None:
+            i = self._vocabulary[term]
+            start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+            postings = list(zip(self._rows[start:end].tolist(), self._values[start:end].tolist()))
+            self._decoded[term] = postings
+        return postings
+
+    def __contains__(self, term) -> bool:
+        return term in self._vocabulary
+
+    def __iter__(self):
+        return iter(self._vocabulary)
+
+    def __len__(self):
+        return len(self._vocabulary)
+
+
+class PackedTermSets(Sequence):
+    """Per-row term sets stored in CSR form, decoded row by row on first access"""
+
+    def __init__(self, terms: List[str], offsets, term_ids):
+        self._terms = terms
+        self._offsets = offsets
+        self._term_ids = term_ids
+        self._decoded: List[Optional[frozenset]] = [None] * (len(offsets) - 1)
+
+    def __getitem__(self, row: int) -> frozenset:
+        terms = self._decoded[row]
+        if terms is None:
+            ids = self._term_ids[int(self._offsets[row]):int(self._offsets[row + 1])].tolist()
+            terms = self._decoded[row] = frozenset(self._terms[i] for i in ids)
+        return terms
+
+    def __len__(self):
+        return len(self._decoded)
+
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over the documents' search_keywords.
+
+    Postings hold precomputed BM25 term weights per row, so scoring a query is a sum over
+    the postings of its terms. Rows follow the order of the metadatas the index was built
+    from, which is the row order of the retrieval backend.
+    """
+
+    def __init__(self, ids: List[Optional[str]], term_frequencies: Dict[str, List[Tuple[int, int]]],
+                 doc_lengths: List[int], k1: float = 1.2, b: float = 0.75):
+        self.ids = list(ids)
+        self.term_frequencies = term_frequencies
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self._doc_terms: Optional[List[frozenset]] = None
+        size = max(len(doc_lengths), 1)
+        average = (sum(doc_lengths) / size) or 1.0
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        self.idf: Dict[str, float] = {}
+        for term, rows in term_frequencies.items():
+            idf = math.log(1 + (len(doc_lengths) - len(rows) + 0.5) / (len(rows) + 0.5))
+            self.idf[term] = idf
+            self.postings[term] = [
+                (row, idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_lengths[row] / average)))
+                for row, tf in rows
+            ]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def terms(self, row: int) -> frozenset:
+        """Distinct single-word terms of one document"""
+        if self._doc_terms is None:
+            doc_terms = [set() for _ in self.ids]
+            for term, rows in self.term_frequencies.items():
+                if '_' not in term:
+                    for r, _ in rows:
+                        doc_terms[r].add(term)
+            self._doc_terms = [frozenset(terms) for terms in doc_terms]
+        return self._doc_terms[row]
+
+    def packed(self) -> Tuple[Dict[str, Any], Dict[str, List]]:
+        """The index in CSR form for the serving artifact: a header (ids, vocabulary, BM25
+        parameters) and flat arrays (per-term offsets, rows, term frequencies, weights and IDF,
+        and each row's single-word term ids), so loading it recomputes nothing"""
+        terms = sorted(self.term_frequencies)
+        arrays: Dict[str, List] = {"offsets": [0], "rows": [], "frequencies": [], "weights": [], "idf": [],
+                                   "row_offsets": [0], "row_terms": []}
+        for term in terms:
+            arrays["rows"].extend(row for row, _ in self.term_frequencies[term])
+            arrays["frequencies"].extend(tf for _, tf in self.term_frequencies[term])
+            arrays["weights"].extend(weight for _, weight in self.postings[term])
+            arrays["idf"].append(self.idf[term])
+            arrays["offsets"].append(len(arrays["rows"]))
+        term_ids = {term: i for i, term in enumerate(terms)}
+        for row in range(len(self.ids)):
+            arrays["row_terms"].extend(sorted(term_ids[term] for term in self.terms(row)))
+            arrays["row_offsets"].append(len(arrays["row_terms"]))
+        header = {"version": INDEX_VERSION, "ids": self.ids, "terms": terms, "doc_lengths": self.doc_lengths,
+                  "k1": self.k1, "b": self.b}
+        return header, arrays
+
+    @classmethod
+    def from_packed(cls, header: Dict[str, Any], arrays: Dict[str, Any]) -> "LexicalIndex":
+        """Index over packed() output; postings and row terms are decoded lazily from the arrays"""
+        if header.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported lexical index version: {header.get('version')}")
+        index = cls.__new__(cls)
+        index.ids = list(header["ids"])
+        index.doc_lengths = header["doc_lengths"]
+        index.k1 = header["k1"]
+        index.b = header["b"]
+        terms = header["terms"]
+        vocabulary = {term: i for i, term in enumerate(terms)}
+        index.term_frequencies = PackedPostings(vocabulary, arrays["offsets"], arrays["rows"], arrays["frequencies"])
+        index.postings = PackedPostings(vocabulary, arrays["offsets"], arrays["rows"], arrays["weights"])
+        index.idf = dict(zip(terms, arrays["idf"].tolist()))
+        index._doc_terms = PackedTermSets(terms, arrays["row_offsets"], arrays["row_terms"])
+        return index
+
+    @classmethod
+    def from_metadatas(cls, metadatas: List[Dict[str, Any]], k1: float = 1.2, b: float = 0.75) -> "LexicalIndex":
+        term_frequencies: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lengths = []
+        for row, metadata in enumerate(metadatas):
+            counts = Counter(tokenize(keyword_text(metadata or {})))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                term_frequencies.setdefault(term, []).append((row, tf))
+        return cls([document_key(metadata or {}) for metadata in metadatas], term_frequencies, doc_lengths, k1, b)
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "ids": self.ids, "k1": self.k1, "b": self.b,
+                       "doc_lengths": self.doc_lengths, "postings": dict(self.term_frequencies)}, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported lexical index version: {data.get('version')}")
+        postings = {term: [tuple(p) for p in rows] for term, rows in data["postings"].items()}
+        return cls(data["ids"], postings, data["doc_lengths"], data["k1"], data["b"])
+
+    @classmethod
+    def load_or_build(cls, path: Optional[str], metadatas: List[Dict[str, Any]]) -> "LexicalIndex":
+        """The index persisted at ingestion time when it matches these documents row for row, else a fresh build"""
+        ids = [document_key(metadata or {}) for metadata in metadatas]
+        if path and os.path.exists(path):
+            try:
+                index = cls.load(path)
+                if index.ids == ids:
+                    return index
+            except (OSError, ValueError, KeyError):
+                pass
+        return cls.from_metadatas(metadatas)
+
+    def is_keyword_query(self, query: str, max_terms: int) -> bool:
+        """Short queries made only of indexed terms, which lexical matching answers on its own"""
+        words = [t for t in tokenize(query) if '_' not in t]
+        return 0 < len(words) <= max_terms and all(w in self.postings for w in words)
+
+    def search(self, query: str, k: int, candidates: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Top-k (row, BM25 score) pairs, best first, restricted to a FilterIndex bitset if given"""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            for row, weight in self.postings.get(term, ()):
+                scores[row] = scores.get(row, 0.0) + weight
+        if candidates is not None:
+            scores = {row: score for row, score in scores.items() if candidates >> row & 1}
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(*rankings: List[str], k: int = 60) -> Dict[str, float]:
+    """Fuse ranked key lists: each key scores the sum of 1 / (k + rank) over the lists it appears in"""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return fused
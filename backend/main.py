@@ -1,28 +1,107 @@
 import os
 import re
-import pandas as pd
-import requests
+import json
+import time
+import asyncio
+import hashlib
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
 from typing import Dict, Any, List, Optional
-from langchain_core.documents import Document
-from langchain_google_genai import GoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
-from fastapi import FastAPI, Query
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from fastapi.middleware.cors import CORSMiddleware
+import config
+from filter_index import split_list
+from caching import CursorStore, PersistentCache, ResponseCache, normalize_query
+from fragments import ResultFragments, dumps, etag, etag_matches
+from fetcher import close_http_client, fetcher_stats, stream_conditional, stream_page
+from html_extract import StreamingExtractor
+from metrics import REGISTRY, REQUESTS, REQUEST_SECONDS, RESPONSE_CACHE_LOOKUPS, SEARCH_RESULTS, current_timings, record_error, record_stages, request_timings, span
+from embedding_providers import EMBEDDING_PROVIDERS, provider_directory
+from retriever import DEFAULT_PERSIST_DIRECTORY, MatrixIndexUnavailable, get_retriever, close_retrievers
+
+# Whole-response cache for /search, emptied whenever the vector store changes. With
+# SHARED_CACHE_PATH, serving workers also share entries, keyed on the index version they loaded
+response_cache = ResponseCache(
+    max_entries=config.RESPONSE_CACHE_SIZE,
+    ttl=config.RESPONSE_CACHE_TTL,
+    stale_ttl=config.RESPONSE_CACHE_STALE_TTL,
+    shared_path=config.SHARED_CACHE_PATH or None,
+    namespace=lambda: get_retriever(DEFAULT_PERSIST_DIRECTORY).index_version,
+    dumps=lambda response: response.model_dump_json(),
+    loads=lambda text: SearchResponse.model_validate_json(text)
+)
+
+# Ranked result lists behind pagination cursors, shared the same way so any worker serves the next page
+result_cursors = CursorStore(
+    max_entries=config.CURSOR_STORE_SIZE,
+    ttl=config.CURSOR_TTL,
+    shared_path=config.SHARED_CACHE_PATH or None,
+    dumps=lambda response: response.model_dump_json(),
+    loads=lambda text: SearchResponse.model_validate_json(text)
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the vector store once at startup and share it across requests"""
+    retriever = get_retriever(DEFAULT_PERSIST_DIRECTORY)
+    retriever.add_reload_listener(response_cache.invalidate)
+    retriever.add_reload_listener(result_fragments)
+    if config.SHARED_CACHE_PATH:
+        # Scrapes reach a random worker; each one serves the sum over all of them
+        REGISTRY.share(config.SHARED_CACHE_PATH, config.METRICS_FLUSH_INTERVAL)
+    try:
+        retriever.warm()
+        result_fragments()
+    except Exception as e:
+        # Stay up but report not-ready; the store is retried on the first query
+        print(f"Vector store warm-up failed: {str(e)}")
+    yield
+    await close_http_client()
+    close_retrievers()
+    response_cache.close()
+    result_cursors.close()
+    REGISTRY.unshare()
 
 # Create FastAPI app
 app = FastAPI(title="Assessment Recommendation System API", 
               description="API for searching and recommending SHL assessments",
-              version="1.0.0")
+              version="1.0.0",
+              lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://shl-recommendation-engine.vercel.app"],  # Allow specific origin
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["Server-Timing", "X-Cache", "Age", "ETag"],  # Readable by the frontend
 )
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """Count requests and time them per route; add a Server-Timing header when enabled or asked for."""
+    start = time.perf_counter()
+    status = 500
+    with request_timings() as timings:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            # Route templates, not raw paths, keep the label set bounded
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUESTS.inc(request.method, path, str(status))
+            REQUEST_SECONDS.observe(time.perf_counter() - start, request.method, path)
+    if config.SERVER_TIMING or request.query_params.get("timing", "").lower() in ("1", "true", "yes"):
+        response.headers["Server-Timing"] = timings.server_timing()
+        response.headers["Timing-Allow-Origin"] = "https://shl-recommendation-engine.vercel.app"
+    return response
+
 # Define response models
 class AssessmentResult(BaseModel):
     name: str
@@ -31,39 +110,54 @@ class AssessmentResult(BaseModel):
     duration: float
     test_types: List[str]
 
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    query: str
+    is_url: bool = False
+    max_results: int = Field(5, ge=1, le=10)
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+
 class SearchResponse(BaseModel):
     search_query: str
     original_query: str
     is_url: bool
     job_description_url: Optional[str] = None
     results: List[AssessmentResult]
+    next_cursor: Optional[str] = None
+    # Search plan and per-stage timings, only when requested with debug=true
+    debug: Optional[Dict[str, Any]] = None
 
-def clean_list_field(field):
-    """Clean list fields that might be string representations of lists or comma-separated strings"""
-    if pd.isna(field) or field == '':
-        return []
-        
-    # If it's already a list, return it
-    if isinstance(field, list):
-        return field
-        
-    # If it looks like a string representation of a list: ['item1', 'item2']
-    if isinstance(field, str) and field.startswith('[') and field.endswith(']'):
-        try:
-            # Try to eval it safely to convert string representation to actual list
-            # Remove quotes for safer eval
-            clean_str = field.replace("'", '"')
-            result = eval(clean_str)
-            if isinstance(result, list):
-                return result
-        except:
-            pass
-    
-    # Otherwise, treat as comma-separated string
-    if isinstance(field, str):
-        return [item.strip() for item in field.split(',') if item.strip()]
-    
-    return []
+class SimilarResponse(BaseModel):
+    assessment: AssessmentResult
+    results: List[AssessmentResult]
+
+def render_search_response(response, fragments):
+    """SearchResponse JSON with the results joined from their prebuilt fragments (the same
+    document FastAPI would write for the model), and its ETag."""
+    results, digests = fragments.encode_list(response.results)
+    head = b"".join((
+        b'{"search_query":', dumps(response.search_query),
+        b',"original_query":', dumps(response.original_query),
+        b',"is_url":', b"true" if response.is_url else b"false",
+        b',"job_description_url":', dumps(response.job_description_url),
+        b',"results":',
+    ))
+    tail = b"".join((
+        b',"next_cursor":', dumps(response.next_cursor),
+        b',"debug":', dumps(response.debug),
+        b'}',
+    ))
+    # The tag hashes the envelope and each result's digest rather than the whole body
+    return head + results + tail, etag(head + digests + tail)
+
+def conditional_json(request, body, tag, headers=None):
+    """A JSON response tagged with its ETag, or 304 Not Modified when If-None-Match names it."""
+    headers = {**(headers or {}), "ETag": tag}
+    if etag_matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 def get_duration_range(duration):
     """Categorize duration into ranges for easier filtering"""
@@ -82,196 +176,25 @@ def get_duration_range(duration):
     except (ValueError, TypeError):
         return "unknown"
 
-def prepare_documents(df):
-    """Convert DataFrame rows to Document objects with metadata"""
-    documents = []
-    
-    # Create mappings of all possible values for each category
-    test_type_mapping = {
-        'A': 'Ability & Aptitude',
-        'B': 'Biodata & Situational Judgment',
-        'C': 'Competencies',
-        'D': 'Development and 360',
-        'E': 'Assessment Exercises',
-        'K': 'Knowledge & Skills',
-        'P': 'Personality & Behavior',
-        'S': 'Simulation'
-    }
-    
-    # Get all unique values from the dataframe first (for job levels and languages)
-    all_job_levels = set()
-    all_languages = set()
-    
-    for _, row in df.iterrows():
-        job_levels = row['job_levels'] if isinstance(row['job_levels'], list) else []
-        languages = row['languages'] if isinstance(row['languages'], list) else []
-        
-        for level in job_levels:
-            all_job_levels.add(level.lower())
-        for lang in languages:
-            all_languages.add(lang.lower())
-    
-    # Now process each row with all possible values in mind
-    for _, row in df.iterrows():
-        # Handle lists properly - they're already processed by the clean_list_field function
-        job_levels = row['job_levels'] if isinstance(row['job_levels'], list) else []
-        languages = row['languages'] if isinstance(row['languages'], list) else []
-        test_types = row['test_type'] if isinstance(row['test_type'], list) else []
-        
-        # Create same page content as before
-        job_levels_str = ' and '.join(job_levels) if job_levels else 'various job levels'
-        languages_str = ' and '.join(languages) if languages else 'multiple languages'
-        test_types_str = ', '.join(test_types) if test_types else 'various assessments'
-        
-        # Create formatted test type descriptions
-        test_type_descriptions = []
-        test_type_categories = []
-        
-        for test_type in test_types:
-            test_type = test_type.upper() if isinstance(test_type, str) else test_type
-            description = test_type_mapping.get(test_type, f"Unknown ({test_type})")
-            test_type_descriptions.append(f"{test_type}: {description}")
-            
-            if test_type in test_type_mapping:
-                test_type_categories.append(test_type_mapping[test_type])
-        
-        test_types_detailed = ", ".join(test_type_descriptions) if test_type_descriptions else "No test types specified"
-        
-        # Create the page content
-        page_content = (
-            f"{row['name']}: A {job_levels_str} position in {languages_str}. "
-            f"Job Description: {row['description']} "
-            f"Test Types: {test_types_str} "
-            f"Detailed Test Types: {test_types_detailed} "
-            f"Duration: {row['duration']} minutes "
-            f"Remote Testing: {'Available' if row['remote_testing'] else 'Not available'} "
-            f"Adaptive Testing: {'Yes' if row['adaptive_irt'] else 'No'}"
-        )
-        
-        # Start with basic metadata using simple types
-        metadata = {
-            "name": str(row['name']),
-            "url": str(row['url']),
-            "description": str(row['description']),
-            "duration": float(row['duration']) if isinstance(row['duration'], (int, float)) or 
-                      (isinstance(row['duration'], str) and row['duration'].replace('.', '', 1).isdigit()) else 0.0,
-            "remote_testing": bool(row['remote_testing']),
-            "adaptive_irt": bool(row['adaptive_irt']),
-            "search_keywords": " ".join([str(row['name']), str(row['description']), 
-                                        *[str(level) for level in job_levels],
-                                        *[str(lang) for lang in languages], 
-                                        *[str(tt) for tt in test_types]]).lower(),
-        }
-        
-        # Add duration range as string
-        metadata["duration_range"] = get_duration_range(row['duration'])
-        
-        # Add job level boolean flags
-        for level in all_job_levels:
-            metadata[f"job_level_{level.replace(' ', '_').replace('-', '_')}"] = any(jl.lower() == level for jl in job_levels) 
-        
-        # Add language boolean flags
-        for lang in all_languages:
-            metadata[f"language_{lang.replace(' ', '_').replace('-', '_').replace('#', 'sharp').replace('+', 'plus')}"] = any(l.lower() == lang for l in languages)
-        
-        # Add test type boolean flags - both for codes and categories
-        for code in test_type_mapping:
-            metadata[f"test_type_{code}"] = code in [tt.upper() if isinstance(tt, str) else tt for tt in test_types]
-        
-        # Add category flags
-        metadata["contains_cognitive"] = any(cat in ["Ability & Aptitude", "Knowledge & Skills"] for cat in test_type_categories)
-        metadata["contains_personality"] = any(cat in ["Personality & Behavior"] for cat in test_type_categories)
-        metadata["contains_technical"] = any(cat in ["Knowledge & Skills", "Simulation"] for cat in test_type_categories)
-        metadata["contains_soft_skill"] = any(cat in ["Competencies", "Biodata & Situational Judgment", "Personality & Behavior"] for cat in test_type_categories)
-        
-        # Add duration-based flags for faster filtering
-        metadata["duration_under_30"] = metadata["duration"] <= 30
-        metadata["duration_under_45"] = metadata["duration"] <= 45
-        metadata["duration_under_60"] = metadata["duration"] <= 60
-        
-        # Create document with flat metadata structure
-        document = Document(
-            page_content=page_content,
-            metadata=metadata
-        )
-        
-        documents.append(document)
-    
-    return documents
+def get_test_types(metadata):
+    """Test type codes of a document, from compact metadata or legacy test_type_* flags."""
+    if 'test_types' in metadata:
+        return split_list(metadata['test_types'])
+    return [t.replace('test_type_', '') for t in metadata 
+            if t.startswith('test_type_') and metadata[t]]
 
-def extract_filters_from_query(query: str) -> Dict[str, Any]:
-    """Extract metadata filters from a natural language query."""
-    
-    filter_conditions = []
-    
-    # Job level detection
-    job_levels = [
-        "analyst", "director", "entry-level", "executive", "front line manager",
-        "general population", "graduate", "manager", "mid-professional", 
-        "professional individual contributor", "supervisor"
-    ]
-    
-    for level in job_levels:
-        if re.search(r'\b' + re.escape(level) + r'\b', query.lower()):
-            filter_conditions.append(
-                {"job_level_{0}".format(level.replace(' ', '_').replace('-', '_')): True}
-            )
-    
-    # Test type categories detection
-    if re.search(r'\b(cognitive|ability|aptitude)\b', query.lower()):
-        filter_conditions.append({"contains_cognitive": True})
-    
-    if re.search(r'\b(personality|behavior|behaviour)\b', query.lower()):
-        filter_conditions.append({"contains_personality": True})
-        
-    if re.search(r'\b(technical|knowledge|skill)\b', query.lower()):
-        filter_conditions.append({"contains_technical": True})
-        
-    if re.search(r'\b(soft skill|competenc|situational|judgment)\b', query.lower()):
-        filter_conditions.append({"contains_soft_skill": True})
-    
-    # Duration detection
-    duration_match = re.search(r'(\d+)\s*(min|mins|minutes)', query.lower())
-    if duration_match:
-        minutes = int(duration_match.group(1))
-        if minutes <= 15:
-            filter_conditions.append({"duration_range": "very_short"})
-        elif minutes <= 30:
-            filter_conditions.append({"duration_range": "short"})
-        elif minutes <= 45:
-            filter_conditions.append({"duration_under_45": True})
-        elif minutes <= 60:
-            filter_conditions.append({"duration_under_60": True})
-        
-    # Language detection
-    languages = [
-        "arabic", "chinese simplified", "chinese traditional", "czech", "danish",
-        "dutch", "english", "estonian", "finnish", "flemish", "french", "german",
-        "greek", "hungarian", "icelandic", "indonesian", "italian", "japanese",
-        "korean", "latvian", "lithuanian", "malay", "norwegian", "polish",
-        "portuguese", "romanian", "russian", "serbian", "slovak", "spanish",
-        "swedish", "thai", "turkish", "vietnamese"
-    ]
-    
-    for lang in languages:
-        if re.search(r'\b' + re.escape(lang) + r'\b', query.lower()):
-            clean_lang = lang.replace(' ', '_').replace('-', '_')
-            filter_conditions.append({f"language_{clean_lang}": True})
+def extract_facets(query, persist_directory=DEFAULT_PERSIST_DIRECTORY):
+    """Detect job levels, languages, test categories, duration and remote/adaptive flags in one pass."""
+    return get_retriever(persist_directory).facet_extractor.extract(query)
+
+def extract_filters_from_query(query: str, persist_directory=DEFAULT_PERSIST_DIRECTORY) -> Dict[str, Any]:
+    """Extract metadata filters from a natural language query.
     
-    # Remote testing and adaptive features
-    if "remote" in query.lower():
-        filter_conditions.append({"remote_testing": True})
-        
-    if "adaptive" in query.lower():
-        filter_conditions.append({"adaptive_irt": True})
-    
-    # Return proper ChromaDB filter structure
-    if not filter_conditions:
-        return None  # No filters found
-    elif len(filter_conditions) == 1:
-        return filter_conditions[0]  # Single filter
-    else:
-        return {"$or": filter_conditions}  # Multiple filters combined with OR
+    Conditions within one facet (two job levels, two languages) are ORed together and the
+    facets themselves are ANDed, so "graduate Java 30 minutes remote" means graduate level
+    and at most 30 minutes and remote testing.
+    """
+    return extract_facets(query, persist_directory).to_filter()
 
 def extract_url_from_query(query):
     """Extract URLs from the user query."""
@@ -279,66 +202,93 @@ def extract_url_from_query(query):
     urls = re.findall(url_pattern, query)
     return urls[0] if urls else None
 
+# Two-tier cache for the URL path: URL -> extracted page text, hash(text) -> generated query
+page_cache = PersistentCache(
+    "job_pages",
+    max_entries=config.PAGE_CACHE_SIZE,
+    ttl=config.PAGE_CACHE_MAX_AGE,
+    persist_path=config.PAGE_CACHE_PATH or None
+)
+query_cache = PersistentCache(
+    "generated_queries",
+    max_entries=config.QUERY_CACHE_SIZE,
+    ttl=config.QUERY_CACHE_TTL,
+    persist_path=config.QUERY_CACHE_PATH or None
+)
+
+def get_fresh_page(url):
+    """Return (cached page entry, whether it is fresh enough to use without revalidating)."""
+    cached = page_cache.get(url)
+    if cached is None:
+        return None, False
+    return cached, time.time() - cached['fetched_at'] < config.PAGE_CACHE_FRESH_TTL
+
+def store_page(url, text, etag=None, last_modified=None):
+    """Remember extracted page text with the validators needed for a conditional GET."""
+    page_cache.set(url, {
+        'text': text,
+        'etag': etag,
+        'last_modified': last_modified,
+        'fetched_at': time.time()
+    })
+
 def extract_job_description(url):
     """Extract job description from a job listing webpage."""
+    cached, fresh = get_fresh_page(url)
+    if fresh:
+        return cached['text']
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # First try to find job description by common class names or IDs
-        job_desc_selectors = [
-            'div.description', 'div.job-description', '#job-description',
-            '.job-details', '.description', '[data-test="job-description"]',
-            'section.description', 'div.details', '.details-pane', 
-            '.job-desc', '.show-more-less-html'
-        ]
-        
-        for selector in job_desc_selectors:
-            job_desc = soup.select_one(selector)
-            if job_desc:
-                return job_desc.get_text(separator='\n', strip=True)
-        
-        # If specific selectors fail, use a more generic approach
-        # Find sections with job-related terms in them
-        job_keywords = ['responsibilities', 'requirements', 'qualifications', 'about the job', 'job summary', 'what you&nbspll do', 'what we&nbspre looking for']
-        
-        for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'strong']):
-            heading_text = heading.get_text().lower()
-            if any(keyword in heading_text for keyword in job_keywords):
-                # Get the next sibling elements which likely contain the job description
-                description = []
-                current = heading.find_next_sibling()
-                while current and current.name not in ['h1', 'h2', 'h3', 'h4']:
-                    if current.get_text(strip=True):
-                        description.append(current.get_text(strip=True))
-                    current = current.find_next_sibling()
-                if description:
-                    return '\n'.join(description)
-        
-        # If all else fails, get the main content area and try to extract job details
-        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-        if main_content:
-            text = main_content.get_text(separator='\n', strip=True)
-            # Clean up the text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            return '\n'.join(chunk for chunk in chunks if chunk)
-        
-        # Last resort: just get the page title and any text
-        title = soup.title.string if soup.title else "Job Listing"
-        return f"{title}{soup.get_text(strip=True)[:2000]}"
+        etag = cached.get('etag') if cached else None
+        last_modified = cached.get('last_modified') if cached else None
+        # Pooled keep-alive session under the host's limits; streamed, so a multi-MB page is
+        # only read until its job-description container has been parsed
+        with stream_page(url, etag, last_modified, timeout=config.SCRAPE_TIMEOUT) as response:
+            if response is None:
+                store_page(url, cached['text'], etag, last_modified)
+                return cached['text']
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            extractor = StreamingExtractor(response.encoding, max_bytes=config.SCRAPE_MAX_BYTES)
+            for chunk in response.iter_content(config.SCRAPE_CHUNK_SIZE):
+                if extractor.feed(chunk):
+                    break
+        text = extractor.text()
+        store_page(url, text, etag, last_modified)
+        return text
         
     except Exception as e:
         return f"Error extracting job description: {str(e)}"
 
-def generate_search_query(job_description):
-    """Generate a search query based on job description using Gemini."""
-    prompt = f"""
+async def extract_job_description_async(url):
+    """Extract job description with the shared async HTTP client, parsing off the event loop."""
+    cached, fresh = get_fresh_page(url)
+    if fresh:
+        return cached['text']
+    try:
+        etag = cached.get('etag') if cached else None
+        last_modified = cached.get('last_modified') if cached else None
+        async with stream_conditional(url, etag, last_modified, timeout=config.SCRAPE_TIMEOUT) as response:
+            if response is None:
+                # 304 Not Modified: the cached text is still current
+                store_page(url, cached['text'], etag, last_modified)
+                return cached['text']
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            extractor = StreamingExtractor(response.charset_encoding, max_bytes=config.SCRAPE_MAX_BYTES)
+            # Chunks are parsed as they arrive; the rest of the body is never read once a
+            # container for the most preferred selector has been found
+            async for chunk in response.aiter_bytes(config.SCRAPE_CHUNK_SIZE):
+                if await run_blocking(extractor.feed, chunk):
+                    break
+        text = await run_blocking(extractor.text, timeout=config.SCRAPE_TIMEOUT)
+        store_page(url, text, etag, last_modified)
+        return text
+    except asyncio.TimeoutError:
+        return f"Error extracting job description: timed out after {config.SCRAPE_TIMEOUT}s"
+    except Exception as e:
+        return f"Error extracting job description: {str(e)}"
+
+def build_search_query_prompt(job_description):
+    """Build the Gemini prompt that turns a job description into a search query."""
+    return f"""
     Based on the following job description, create a concise search query to find appropriate
     assessment tests that would help screen candidates for this position.
     
@@ -353,58 +303,134 @@ def generate_search_query(job_description):
     
     Return ONLY the search query, nothing else.
     """
-    
-    model = GoogleGenerativeAI(model="gemini-2.5-pro-exp-03-25")
-    response = model.invoke(prompt)
-    return response.strip()
 
-def search_assessments(query, persist_directory="../shl_optimized_vector_db"):
-    """Search for assessments based on the query."""
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-    
-    # Load the vector store
-    vector_store = Chroma(
-        persist_directory=persist_directory,
-        embedding_function=embeddings
-    )
-    
-    # Extract any time constraints from the query
-    time_pattern = r'(\d+)\s*minutes'
-    time_match = re.search(time_pattern, query.lower())
-    max_duration = None
-    
-    if time_match:
-        max_duration = int(time_match.group(1))
-    
-    # First try with filters
-    filters = extract_filters_from_query(query)
-    if filters:
-        results = vector_store.similarity_search_with_score(
-            query=query,
-            k=5,
-            filter=filters
-        )
-        # Convert to Document objects
-        filtered_results = [doc for doc, _ in results]
-    else:
-        # If no filters, perform standard search
-        filtered_results = vector_store.similarity_search(
-            query=query,
-            k=5
+QUERY_MODEL = "gemini-2.5-pro-exp-03-25"
+_query_model = None
+
+def get_query_model():
+    """Gemini client used for query generation, created once per process."""
+    global _query_model
+    if _query_model is None:
+        # The Google SDK takes seconds to import; only the LLM query path pays for it
+        from langchain_google_genai import GoogleGenerativeAI
+        _query_model = GoogleGenerativeAI(model=QUERY_MODEL)
+    return _query_model
+
+def query_cache_key(job_description):
+    """Hash of the prompt-relevant job description text and the model that answers it."""
+    digest = hashlib.sha256(job_description[:3000].encode('utf-8')).hexdigest()
+    return f"{QUERY_MODEL}:{digest}"
+
+def local_search_query(job_description, persist_directory=DEFAULT_PERSIST_DIRECTORY):
+    """Build a search query from the job description locally, with a confidence score."""
+    return get_retriever(persist_directory).keyphrase_extractor.extract(job_description)
+
+def generate_llm_search_query(job_description):
+    """Generate a search query based on job description using Gemini."""
+    key = query_cache_key(job_description)
+    cached = query_cache.get(key)
+    if cached is not None:
+        return cached
+    response = get_query_model().invoke(build_search_query_prompt(job_description))
+    search_query = response.strip()
+    query_cache.set(key, search_query)
+    return search_query
+
+async def generate_llm_search_query_async(job_description):
+    """Generate a search query with Gemini without blocking the event loop."""
+    key = query_cache_key(job_description)
+    cached = query_cache.get(key)
+    if cached is not None:
+        return cached
+    with span("llm"):
+        response = await asyncio.wait_for(
+            get_query_model().ainvoke(build_search_query_prompt(job_description)),
+            timeout=config.LLM_TIMEOUT
         )
+    search_query = response.strip()
+    query_cache.set(key, search_query)
+    return search_query
+
+def generate_search_query(job_description, policy=None):
+    """
+    Turn a job description into a search query according to the query generation policy.
     
-    # If we have time constraints, filter results manually
-    if max_duration:
-        duration_filtered = []
-        for doc in filtered_results:
-            duration = doc.metadata.get('duration')
-            if duration and float(duration) <= max_duration:
-                duration_filtered.append(doc)
-        return duration_filtered if duration_filtered else filtered_results[:3]  # Return at least something
+    "local" always uses the keyphrase extractor, "llm" always asks Gemini, and "auto" asks
+    Gemini only when the local query's confidence is below QUERY_LOCAL_MIN_CONFIDENCE
+    (falling back to the local query if Gemini fails).
+    """
+    policy = policy or config.QUERY_GENERATION_POLICY
+    if policy == "llm":
+        return generate_llm_search_query(job_description)
+    local = local_search_query(job_description)
+    if policy == "local" or (local.query and local.confidence >= config.QUERY_LOCAL_MIN_CONFIDENCE):
+        return local.query
+    try:
+        return generate_llm_search_query(job_description)
+    except Exception:
+        if local.query:
+            return local.query
+        raise
+
+async def generate_search_query_async(job_description, policy=None):
+    """Async generate_search_query(): local extraction on the worker pool, Gemini on the event loop."""
+    policy = policy or config.QUERY_GENERATION_POLICY
+    if policy == "llm":
+        return await generate_llm_search_query_async(job_description)
+    local = await run_blocking(local_search_query, job_description)
+    if policy == "local" or (local.query and local.confidence >= config.QUERY_LOCAL_MIN_CONFIDENCE):
+        return local.query
+    try:
+        return await generate_llm_search_query_async(job_description)
+    except Exception:
+        if local.query:
+            return local.query
+        raise
+
+# Bounded pool for blocking work (vector search, HTML parsing) so it never runs on the event loop
+_blocking_executor = ThreadPoolExecutor(max_workers=config.SEARCH_WORKERS, thread_name_prefix="search")
+
+async def run_blocking(func, *args, timeout=None):
+    """Run a blocking call on the bounded worker pool, optionally with a timeout."""
+    loop = asyncio.get_running_loop()
+    # Carry the request's context over so stage timings recorded in the worker reach its Server-Timing
+    context = contextvars.copy_context()
+    future = loop.run_in_executor(_blocking_executor, functools.partial(context.run, func, *args))
+    if timeout is None:
+        return await future
+    return await asyncio.wait_for(future, timeout=timeout)
+
+def search_assessments(query, persist_directory=DEFAULT_PERSIST_DIRECTORY, k=5, facets=None, debug=None):
+    """Search for assessments based on the query. A `debug` dict is filled with the search plan and stage timings."""
+    # Reuse the process-wide retriever (Chroma or NumPy backend) instead of reopening it per query
+    retriever = get_retriever(persist_directory)
     
-    return filtered_results
+    # Filters are None when the query has no detectable constraints; the retriever plans
+    # pre- vs post-filtering and returns k hits whenever k assessments match
+    if facets is None:
+        with span("filter_extraction"):
+            facets = retriever.facet_extractor.extract(query)
+    filters = facets.to_filter()
+    results, plan = retriever.search(
+        query=query,
+        k=k,
+        filter=filters,
+        facets=facets
+    )
+    # The retriever's own stages: plan, lexical, embedding, vector_search, post_filter, fuse, rerank
+    record_stages(plan.timings)
+    if debug is not None:
+        debug.update(plan.to_dict())
+    return [doc for doc, _ in results]
 
-def process_user_query(user_query, persist_directory="../shl_optimized_vector_db"):
+def batch_search_assessments(queries, ks, persist_directory=DEFAULT_PERSIST_DIRECTORY):
+    """Search many queries at once: batched embedding calls, then each query ranked as /search ranks it."""
+    retriever = get_retriever(persist_directory)
+    facets = [retriever.facet_extractor.extract(query) for query in queries]
+    results = retriever.batch_search(queries, ks, [f.to_filter() for f in facets], facets)
+    return [[doc for doc, _ in hits] for hits in results]
+
+def process_user_query(user_query, persist_directory=DEFAULT_PERSIST_DIRECTORY):
     """Process user query with URL to extract job description and search for assessments."""
     # Extract URL from query
     url = extract_url_from_query(user_query)
@@ -424,8 +450,7 @@ def process_user_query(user_query, persist_directory="../shl_optimized_vector_db
                 formatted_results += f"Duration: {result.metadata.get('duration', 'N/A')} minutes\n"
                 
                 # Format test types
-                test_types = [t.replace('test_type_', '') for t in result.metadata 
-                              if t.startswith('test_type_') and result.metadata[t]]
+                test_types = get_test_types(result.metadata)
                 formatted_results += f"Test types: {', '.join(test_types) if test_types else 'N/A'}\n"
                 
                 formatted_results += f"URL: {result.metadata.get('url', 'N/A')}\n"
@@ -444,12 +469,10 @@ def process_user_query(user_query, persist_directory="../shl_optimized_vector_db
     search_query = generate_search_query(job_description)
     
     # Incorporate any time constraints from the original query
-    time_pattern = r'(\d+)\s*minutes'
-    time_match = re.search(time_pattern, user_query.lower())
-    if time_match:
-        max_duration = time_match.group(0)
+    max_duration = extract_facets(user_query, persist_directory).max_duration
+    if max_duration:
         if "time" not in search_query.lower() and "minute" not in search_query.lower():
-            search_query += f" Assessment duration less than {max_duration}."
+            search_query += f" Assessment duration less than {max_duration} minutes."
     
     try:
         # Search for assessments
@@ -467,8 +490,7 @@ def process_user_query(user_query, persist_directory="../shl_optimized_vector_db
                 formatted_results += f"Duration: {result.metadata.get('duration', 'N/A')} minutes\n"
                 
                 # Format test types
-                test_types = [t.replace('test_type_', '') for t in result.metadata 
-                              if t.startswith('test_type_') and result.metadata[t]]
+                test_types = get_test_types(result.metadata)
                 formatted_results += f"Test types: {', '.join(test_types) if test_types else 'N/A'}\n"
                 
                 formatted_results += f"URL: {result.metadata.get('url', 'N/A')}\n"
@@ -487,155 +509,566 @@ Generated Search Query: "{search_query}"
     except Exception as e:
         return f"Error searching for assessments: {str(e)}"
 
-def prepare_data_pipeline(df_path, persist_directory="database/shl_vector_db"):
-    """Prepare the data pipeline from CSV to vector database."""
-    # Load the dataframe
-    print(f"Loading data from {df_path}...")
-    df = pd.read_csv(df_path)
-    
-    # Clean list fields
-    print("Cleaning list fields...")
-    for col in ['job_levels', 'languages', 'test_type']:
-        if col in df.columns:
-            df[col] = df[col].apply(clean_list_field)
-    
-    # Extract unique values for reporting
-    print("Extracting unique values...")
-    job_levels_unique = set()
-    languages_unique = set()
-    test_types_unique = set()
-    
-    for job_levels_list in df['job_levels']:
-        if isinstance(job_levels_list, list):
-            for level in job_levels_list:
-                job_levels_unique.add(level)
-    
-    for languages_list in df['languages']:
-        if isinstance(languages_list, list):
-            for language in languages_list:
-                languages_unique.add(language)
-    
-    for test_types_list in df['test_type']:
-        if isinstance(test_types_list, list):
-            for test_type in test_types_list:
-                test_types_unique.add(test_type)
-    
-    # Convert sets to sorted lists for better readability
-    job_levels_unique = sorted(list(job_levels_unique))
-    languages_unique = sorted(list(languages_unique))
-    test_types_unique = sorted(list(test_types_unique))
-    
-    print(f"Found {len(job_levels_unique)} unique job levels")
-    print(f"Found {len(languages_unique)} unique languages")
-    print(f"Found {len(test_types_unique)} unique test types")
-    
-    # Prepare documents
-    print("Preparing documents...")
-    documents = prepare_documents(df)
-    print(f"Created {len(documents)} documents")
-    
-    # Create embeddings and vector store
-    print("Creating vector store...")
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-    vector_store = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        persist_directory=persist_directory
-    )
+def prepare_data_pipeline(df_path, persist_directory=DEFAULT_PERSIST_DIRECTORY, provider=None):
+    """Sync the vector database with the CSV catalog, embedding only new or changed rows, and
+    export the NumPy, lexical and serving-artifact indexes (see pipeline.py).
+    
+    Each embedding provider has its own collection under a directory derived from persist_directory.
+    """
+    # Ingestion (pandas, Chroma) is imported only when it runs, never on the serving path
+    from pipeline import sync_catalog
     
-    print(f"Vector store created and persisted to {persist_directory}")
+    provider = provider or config.EMBEDDING_PROVIDER
+    vector_store, report = sync_catalog(df_path, persist_directory, provider)
+    if report.changed:
+        # Make any retriever already serving this collection pick up the new store
+        retriever = get_retriever(persist_directory)
+        if retriever.is_warm and retriever.persist_directory == provider_directory(persist_directory, provider):
+            retriever.reload_if_changed(force=True)
+        response_cache.invalidate()
     return vector_store
 
+def reindex(df_path, persist_directory=DEFAULT_PERSIST_DIRECTORY, providers=None):
+    """Build (or sync) one collection per embedding provider from the same catalog."""
+    for provider in providers or EMBEDDING_PROVIDERS:
+        print(f"\n=== Reindexing with the {provider} embedding provider ===")
+        prepare_data_pipeline(df_path, persist_directory, provider)
+
+@app.get("/health")
+async def health():
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: reports whether the vector store is warm."""
+    status = get_retriever(DEFAULT_PERSIST_DIRECTORY).status()
+    return JSONResponse(status_code=200 if status["warm"] else 503, content=status)
+
+def build_assessment_result(page_content, metadata):
+    """Build the API representation of one catalog document."""
+    return AssessmentResult(
+        name=metadata.get('name', 'N/A'),
+        url=metadata.get('url', 'N/A'),
+        description=page_content[:500],  # Limit description length
+        duration=float(metadata.get('duration', 0)),
+        test_types=get_test_types(metadata)
+    )
+
+_result_fragments: Dict[str, ResultFragments] = {}
+_result_fragments_lock = threading.Lock()
+
+def result_fragments(persist_directory=DEFAULT_PERSIST_DIRECTORY):
+    """The table of returned documents' AssessmentResults and their encoded JSON, replaced by an
+    empty one when the retriever loads a new index version."""
+    retriever = get_retriever(persist_directory)
+    version = retriever.index_version
+    fragments = _result_fragments.get(persist_directory)
+    if fragments is None or fragments.version != version:
+        with _result_fragments_lock:
+            fragments = _result_fragments.get(persist_directory)
+            if fragments is None or fragments.version != version:
+                fragments = ResultFragments(build_assessment_result, version)
+                _result_fragments[persist_directory] = fragments
+    return fragments
+
+def to_assessment_result(result, fragments=None):
+    """The API representation of one search hit, built once per catalog document."""
+    if fragments is None:
+        fragments = result_fragments()
+    return fragments.result(result.page_content, result.metadata)
+
+def error_response(query, is_url, message, url=None):
+    """Empty SearchResponse carrying an error message as its search query."""
+    return SearchResponse(
+        search_query=message,
+        original_query=query,
+        is_url=is_url,
+        job_description_url=url,
+        results=[]
+    )
+
+async def resolve_search_query(query, is_url):
+    """Turn the request into the text to search with. Returns (search_query, url, error_response)."""
+    if not is_url:
+        # Use the query directly
+        return query, None, None
+    
+    # Extract URL from query if not already a URL
+    with span("url_extraction"):
+        url = query if query.startswith(('http://', 'https://')) else extract_url_from_query(query)
+    
+    if not url:
+        return None, None, SearchResponse(
+            search_query="",
+            original_query=query,
+            is_url=is_url,
+            results=[]
+        )
+        
+    # Extract job description from URL
+    with span("scrape"):
+        job_description = await extract_job_description_async(url)
+    if job_description.startswith("Error"):
+        record_error("scrape")
+        return None, url, error_response(query, is_url, job_description, url)
+        
+    # Generate search query based on job description
+    try:
+        with span("query_generation"):
+            search_query = await generate_search_query_async(job_description)
+    except asyncio.TimeoutError:
+        return None, url, error_response(
+            query, is_url, f"Error generating search query: timed out after {config.LLM_TIMEOUT}s", url)
+    except Exception as e:
+        return None, url, error_response(query, is_url, f"Error generating search query: {str(e)}", url)
+    
+    # Incorporate any time constraints from the original query
+    with span("filter_extraction"):
+        max_duration = (await run_blocking(extract_facets, query)).max_duration
+    if max_duration:
+        if "time" not in search_query.lower() and "minute" not in search_query.lower():
+            search_query += f" Assessment duration less than {max_duration} minutes."
+    return search_query, url, None
+
+async def attach_cursor(ranked, max_results):
+    """Store the ranked list behind a cursor for the pages after the first, when there are any.
+
+    Called once per ranked list: the returned response, whole list and cursor, is what the
+    response cache keeps; first_page() cuts what each request is sent."""
+    if len(ranked.results) <= max_results:
+        return ranked
+    cursor_id = await result_cursors.put_async(ranked.model_copy(update={"debug": None}))
+    return ranked.model_copy(update={"next_cursor": CursorStore.encode(cursor_id, max_results)})
+
+async def first_page(ranked, max_results):
+    """The first page of a ranked response, renewing its cursor so it outlives the response."""
+    if ranked.next_cursor is None:
+        return ranked
+    cursor_id, _ = CursorStore.decode(ranked.next_cursor)
+    await result_cursors.renew_async(
+        cursor_id, lambda: ranked.model_copy(update={"next_cursor": None, "debug": None}))
+    return ranked.model_copy(update={"results": ranked.results[:max_results]})
+
+async def run_search(query, is_url, max_results, debug=False):
+    """Run the full search pipeline for one request and build its SearchResponse, holding the
+    whole ranked list and the cursor to it; first_page() cuts the page each request is sent."""
+    start = time.perf_counter()
+    search_query, url, error = await resolve_search_query(query, is_url)
+    if error is not None:
+        return error
+    resolved = time.perf_counter()
+    
+    try:
+        # Search for assessments on the worker pool so the event loop stays free; the ranked
+        # list goes SEARCH_DEPTH deep so later pages are slices rather than new searches
+        trace = {} if debug else None
+        with span("search"):
+            results = await run_blocking(
+                search_assessments, search_query, DEFAULT_PERSIST_DIRECTORY,
+                max(max_results, config.SEARCH_DEPTH), None, trace,
+                timeout=config.SEARCH_TIMEOUT
+            )
+        SEARCH_RESULTS.observe(len(results))
+        if debug:
+            # Stage timings in ms: query resolution (scrape + query generation), the search
+            # call as a whole, and the retriever's own stages
+            timings = trace.pop("timings_ms", {})
+            trace["timings_ms"] = {
+                "resolve": round((resolved - start) * 1000, 3),
+                "search": round((time.perf_counter() - resolved) * 1000, 3),
+                **{f"search.{stage}": ms for stage, ms in timings.items()},
+            }
+        
+        # Format results according to the response model
+        with span("serialize"):
+            response = SearchResponse(
+                search_query=search_query,
+                original_query=query,
+                is_url=is_url,
+                job_description_url=url if is_url else None,
+                results=[],
+                debug=trace
+            )
+            fragments = result_fragments()
+            response.results = [to_assessment_result(result, fragments) for result in results]
+            return await attach_cursor(response, max_results)
+        
+    except asyncio.TimeoutError:
+        return error_response(
+            query, is_url, f"Error searching for assessments: timed out after {config.SEARCH_TIMEOUT}s",
+            url if is_url else None)
+    except Exception as e:
+        # Return empty results with error message as search query
+        return error_response(
+            query, is_url, f"Error searching for assessments: {str(e)}", url if is_url else None)
+
+def response_cache_key(query, is_url, max_results):
+    """Cache key for a /search request; URLs keep their case, text queries are normalized."""
+    return (query.strip() if is_url else normalize_query(query), is_url, max_results)
+
+def is_cacheable_response(response):
+    """Error responses are returned as-is but never cached."""
+    return not response.search_query.startswith("Error")
+
 @app.get("/search", response_model=SearchResponse)
 async def search(
+    request: Request,
+    response: Response,
     query: str = Query(..., description="Natural language query or job description URL"),
     is_url: bool = Query(False, description="Whether the query is a URL to a job listing"),
-    max_results: int = Query(5, description="Maximum number of results to return", ge=1, le=10)
+    max_results: int = Query(5, description="Maximum number of results to return", ge=1, le=10),
+    debug: bool = Query(False, description="Include the search plan and per-stage timings"),
+    timing: bool = Query(False, description="Add a Server-Timing header with the per-stage breakdown")
 ):
     """
     Search for assessments based on a natural language query or job description URL.
     
     - If is_url=True, the system will extract the job description from the URL and generate a search query.
     - If is_url=False, the query will be directly used to search for assessments.
+    
+    Identical requests are answered from the response cache; the X-Cache header reports
+    HIT, STALE, COALESCED or MISS and Age how old the cached response is. Debug requests
+    always run the full pipeline so their timings are real. With timing=true the
+    request middleware adds a Server-Timing header with each stage's duration.
+    
+    Responses carry an ETag; a request whose If-None-Match names the current response is
+    answered with 304 Not Modified and no body.
     """
-    # Process query based on whether it's a URL or direct query
-    if is_url:
-        # Extract URL from query if not already a URL
-        url = query if query.startswith(('http://', 'https://')) else extract_url_from_query(query)
-        
-        if not url:
-            return SearchResponse(
-                search_query="",
-                original_query=query,
-                is_url=is_url,
-                results=[]
-            )
-            
-        # Extract job description from URL
-        job_description = extract_job_description(url)
-        if job_description.startswith("Error"):
-            return SearchResponse(
-                search_query=job_description,
-                original_query=query,
-                is_url=is_url,
-                job_description_url=url,
-                results=[]
-            )
-            
-        # Generate search query based on job description
-        search_query = generate_search_query(job_description)
-        
-        # Incorporate any time constraints from the original query
-        time_pattern = r'(\d+)\s*minutes'
-        time_match = re.search(time_pattern, query.lower())
-        if time_match:
-            max_duration = time_match.group(0)
-            if "time" not in search_query.lower() and "minute" not in search_query.lower():
-                search_query += f" Assessment duration less than {max_duration}."
+    if debug:
+        response.headers["X-Cache"] = "BYPASS"
+        return await first_page(await run_search(query, is_url, max_results, debug=True), max_results)
+    result, cache_status, age = await response_cache.get_or_compute(
+        response_cache_key(query, is_url, max_results),
+        lambda: run_search(query, is_url, max_results),
+        # URL results are expensive to rebuild, so serve them stale while refreshing
+        allow_stale=is_url,
+        cacheable=is_cacheable_response
+    )
+    RESPONSE_CACHE_LOOKUPS.inc(cache_status)
+    timings = current_timings()
+    if timings is not None:
+        timings.describe("cache", cache_status)
+    # The cache holds the ranked list and its cursor; each response gets the first page
+    result = await first_page(result, max_results)
+    if result.original_query != query:
+        result = result.model_copy(update={"original_query": query})
+    with span("encode"):
+        body, tag = render_search_response(result, result_fragments())
+    return conditional_json(request, body, tag, {"X-Cache": cache_status, "Age": str(int(age))})
+
+@app.get("/search/page", response_model=SearchResponse)
+async def search_page(
+    request: Request,
+    cursor: str = Query(..., description="next_cursor value from a previous /search or /search/page response"),
+    max_results: int = Query(5, description="Maximum number of results to return", ge=1, le=10)
+):
+    """
+    Return the next page of a previous search.
+    
+    Pages are slices of the ranked list kept server-side for CURSOR_TTL seconds after /search
+    last returned it; an expired cursor answers 410 and the search has to be repeated. Pages
+    carry an ETag like /search.
+    """
+    try:
+        cursor_id, offset = CursorStore.decode(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed cursor")
+    ranked = await result_cursors.get_async(cursor_id)
+    if ranked is None:
+        raise HTTPException(status_code=410, detail="Cursor expired; repeat the search")
+    end = offset + max_results
+    page = ranked.model_copy(update={
+        "results": ranked.results[offset:end],
+        "next_cursor": CursorStore.encode(cursor_id, end) if end < len(ranked.results) else None
+    })
+    body, tag = render_search_response(page, result_fragments())
+    return conditional_json(request, body, tag)
+
+def similar_filter(max_duration=None, languages=None, test_types=None, adaptive=None, facet_extractor=None):
+    """Chroma-style filter for similar assessments: OR within a facet, AND across facets (None for no filter).
+
+    Language names are resolved against the catalog labels as in queries, so "English" covers
+    "English (USA)" and "English International"."""
+    facets = []
+    if max_duration is not None:
+        # Unknown durations (stored as 0) cannot be shown to fit, as for search
+        facets.append({"duration": {"$gt": 0}})
+        facets.append({"duration": {"$lte": max_duration}})
+    if languages and facet_extractor is not None:
+        languages = list(dict.fromkeys(key for language in languages for key in facet_extractor.language_keys(language)))
+    for prefix, values in (('language_', languages), ('test_type_', test_types)):
+        if values:
+            conditions = [{prefix + value: True} for value in values]
+            facets.append(conditions[0] if len(conditions) == 1 else {"$or": conditions})
+    if adaptive is not None:
+        facets.append({"adaptive_irt": adaptive})
+    if not facets:
+        return None
+    return facets[0] if len(facets) == 1 else {"$and": facets}
+
+@app.get("/assessments/{assessment_id}/similar", response_model=SimilarResponse)
+async def similar_assessments(
+    request: Request,
+    assessment_id: str,
+    max_results: int = Query(5, description="Maximum number of similar assessments to return", ge=1, le=10),
+    max_duration: Optional[int] = Query(None, description="Only assessments of at most this many minutes", ge=1),
+    language: Optional[List[str]] = Query(None, description="Only assessments offered in one of these languages"),
+    test_type: Optional[List[str]] = Query(None, description="Only assessments with one of these test type codes (A, B, C, D, E, K, P, S)"),
+    adaptive: Optional[bool] = Query(None, description="Only adaptive (true) or non-adaptive (false) assessments")
+):
+    """
+    Alternatives to one assessment: the catalog entries most similar to it, optionally shorter,
+    in other languages, of other test types or adaptive.
+    
+    The id is the catalog slug, the last path segment of the assessment's URL. Neighbors come
+    from the graph precomputed with the serving artifact, filtered by the given facets, so no
+    query is embedded. Unknown ids answer 404; responses carry an ETag like /search.
+    """
+    def find_similar():
+        retriever = get_retriever(DEFAULT_PERSIST_DIRECTORY)
+        where = similar_filter(max_duration, language, test_type, adaptive, retriever.facet_extractor)
+        return retriever.similar(assessment_id, max_results, where)
+
+    with span("similar"):
+        try:
+            found = await run_blocking(find_similar, timeout=config.SEARCH_TIMEOUT)
+        except MatrixIndexUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"Unknown assessment: {assessment_id}")
+    document, hits = found
+    fragments = result_fragments()
+    assessment, assessment_digest = fragments.encode(to_assessment_result(document, fragments))
+    results, digests = fragments.encode_list([to_assessment_result(hit, fragments) for hit, _ in hits])
+    return conditional_json(request, b'{"assessment":' + assessment + b',"results":' + results + b'}',
+                            etag(assessment_digest + digests))
+
+def stream_line(event, data, fmt):
+    """Serialize one streamed event as an NDJSON line or an SSE message."""
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+@app.get("/search/stream")
+async def search_stream(
+    query: str = Query(..., description="Natural language query or job description URL"),
+    is_url: bool = Query(False, description="Whether the query is a URL to a job listing"),
+    max_results: int = Query(5, description="Maximum number of results to return", ge=1, le=10),
+    format: str = Query("ndjson", description="Stream format", pattern="^(ndjson|sse)$")
+):
+    """
+    Stream a search as it progresses so the resolved query can render before the hits.
+    
+    Events: "query" as soon as the search query is resolved (for URLs, after the page scrape
+    and query generation that dominate the latency), then one "result" per hit of the first
+    page and "done" with the next_cursor for the rest of the ranked list. A single search
+    SEARCH_DEPTH deep provides both the page and the cursor.
+    """
+    async def events():
+        search_query, url, error = await resolve_search_query(query, is_url)
+        if error is not None:
+            yield stream_line("done", error.model_dump(), format)
+            return
+        yield stream_line("query", {"search_query": search_query, "original_query": query,
+                                    "is_url": is_url, "job_description_url": url}, format)
+        try:
+            ranked = await run_blocking(search_assessments, search_query, DEFAULT_PERSIST_DIRECTORY,
+                                        max(max_results, config.SEARCH_DEPTH), timeout=config.SEARCH_TIMEOUT)
+        except asyncio.TimeoutError:
+            yield stream_line("error", {"detail": f"Error searching for assessments: timed out after {config.SEARCH_TIMEOUT}s"}, format)
+            return
+        except Exception as e:
+            yield stream_line("error", {"detail": f"Error searching for assessments: {str(e)}"}, format)
+            return
+        fragments = result_fragments()
+        response = await attach_cursor(SearchResponse(search_query=search_query, original_query=query, is_url=is_url,
+                                                      job_description_url=url,
+                                                      results=[to_assessment_result(result, fragments) for result in ranked]),
+                                       max_results)
+        for result in response.results[:max_results]:
+            yield stream_line("result", result.model_dump(), format)
+        yield stream_line("done", {"next_cursor": response.next_cursor}, format)
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+def batch_record(index, item, response=None, error=None):
+    """One line of batch output: the item's position and id with either its response or an error."""
+    record = {"index": index, "id": item.id if item is not None else None}
+    if error is not None:
+        record["error"] = error
     else:
-        # Use the query directly
-        url = None
-        search_query = query
+        record["response"] = response.model_dump()
+    return record
+
+async def run_batch(items, persist_directory=DEFAULT_PERSIST_DIRECTORY):
+    """
+    Run a batch of searches, yielding one record per item as soon as it completes.
+    
+    Text queries are scored together straight away. URL items are scraped and turned into
+    queries with at most BATCH_URL_CONCURRENCY in flight; whatever has resolved is then
+    scored as one micro-batch. A failing item produces an error record and never aborts
+    the rest of the batch.
+    """
+    semaphore = asyncio.Semaphore(config.BATCH_URL_CONCURRENCY)
+    
+    async def resolve(index, item):
+        async with semaphore:
+            return index, await resolve_search_query(item.query, item.is_url)
+    
+    ready = []
+    pending = set()
+    for index, item in enumerate(items):
+        if item.is_url:
+            pending.add(asyncio.ensure_future(resolve(index, item)))
+        else:
+            ready.append((index, item.query, None))
     
     try:
-        # Search for assessments using existing function
-        results = search_assessments(search_query, persist_directory="database/shl_vector_db")
-        
-        # Format results according to the response model
-        formatted_results = []
-        for result in results[:max_results]:  # Limit to max_results
-            # Extract test types
-            test_types = [t.replace('test_type_', '') for t in result.metadata 
-                         if t.startswith('test_type_') and result.metadata[t]]
-            
-            # Create AssessmentResult object
-            assessment = AssessmentResult(
-                name=result.metadata.get('name', 'N/A'),
-                url=result.metadata.get('url', 'N/A'),
-                description=result.page_content[:500],  # Limit description length
-                duration=float(result.metadata.get('duration', 0)),
-                test_types=test_types
-            )
-            formatted_results.append(assessment)
-        
-        # Return the response
-        return SearchResponse(
-            search_query=search_query,
-            original_query=query,
-            is_url=is_url,
-            job_description_url=url if is_url else None,
-            results=formatted_results
-        )
-        
-    except Exception as e:
-        # Return empty results with error message as search query
-        return SearchResponse(
-            search_query=f"Error searching for assessments: {str(e)}",
-            original_query=query,
-            is_url=is_url,
-            job_description_url=url if is_url else None,
-            results=[]
-        )
+        while ready or pending:
+            if ready:
+                queries = [search_query for _, search_query, _ in ready]
+                ks = [items[index].max_results for index, _, _ in ready]
+                try:
+                    results = await run_blocking(batch_search_assessments, queries, ks, persist_directory,
+                                                 timeout=config.SEARCH_TIMEOUT)
+                except asyncio.TimeoutError:
+                    results = f"Error searching for assessments: timed out after {config.SEARCH_TIMEOUT}s"
+                except Exception as e:
+                    results = f"Error searching for assessments: {str(e)}"
+                for position, (index, search_query, url) in enumerate(ready):
+                    item = items[index]
+                    if isinstance(results, str):
+                        yield batch_record(index, item, error=results)
+                        continue
+                    yield batch_record(index, item, SearchResponse(
+                        search_query=search_query,
+                        original_query=item.query,
+                        is_url=item.is_url,
+                        job_description_url=url,
+                        results=[to_assessment_result(result) for result in results[position]]
+                    ))
+                ready = []
+            if pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index, (search_query, url, error) = task.result()
+                    if error is not None:
+                        yield batch_record(index, items[index], error=error.search_query or "No URL found in query")
+                    else:
+                        ready.append((index, search_query, url))
+    finally:
+        # A client that disconnects mid-stream leaves nothing scraping in the background
+        for task in pending:
+            task.cancel()
+
+@app.post("/search/batch")
+async def search_batch(request: BatchRequest):
+    """
+    Search for many queries or job description URLs in one request.
+    
+    Results stream back as NDJSON, one line per item in completion order; each line carries
+    the item's index and id with either a "response" (as /search returns) or an "error".
+    """
+    if len(request.items) > config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"A batch holds at most {config.BATCH_MAX_ITEMS} items")
+    
+    async def lines():
+        async for record in run_batch(request.items):
+            yield json.dumps(record) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def read_batch_file(path):
+    """Parse a JSONL batch file into BatchItems; unreadable lines become error records instead."""
+    items, errors = [], []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                items.append(BatchItem(**data) if isinstance(data, dict) else BatchItem(query=str(data)))
+            except (ValueError, ValidationError) as e:
+                errors.append({"index": None, "id": None, "line": line_number, "error": f"Invalid batch item: {e}"})
+    return items, errors
+
+async def run_batch_file(path, output, persist_directory=DEFAULT_PERSIST_DIRECTORY):
+    """Run a JSONL batch file, writing each result line to output as it completes."""
+    items, errors = read_batch_file(path)
+    for record in errors:
+        output.write(json.dumps(record) + "\n")
+    async for record in run_batch(items, persist_directory):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+    await close_http_client()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the response and query-embedding caches."""
+    retriever_status = get_retriever(DEFAULT_PERSIST_DIRECTORY).status()
+    return {
+        "response_cache": response_cache.stats(),
+        "embedding_cache": retriever_status["embedding_cache"],
+        "page_cache": page_cache.stats(),
+        "query_cache": query_cache.stats(),
+        "result_cursors": result_cursors.stats(),
+    }
+
+def cache_metrics():
+    """Cache hit/miss totals, read from the caches' own counters at scrape time, and circuit breaker state."""
+    caches = {
+        "response": response_cache.stats(),
+        "page": page_cache.stats(),
+        "query": query_cache.stats(),
+        "embedding": get_retriever(DEFAULT_PERSIST_DIRECTORY).status()["embedding_cache"],
+    }
+    hits, misses = [], []
+    for name, stats in caches.items():
+        if not stats:
+            continue
+        # Persistent and shared caches count SQLite hits separately from in-memory ones; all are hits
+        persistent = stats.get("persistent_hits", 0) + stats.get("shared_hits", 0)
+        labels = {"cache": name}
+        hits.append(("assessment_cache_hits_total", labels, stats["hits"] + persistent))
+        misses.append(("assessment_cache_misses_total", labels, stats["misses"] - persistent))
+    breakers = [("assessment_fetch_circuit_open", {"host": host}, 1 if state["state"] != "closed" else 0)
+                for host, state in fetcher_stats()["hosts"].items()]
+    return [
+        ("assessment_cache_hits", "counter", "Cache lookups answered from the cache", hits),
+        ("assessment_cache_misses", "counter", "Cache lookups that had to compute the value", misses),
+        ("assessment_fetch_circuit_open", "gauge", "1 while a job-board host's circuit breaker is not closed", breakers),
+    ]
+
+def cache_hit_ratios(families):
+    """Hit ratio per cache, from the hit and miss totals (summed across workers when shared)"""
+    def totals(name):
+        return {labels["cache"]: value for _, labels, value in families[name][3]} if name in families else {}
+    misses = totals("assessment_cache_misses")
+    ratios = []
+    for name, hit in totals("assessment_cache_hits").items():
+        lookups = hit + misses.get(name, 0)
+        ratios.append(("assessment_cache_hit_ratio", {"cache": name}, hit / lookups if lookups else 0.0))
+    return [("assessment_cache_hit_ratio", "gauge", "Share of cache lookups answered from the cache", ratios)]
+
+REGISTRY.add_collector(cache_metrics)
+REGISTRY.add_derived(cache_hit_ratios)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms and error counts, request counts and latency
+    by route, results per search, cache hit ratios and circuit breaker state.
+    
+    With SHARED_CACHE_PATH every worker process writes its metrics there, so whichever worker answers
+    the scrape reports the totals of all of them (see metrics.SharedSnapshots)."""
+    # Shared metrics are read from SQLite, so render off the event loop
+    return PlainTextResponse(await asyncio.to_thread(REGISTRY.render), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/fetcher/stats")
+async def fetch_stats():
+    """Connection pool occupancy and per-host limiter and circuit breaker state for job-page fetching."""
+    return fetcher_stats()
 
 def main():
     """Main function to handle command line arguments and run the program."""
@@ -645,15 +1078,51 @@ def main():
     parser = argparse.ArgumentParser(description='Assessment Recommendation System')
     parser.add_argument('--prepare', type=str, help='Path to CSV file to prepare data pipeline')
     parser.add_argument('--query', type=str, help='Query string for assessment search')
-    parser.add_argument('--db_path', type=str, default="database/shl_vector_db", 
+    parser.add_argument('--db_path', type=str, default=DEFAULT_PERSIST_DIRECTORY, 
                       help='Path to the vector database directory')
-    parser.add_argument('--api', action='store_true', help='Run as FastAPI server')
+    parser.add_argument('--api', action='store_true', help='Run as FastAPI server (development: one process, auto-reload)')
+    parser.add_argument('--serve', action='store_true',
+                      help='Run the FastAPI server for production: --workers processes sharing the mapped index, no reload')
+    parser.add_argument('--workers', type=int, default=config.SERVE_WORKERS,
+                      help='Worker processes for --serve (default: SERVE_WORKERS, else 1)')
+    parser.add_argument('--host', type=str, default=config.SERVE_HOST, help='Address --serve binds to')
+    parser.add_argument('--port', type=int, default=config.SERVE_PORT, help='Port --serve listens on')
+    parser.add_argument('--export-index', action='store_true',
+                      help='Export the NumPy, lexical and serving-artifact indexes from an existing vector database')
+    parser.add_argument('--provider', type=str, default=config.EMBEDDING_PROVIDER,
+                      help=f"Embedding provider ({', '.join(EMBEDDING_PROVIDERS)}); --reindex also accepts 'all'")
+    parser.add_argument('--reindex', type=str,
+                      help='Path to CSV file to build a separate collection for the --provider embedding provider(s)')
+    parser.add_argument('--batch', type=str,
+                      help='Path to a JSONL file of queries ({"query": ..., "is_url": ..., "id": ...} per line)')
+    parser.add_argument('--output', type=str, help='Where to write batch results as JSONL (default: stdout)')
     
     args = parser.parse_args()
+    if args.provider != 'all':
+        # Retrievers created from here on (queries, interactive mode) use the chosen provider's collection
+        config.EMBEDDING_PROVIDER = args.provider
     
     if args.prepare:
         # Prepare data pipeline
-        prepare_data_pipeline(args.prepare, args.db_path)
+        prepare_data_pipeline(args.prepare, args.db_path, args.provider)
+    elif args.reindex:
+        reindex(args.reindex, args.db_path,
+                None if args.provider == 'all' else [p.strip() for p in args.provider.split(',')])
+    elif args.export_index:
+        from pipeline import export_lexical_index, export_numpy_index, export_serving_artifact
+        store_directory = provider_directory(args.db_path, args.provider)
+        export_numpy_index(store_directory)
+        export_lexical_index(store_directory)
+        export_serving_artifact(store_directory)
+    elif args.batch:
+        # Batch mode: results are written as JSONL lines as they complete
+        import sys
+        output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            asyncio.run(run_batch_file(args.batch, output, args.db_path))
+        finally:
+            if args.output:
+                output.close()
     elif args.query:
         # Process user query
         result = process_user_query(args.query, args.db_path)
@@ -662,6 +1131,24 @@ def main():
         # Run as FastAPI server
         print("Starting FastAPI server...")
         uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    elif args.serve:
+        # The store and provider chosen here reach the workers only through the environment: this
+        # process is replaced by a fresh uvicorn, so even a single worker imports config anew
+        import sys
+        os.environ["PERSIST_DIRECTORY"] = args.db_path
+        os.environ["EMBEDDING_PROVIDER"] = config.EMBEDDING_PROVIDER
+        if args.workers > 1 and not config.SHARED_CACHE_PATH:
+            # Workers only see each other's cached responses, cursors and metrics through this file
+            os.environ["SHARED_CACHE_PATH"] = config.DEFAULT_SHARED_CACHE_PATH
+        if config.RETRIEVAL_BACKEND != "numpy" and args.workers > 1:
+            print("Note: only the numpy backend maps one shared serving artifact; "
+                  "each worker opens its own Chroma client")
+        print(f"Starting FastAPI server with {args.workers} worker(s) on {args.host}:{args.port}...", flush=True)
+        os.execv(sys.executable, [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+            "--host", args.host, "--port", str(args.port), "--workers", str(args.workers),
+        ])
     else:
         # Interactive mode
         print("Assessment Recommendation System")
@@ -0,0 +1,386 @@
+import bisect
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds: sub-millisecond index lookups up to LLM calls and slow job boards
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RESULT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Sample = Tuple[str, Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric family with a fixed set of label names"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labelvalues: Sequence[str]) -> Tuple[str, ...]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labelvalues)}")
+        return tuple(str(value) for value in labelvalues)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonic count per label set; exposed with the conventional _total suffix"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(self._key(labelvalues), 0.0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(f"{self.name}_total", dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram with a sum and count per label set, as Prometheus expects"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        key = self._key(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, *labelvalues: str) -> int:
+        entry = self._values.get(self._key(labelvalues))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        samples: List[Sample] = []
+        for key, (counts, total) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class SharedSnapshots:
+    """Latest metric families of every process serving from the same SQLite file.
+
+    Each process overwrites its own row with its full snapshot, so writes are idempotent and a
+    scrape sums rows rather than replaying increments. Rows carry a run id (by default the parent
+    process, i.e. the uvicorn supervisor shared by its workers); rows of other runs are dropped when
+    a process joins, so totals start afresh with each deployment but outlive a restarted worker.
+    """
+
+    def __init__(self, path: str, process_id: Optional[str] = None, run_id: Optional[str] = None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.process_id = process_id or str(os.getpid())
+        self.run_id = run_id or str(os.getppid())
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS metrics (run TEXT NOT NULL, process TEXT NOT NULL, "
+            "families TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (run, process))"
+        )
+        self._conn.execute("DELETE FROM metrics WHERE run != ?", (self.run_id,))
+
+    def write(self, families: List[Family]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metrics (run, process, families, updated_at) VALUES (?, ?, ?, ?)",
+                (self.run_id, self.process_id, json.dumps(families), time.time())
+            )
+
+    def read(self) -> List[Tuple[List[Family], float]]:
+        """(families, seconds since written) for every process of this run"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT families, updated_at FROM metrics WHERE run = ? ORDER BY process", (self.run_id,)
+            ).fetchall()
+        now = time.time()
+        return [(json.loads(families), now - updated_at) for families, updated_at in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def merge_families(snapshots: List[Tuple[List[Family], float]], gauge_max_age: float) -> List[Family]:
+    """Combine per-process families: counter and histogram samples are summed (cumulative buckets
+    add up bucket by bucket), gauges take the largest value among processes that wrote within
+    gauge_max_age seconds, since an exited worker's gauges no longer describe anything."""
+    merged: Dict[str, Tuple[str, str, Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Sample]]] = {}
+    for families, age in snapshots:
+        for name, kind, documentation, samples in families:
+            if kind == "gauge" and age > gauge_max_age:
+                continue
+            _, _, values = merged.setdefault(name, (kind, documentation, {}))
+            for sample, labels, value in samples:
+                key = (sample, tuple(labels.items()))
+                previous = values.get(key)
+                if previous is None:
+                    values[key] = (sample, labels, value)
+                elif kind == "gauge":
+                    values[key] = (sample, labels, max(previous[2], value))
+                else:
+                    values[key] = (sample, labels, previous[2] + value)
+    return [(name, kind, documentation, list(values.values()))
+            for name, (kind, documentation, values) in merged.items()]
+
+
+class Registry:
+    """Metric families plus collectors that report values read at scrape time (cache stats).
+
+    Derived collectors run after the families are gathered (and, when shared, summed across
+    processes) and compute families from them, e.g. ratios that cannot be summed themselves.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], List[Family]]] = []
+        self._derived: List[Callable[[Dict[str, Family]], List[Family]]] = []
+        self._lock = threading.Lock()
+        self._shared: Optional[SharedSnapshots] = None
+        self._flush_interval = 0.0
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], List[Family]]):
+        """`collector()` returns (name, type, help, samples) families, evaluated on every scrape"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def add_derived(self, collector: Callable[[Dict[str, Family]], List[Family]]):
+        """`collector(families_by_name)` returns families computed from the gathered ones"""
+        with self._lock:
+            self._derived.append(collector)
+
+    def collect(self) -> List[Family]:
+        """This process's own families"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        families = [(m.name, m.type, m.documentation, m.samples()) for m in metrics]
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def share(self, path: str, flush_interval: float = 5.0, process_id: Optional[str] = None,
+              run_id: Optional[str] = None):
+        """Aggregate across processes: write this process's snapshot to the SQLite file at `path`
+        every flush_interval seconds (and on every scrape it answers), and render the sum of all
+        processes' snapshots, so any worker answers a scrape with the same totals."""
+        self._shared = SharedSnapshots(path, process_id, run_id)
+        self._flush_interval = flush_interval
+        self._stop.clear()
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._shared is not None:
+            self._shared.write(self.collect())
+
+    def unshare(self):
+        """Write a final snapshot and stop sharing, used at shutdown"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        if self._shared is not None:
+            self.flush()
+            self._shared.close()
+            self._shared = None
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        if self._shared is None:
+            families = self.collect()
+        else:
+            self.flush()
+            # A live worker writes at least every flush interval; allow a few missed flushes
+            families = merge_families(self._shared.read(), gauge_max_age=max(3 * self._flush_interval, 1.0))
+        with self._lock:
+            derived = list(self._derived)
+        by_name = {family[0]: family for family in families}
+        for collector in derived:
+            families.extend(collector(by_name))
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{sample}{_format_labels(labels)} {_format_value(value)}"
+                         for sample, labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "assessment_stage_duration_seconds", "Time spent in each stage of the search pipeline", ("stage",))
+STAGE_ERRORS = REGISTRY.counter(
+    "assessment_stage_errors", "Search pipeline stages that failed", ("stage",))
+REQUESTS = REGISTRY.counter(
+    "assessment_http_requests", "HTTP requests by route and status code", ("method", "route", "status"))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "assessment_http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+SEARCH_RESULTS = REGISTRY.histogram(
+    "assessment_search_results", "Ranked results returned per search", buckets=RESULT_COUNT_BUCKETS)
+RESPONSE_CACHE_LOOKUPS = REGISTRY.counter(
+    "assessment_response_cache_lookups", "/search response cache outcomes (HIT, STALE, COALESCED, MISS)",
+    ("status",))
+
+
+class RequestTimings:
+    """Stage durations of one request, in order of first occurrence, for the Server-Timing header.
+
+    Stages may also carry a description only (the response cache status), sent without a duration.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.descriptions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def describe(self, stage: str, description: str):
+        with self._lock:
+            self.descriptions[stage] = description
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: each stage's duration in ms, then the total so far"""
+        with self._lock:
+            entries = list(self.stages.items())
+            descriptions = dict(self.descriptions)
+        entries.append(("total", time.perf_counter() - self.start))
+        parts = [f'{stage};desc="{description}"' for stage, description in descriptions.items()
+                 if stage not in self.stages]
+        for stage, seconds in entries:
+            desc = f';desc="{descriptions[stage]}"' if stage in descriptions else ""
+            parts.append(f"{stage}{desc};dur={seconds * 1000:.3f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def request_timings() -> Iterator[RequestTimings]:
+    """Collect the stage timings recorded in this context (and tasks and worker calls started from it)"""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage)
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def record_error(stage: str):
+    STAGE_ERRORS.inc(stage)
+
+
+def record_stages(timings_ms: Dict[str, float], prefix: str = ""):
+    """Record stage timings measured elsewhere (the retriever's plan), given in milliseconds"""
+    for stage, ms in timings_ms.items():
+        if stage != "total":
+            record_stage(prefix + stage, ms / 1000)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a stage into the stage histogram and the current request's timings; an exception
+    leaving the block counts as an error of the stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        record_error(stage)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - start)
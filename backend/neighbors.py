@@ -0,0 +1,54 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class NeighborGraph:
+    """Each catalog row's `depth` most similar other rows, best first.
+
+    Neighbors are int32 row numbers and scores float16 cosine similarities, one fixed-width
+    row per document. The graph is built from the stored embeddings when the serving
+    artifact is written, so similar-item lookups never embed anything.
+    """
+
+    def __init__(self, neighbors: np.ndarray, scores: np.ndarray):
+        self.neighbors = neighbors
+        self.scores = scores
+
+    @property
+    def depth(self) -> int:
+        return self.neighbors.shape[1] if self.neighbors.ndim == 2 else 0
+
+    def __len__(self):
+        return len(self.neighbors)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, depth: int, block_size: int = 1024) -> "NeighborGraph":
+        """Exact top-`depth` neighbors of every row of a normalized matrix, a block of rows at a time"""
+        n = len(vectors)
+        depth = max(0, min(depth, n - 1))
+        neighbors = np.zeros((n, depth), dtype=np.int32)
+        scores = np.zeros((n, depth), dtype=np.float16)
+        if depth == 0:
+            return cls(neighbors, scores)
+        for start in range(0, n, block_size):
+            block = vectors[start:start + block_size] @ vectors.T
+            rows = np.arange(start, start + len(block))
+            # A document is not its own neighbor
+            block[rows - start, rows] = -np.inf
+            top = np.argpartition(-block, depth - 1, axis=1)[:, :depth]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            neighbors[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
+        return cls(neighbors, scores)
+
+    def similar(self, row: int, k: int, candidates: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Up to k neighbors of a row, keeping only rows set in a FilterIndex bitset when given"""
+        hits = []
+        for neighbor, score in zip(self.neighbors[row].tolist(), self.scores[row].tolist()):
+            if candidates is None or candidates >> neighbor & 1:
+                hits.append((neighbor, score))
+                if len(hits) == k:
+                    break
+        return hits
@@ -0,0 +1,108 @@
+"""Offline ingestion: CSV catalog -> vector store -> serving indexes.
+
+Kept apart from main.py so the serving path (API workers, --query) never imports pandas,
+Chroma or the ingestion code; main.py imports this module only when a pipeline command runs.
+"""
+import os
+
+import pandas as pd
+from langchain_chroma import Chroma
+
+import config
+from embedding_providers import EMBEDDING_MODEL, create_embeddings, provider_directory
+from ingestion import IngestReport, checkpoint_path, parse_list_columns, prepare_documents, sync_vector_store
+from retriever import lexical_index_path, numpy_index_path
+from serving_artifact import artifact_path
+
+
+def sync_catalog(df_path, persist_directory, provider=None):
+    """Sync the provider's vector store with the CSV catalog, embedding only new or changed rows,
+    and export the serving indexes. Returns (vector_store, report).
+
+    Each embedding provider has its own collection under a directory derived from persist_directory.
+    """
+    report = IngestReport()
+    provider = provider or config.EMBEDDING_PROVIDER
+    store_directory = provider_directory(persist_directory, provider)
+
+    # Load the dataframe
+    print(f"Loading data from {df_path}...")
+    with report.stage("load"):
+        df = pd.read_csv(df_path)
+
+    # Parse list fields once per distinct value
+    print("Cleaning list fields...")
+    with report.stage("parse"):
+        df = parse_list_columns(df)
+
+    # Report unique values
+    for col, label in (('job_levels', 'job levels'), ('languages', 'languages'), ('test_type', 'test types')):
+        print(f"Found {df[col].explode().dropna().nunique()} unique {label}")
+
+    # Prepare documents
+    print("Preparing documents...")
+    with report.stage("documents"):
+        documents = prepare_documents(df)
+    print(f"Created {len(documents)} documents")
+
+    # Embed and upsert only what changed since the last run
+    print(f"Syncing {provider} vector store...")
+    with report.stage("open"):
+        # Local embedders are (re)fitted on the catalog documents here
+        embeddings, model = create_embeddings(provider, store_directory,
+                                              fit_texts=[document.page_content for document in documents])
+        vector_store = Chroma(persist_directory=store_directory, embedding_function=embeddings)
+    # Remote embedding is checkpointed so a failed run resumes; local embedding is cheap to redo
+    sync_vector_store(vector_store, documents, embeddings, model, report,
+                      checkpoint_dir=checkpoint_path(store_directory) if provider == "google" else None)
+
+    print(f"Vector store persisted to {store_directory}")
+
+    # Export the stored embeddings for the in-process NumPy backend and the BM25 keyword index,
+    # then pack both into the single-file serving artifact
+    if report.changed or not os.path.isdir(numpy_index_path(store_directory)):
+        with report.stage("export"):
+            export_numpy_index(store_directory, vector_store, model)
+    if report.changed or not os.path.exists(lexical_index_path(store_directory)):
+        with report.stage("lexical"):
+            export_lexical_index(store_directory, vector_store)
+    if report.changed or not os.path.exists(artifact_path(numpy_index_path(store_directory))):
+        with report.stage("artifact"):
+            export_serving_artifact(store_directory)
+    print(report.summary())
+    return vector_store, report
+
+
+def export_numpy_index(persist_directory, vector_store=None, model=EMBEDDING_MODEL):
+    """Write the NumPy retrieval index from the embeddings already stored in Chroma."""
+    from vector_index import NumpyIndex
+
+    if vector_store is None:
+        # Reading stored embeddings needs no embedding client
+        vector_store = Chroma(persist_directory=persist_directory)
+    index_path = numpy_index_path(persist_directory)
+    index = NumpyIndex.from_chroma(vector_store, index_path, model=model)
+    print(f"NumPy index with {len(index)} vectors written to {index_path}")
+    return index
+
+
+def export_lexical_index(persist_directory, vector_store=None):
+    """Build the BM25 index over the stored documents' search keywords, in the store's row order."""
+    from lexical import LexicalIndex
+
+    if vector_store is None:
+        vector_store = Chroma(persist_directory=persist_directory)
+    index = LexicalIndex.from_metadatas(vector_store.get(include=["metadatas"])["metadatas"])
+    path = lexical_index_path(persist_directory)
+    index.save(path)
+    print(f"Lexical index over {len(index)} documents written to {path}")
+    return index
+
+
+def export_serving_artifact(persist_directory):
+    """Pack the exported NumPy and lexical indexes into the serving artifact that workers mmap."""
+    from vector_index import write_serving_artifact
+
+    path = write_serving_artifact(numpy_index_path(persist_directory), lexical_index_path(persist_directory))
+    print(f"Serving artifact ({os.path.getsize(path) / 2 ** 20:.1f} MiB) written to {path}")
+    return path
@@ -0,0 +1,140 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import config
+from filter_index import FilterIndex
+
+UNFILTERED = "unfiltered"
+PREFILTER = "prefilter"
+POSTFILTER = "postfilter"
+EMPTY = "empty"
+# Short keyword queries answered from the BM25 index alone, without embedding the query
+LEXICAL = "lexical"
+
+
+@dataclass
+class SearchPlan:
+    """How one filtered vector search is executed"""
+    strategy: str
+    k: int
+    fetch_k: int
+    candidates: Optional[int] = None
+    candidate_count: int = 0
+    selectivity: float = 1.0
+    fallback: bool = False
+    hybrid: bool = False
+    reranked: bool = False
+    rerank_skipped: bool = False
+    # The filter the plan applies, and the facet conditions dropped to relax one nothing matched
+    where: Optional[Dict[str, Any]] = None
+    relaxed: List[Dict[str, Any]] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def expected_results(self) -> int:
+        """Hits the search must return: k, or every candidate when fewer match"""
+        if self.strategy == UNFILTERED:
+            return self.k
+        return min(self.k, self.candidate_count)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "k": self.k,
+            "fetch_k": self.fetch_k,
+            "candidate_count": self.candidate_count,
+            "selectivity": round(self.selectivity, 4),
+            "fallback": self.fallback,
+            "hybrid": self.hybrid,
+            "reranked": self.reranked,
+            "rerank_skipped": self.rerank_skipped,
+            "relaxed": list(self.relaxed),
+            "timings_ms": dict(self.timings),
+        }
+
+
+def split_facets(where: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The ANDed facet conditions of a filter; the two bounds of a duration range stay one facet"""
+    clauses = where["$and"] if set(where) == {"$and"} else [{key: value} for key, value in where.items()]
+    facets, durations = [], []
+    for clause in clauses:
+        if set(clause) == {"duration"}:
+            if not durations:
+                facets.append(None)
+            durations.append(clause)
+        else:
+            facets.append(clause)
+    duration = durations[0] if len(durations) == 1 else {"$and": durations}
+    return [duration if clause is None else clause for clause in facets]
+
+
+def join_facets(facets: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not facets:
+        return None
+    return facets[0] if len(facets) == 1 else {"$and": facets}
+
+
+def relax_filter(filter_index: FilterIndex, where: Dict[str, Any]):
+    """Drop facets from a filter nothing matches until something does.
+
+    Facets are dropped least selective first (the one matching the most documents on its own
+    says the least about what was asked for), skipping ahead to the first whose removal alone
+    is enough. Returns (relaxed filter or None, candidate bitset, dropped facets).
+    """
+    facets = split_facets(where)
+    dropped = []
+    while facets:
+        by_breadth = sorted(facets, key=lambda facet: filter_index.count(filter_index.evaluate(facet)),
+                            reverse=True)
+        for facet in by_breadth:
+            rest = [other for other in facets if other is not facet]
+            candidates = filter_index.evaluate(join_facets(rest))
+            if candidates:
+                return join_facets(rest), candidates, dropped + [facet]
+        facets = [other for other in facets if other is not by_breadth[0]]
+        dropped.append(by_breadth[0])
+    return None, filter_index.all, dropped
+
+
+def plan_search(filter_index: FilterIndex, where: Optional[Dict[str, Any]], k: int,
+                min_postfilter_selectivity: Optional[float] = None,
+                overfetch: Optional[float] = None) -> SearchPlan:
+    """Choose between restricting the vector search to the candidates and over-fetching then filtering.
+
+    Selectivity is the exact candidate count from the bitset index over the catalog size.
+    Broad filters (selectivity >= min_postfilter_selectivity) are cheaper to post-filter:
+    fetching k / selectivity * overfetch unfiltered hits almost always yields k matches.
+    Narrow filters go to the backend as a candidate restriction. Post-filtering needs
+    assessment ids to test membership, so stores without them always pre-filter.
+
+    An over-constrained filter that no document matches is relaxed (see relax_filter()) so the
+    closest assessments still come back; plan.where is the filter actually applied and
+    plan.relaxed lists the facets dropped. Only an empty catalog plans EMPTY.
+    """
+    if min_postfilter_selectivity is None:
+        min_postfilter_selectivity = config.PLANNER_POSTFILTER_MIN_SELECTIVITY
+    if overfetch is None:
+        overfetch = config.PLANNER_OVERFETCH
+    size = max(filter_index.size, 1)
+    if not where:
+        return SearchPlan(UNFILTERED, k, fetch_k=k)
+
+    candidates = filter_index.evaluate(where)
+    relaxed = []
+    if candidates == 0 and filter_index.size:
+        where, candidates, relaxed = relax_filter(filter_index, where)
+    count = filter_index.count(candidates)
+    selectivity = count / size
+    if count == 0:
+        return SearchPlan(EMPTY, k, fetch_k=0, candidates=0, candidate_count=0, selectivity=0.0,
+                          where=where, relaxed=relaxed)
+    if count == filter_index.size:
+        return SearchPlan(UNFILTERED, k, fetch_k=k, candidate_count=count, selectivity=1.0,
+                          where=where, relaxed=relaxed)
+    if selectivity >= min_postfilter_selectivity and filter_index.has_ids:
+        fetch_k = min(filter_index.size, math.ceil(k / selectivity * overfetch))
+        return SearchPlan(POSTFILTER, k, fetch_k=fetch_k, candidates=candidates,
+                          candidate_count=count, selectivity=selectivity, where=where, relaxed=relaxed)
+    return SearchPlan(PREFILTER, k, fetch_k=min(k, count), candidates=candidates,
+                      candidate_count=count, selectivity=selectivity, where=where, relaxed=relaxed)
@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+import config
+from facets import QueryFacets
+from filter_index import FilterIndex
+from lexical import LexicalIndex, STOPWORDS, keyword_text, tokenize
+
+FEATURES = ("rank", "facets", "duration", "lexical")
+
+
+def default_weights() -> Dict[str, float]:
+    return {
+        "rank": config.RERANK_WEIGHT_RANK,
+        "facets": config.RERANK_WEIGHT_FACETS,
+        "duration": config.RERANK_WEIGHT_DURATION,
+        "lexical": config.RERANK_WEIGHT_LEXICAL,
+    }
+
+
+def _facet_clauses(facets: QueryFacets) -> List[dict]:
+    # Each value the query asked for counts on its own, so a document matching two of the
+    # requested job levels or test categories outranks one matching only the required one
+    clauses = []
+    for condition in facets.facet_filters(include_duration=False):
+        clauses.extend(condition["$or"] if "$or" in condition else [condition])
+    return clauses
+
+
+class Reranker:
+    """Second-stage scoring of an over-fetched candidate list, in one vectorized pass.
+
+    Each candidate gets four features in [0, 1]:
+      rank      first-stage position (1 for the top hit, falling linearly)
+      facets    share of the requested facet values (job levels, languages, categories,
+                remote, adaptive) the assessment has
+      duration  fit to a stated time limit: the longer the test while still within it, the better
+      lexical   share of the query's words found in the assessment's keywords
+    and the final score is their weighted sum.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = np.array([(weights or default_weights())[name] for name in FEATURES], dtype=np.float64)
+
+    def features(self, hits: List[Tuple[Document, float]], query: str, facets: QueryFacets,
+                 filter_index: FilterIndex, lexical_index: LexicalIndex) -> np.ndarray:
+        n = len(hits)
+        matrix = np.zeros((n, len(FEATURES)), dtype=np.float64)
+        matrix[:, 0] = 1.0 - np.arange(n) / max(n, 1)
+
+        rows = [filter_index.row(doc.metadata.get('assessment_id')) for doc, _ in hits]
+        clauses = _facet_clauses(facets)
+        if clauses:
+            bitsets = [filter_index.evaluate(clause) for clause in clauses]
+            matrix[:, 1] = [0.0 if row is None else sum(bits >> row & 1 for bits in bitsets) / len(bitsets)
+                            for row in rows]
+
+        if facets.max_duration:
+            durations = np.array([float(doc.metadata.get('duration') or 0) for doc, _ in hits])
+            fit = 1.0 - np.abs(facets.max_duration - durations) / facets.max_duration
+            matrix[:, 2] = np.where(durations > 0, np.clip(fit, 0.0, 1.0), 0.0)
+
+        query_terms = {t for t in tokenize(query) if '_' not in t and t not in STOPWORDS}
+        if query_terms:
+            overlap = []
+            for (doc, _), row in zip(hits, rows):
+                terms = lexical_index.terms(row) if row is not None and row < len(lexical_index) else \
+                    {t for t in tokenize(keyword_text(doc.metadata)) if '_' not in t}
+                overlap.append(len(query_terms & terms) / len(query_terms))
+            matrix[:, 3] = overlap
+        return matrix
+
+    def rerank(self, hits: List[Tuple[Document, float]], query: str, facets: QueryFacets,
+               filter_index: FilterIndex, lexical_index: LexicalIndex, k: int) -> List[Tuple[Document, float]]:
+        """Top-k of hits by the weighted feature score, best first, ties kept in first-stage order"""
+        if not hits:
+            return []
+        scores = self.features(hits, query, facets, filter_index, lexical_index) @ self.weights
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(hits[i][0], float(scores[i])) for i in order]
@@ -0,0 +1,535 @@
+import os
+import threading
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+import config
+from caching import CachedEmbeddings
+from embedding_providers import EMBEDDING_MODEL, EMBEDDING_PROVIDERS, create_embeddings, provider_directory
+from facets import FacetExtractor, QueryFacets
+from filter_index import FilterIndex
+from keyphrases import KeyphraseExtractor
+from lexical import LexicalIndex, document_key, reciprocal_rank_fusion
+from planner import EMPTY, LEXICAL, POSTFILTER, UNFILTERED, SearchPlan, plan_search
+from reranker import Reranker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERSIST_DIRECTORY = config.PERSIST_DIRECTORY
+RETRIEVAL_BACKENDS = ("chroma", "numpy")
+
+
+def directory_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Summarize a directory tree as (file count, total size, newest mtime) to detect changes on disk"""
+    if not os.path.isdir(path):
+        return None
+    count, size, newest = 0, 0, 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            count += 1
+            size += stat.st_size
+            newest = max(newest, stat.st_mtime_ns)
+    return count, size, newest
+
+
+def numpy_index_path(persist_directory: str) -> str:
+    """Directory of the NumPy index exported next to a Chroma persist directory"""
+    return config.NUMPY_INDEX_PATH or os.path.normpath(persist_directory) + "_numpy"
+
+
+def lexical_index_path(persist_directory: str) -> str:
+    """BM25 index file written next to a Chroma persist directory at ingestion time"""
+    return config.LEXICAL_INDEX_PATH or os.path.normpath(persist_directory) + "_lexical.json"
+
+
+def _record_stage(plan: SearchPlan, stage: str, since: float) -> float:
+    """Add the milliseconds since `since` to a stage timing on the plan; returns now"""
+    now = time.perf_counter()
+    plan.timings[stage] = round(plan.timings.get(stage, 0.0) + (now - since) * 1000, 3)
+    return now
+
+
+class MatrixIndexUnavailable(RuntimeError):
+    """The Chroma backend will not load an in-memory matrix copy of this collection"""
+
+
+class ChromaBackend:
+    """Retrieval backend over the persisted Chroma collection"""
+
+    name = "chroma"
+
+    def __init__(self, persist_directory: str, embeddings, lexical_path: Optional[str] = None):
+        # chromadb is slow to import; deployments serving from the NumPy index never load it
+        from langchain_chroma import Chroma
+        self.vector_store = Chroma(
+            persist_directory=persist_directory,
+            embedding_function=embeddings
+        )
+        data = self.vector_store.get(include=["metadatas", "documents"])
+        self.page_contents = data["documents"]
+        self.metadatas = data["metadatas"]
+        self.filter_index = FilterIndex.from_metadatas(self.metadatas)
+        self.facet_extractor = FacetExtractor.from_filter_index(self.filter_index)
+        self.lexical_index = LexicalIndex.load_or_build(lexical_path, self.metadatas)
+        self.keyphrase_extractor = KeyphraseExtractor.from_catalog(self.lexical_index, self.metadatas)
+        self._matrix_index = None
+        self._neighbor_graph = None
+
+    def document(self, row: int) -> Document:
+        return Document(page_content=self.page_contents[row], metadata=self.metadatas[row])
+
+    @property
+    def matrix_index(self):
+        """In-memory NumPy copy of the collection and a filter index aligned with its rows, for similar().
+
+        This is a second copy of every vector next to Chroma's own, held for the life of the
+        process, so collections above CHROMA_MATRIX_MAX_DOCUMENTS are refused; serve those with
+        RETRIEVAL_BACKEND=numpy, which maps one shared copy from the serving artifact.
+        """
+        if self._matrix_index is None:
+            if len(self.metadatas) > config.CHROMA_MATRIX_MAX_DOCUMENTS:
+                raise MatrixIndexUnavailable(
+                    f"{len(self.metadatas)} documents exceed CHROMA_MATRIX_MAX_DOCUMENTS="
+                    f"{config.CHROMA_MATRIX_MAX_DOCUMENTS}; use RETRIEVAL_BACKEND=numpy")
+            from vector_index import NumpyIndex
+            index = NumpyIndex.from_vector_store(self.vector_store)
+            self._matrix_index = (index, FilterIndex.from_metadatas(index.metadatas))
+        return self._matrix_index
+
+    @property
+    def neighbor_graph(self):
+        """Item-to-item neighbors aligned with matrix_index, built from the stored embeddings on first use"""
+        if self._neighbor_graph is None:
+            from neighbors import NeighborGraph
+            index, _ = self.matrix_index
+            self._neighbor_graph = NeighborGraph.build(index.vectors, config.KNN_NEIGHBORS)
+        return self._neighbor_graph
+
+    def _where(self, filter: Optional[Dict[str, Any]], candidates: Optional[int]):
+        # Stores written with compact metadata are filtered by candidate id; older stores
+        # still carry the per-value flag keys, so their filter is passed through unchanged
+        if candidates is None or not self.filter_index.has_ids:
+            return filter
+        ids = [self.filter_index.ids[row] for row in self.filter_index.rows(candidates)]
+        return {"assessment_id": {"$in": ids}}
+
+    def similarity_search_by_vector(self, vector, k: int = 5, filter: Optional[Dict[str, Any]] = None,
+                                    candidates: Optional[int] = None) -> List[Tuple[Document, float]]:
+        return self.vector_store.similarity_search_by_vector_with_relevance_scores(
+            vector, k=k, filter=self._where(filter, candidates))
+
+    def similarity_search_with_score(self, query: str, k: int = 5, filter: Optional[Dict[str, Any]] = None,
+                                     candidates: Optional[int] = None) -> List[Tuple[Document, float]]:
+        return self.vector_store.similarity_search_with_score(
+            query=query, k=k, filter=self._where(filter, candidates))
+
+
+class AssessmentRetriever:
+    """Holds the embedding client and the retrieval backend for the lifetime of the process.
+
+    The backend ("chroma", or "numpy" for the in-process matrix index) is opened lazily on
+    first use (or eagerly via warm()) and reopened when its files change on disk, checked at
+    most once every `reload_interval` seconds. Each embedding provider has its own
+    collection, derived from the base persist directory.
+    """
+
+    def __init__(self, persist_directory: str = DEFAULT_PERSIST_DIRECTORY,
+                 embedding_model: str = EMBEDDING_MODEL, reload_interval: float = 5.0,
+                 backend: Optional[str] = None, provider: Optional[str] = None):
+        backend = backend or config.RETRIEVAL_BACKEND
+        if backend not in RETRIEVAL_BACKENDS:
+            raise ValueError(f"Unknown retrieval backend: {backend}")
+        provider = provider or config.EMBEDDING_PROVIDER
+        if provider not in EMBEDDING_PROVIDERS:
+            raise ValueError(f"Unknown embedding provider: {provider}")
+        self.provider = provider
+        self.persist_directory = provider_directory(persist_directory, provider)
+        self.embedding_model = embedding_model
+        self.reload_interval = reload_interval
+        self.backend_name = backend
+        self._lock = threading.RLock()
+        self._embeddings = None
+        self._backend = None
+        self._signature = None
+        self._last_check = 0.0
+        self._loaded_at = None
+        self._reload_count = 0
+        self._last_error = None
+        self._reload_listeners = []
+        self.reranker = Reranker()
+
+    @property
+    def is_warm(self) -> bool:
+        return self._backend is not None
+
+    @property
+    def data_directory(self) -> str:
+        """Directory whose files back the active retrieval backend"""
+        if self.backend_name == "numpy":
+            return numpy_index_path(self.persist_directory)
+        return self.persist_directory
+
+    @property
+    def embeddings(self):
+        """Embedding client shared by every query, with repeated queries served from cache"""
+        with self._lock:
+            if self._embeddings is None:
+                if self.provider == "google":
+                    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+                    client = GoogleGenerativeAIEmbeddings(model=self.embedding_model)
+                    task_type = "retrieval_query"
+                else:
+                    # Local embedders load the state fitted when their collection was built
+                    client, self.embedding_model = create_embeddings(self.provider, self.persist_directory)
+                    task_type = None
+                self._embeddings = CachedEmbeddings(
+                    client,
+                    model_name=self.embedding_model,
+                    max_entries=config.EMBEDDING_CACHE_SIZE,
+                    ttl=config.EMBEDDING_CACHE_TTL,
+                    persist_path=config.EMBEDDING_CACHE_PATH or None,
+                    query_task_type=task_type
+                )
+            return self._embeddings
+
+    def warm(self):
+        """Open the retrieval backend now instead of on the first query"""
+        with self._lock:
+            if self._backend is None:
+                self._open()
+            return self._backend
+
+    def _open(self):
+        signature = directory_signature(self.data_directory)
+        try:
+            if self.backend_name == "numpy":
+                from vector_index import NumpyBackend
+                self._backend = NumpyBackend(self.data_directory, self.embeddings,
+                                             lexical_index_path(self.persist_directory))
+            else:
+                self._backend = ChromaBackend(self.persist_directory, self.embeddings,
+                                              lexical_index_path(self.persist_directory))
+        except Exception as e:
+            self._last_error = str(e)
+            raise
+        self._signature = signature
+        self._last_check = time.monotonic()
+        self._loaded_at = time.time()
+        self._last_error = None
+        logger.info("%s backend opened from %s", self.backend_name, self.data_directory)
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """Reopen the store if the persist directory changed on disk. Returns True if reloaded."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            signature = directory_signature(self.data_directory)
+            if not force and (self._backend is None or signature == self._signature):
+                return False
+            self._release()
+            if self.provider != "google":
+                # A rebuilt local collection comes with a refitted embedder
+                self._close_embeddings()
+            self._open()
+            self._reload_count += 1
+            logger.info("%s backend reloaded from %s", self.backend_name, self.data_directory)
+            for listener in self._reload_listeners:
+                listener()
+            return True
+
+    @property
+    def index_version(self) -> str:
+        """Identifies the files the open backend was loaded from; equal in every process serving them"""
+        signature = self._signature or (0, 0, 0)
+        return f"{self.backend_name}:{self.provider}:{'-'.join(str(part) for part in signature)}"
+
+    def add_reload_listener(self, callback):
+        """Call `callback()` whenever the store is reopened from changed files"""
+        self._reload_listeners.append(callback)
+
+    def _release(self):
+        self._backend = None
+        try:
+            # Chroma caches one client per path; drop it so the next open rereads the files
+            from chromadb.api.client import SharedSystemClient
+            SharedSystemClient.clear_system_cache()
+        except Exception:
+            pass
+
+    @property
+    def backend(self):
+        """The open retrieval backend, checking for on-disk changes at most every reload_interval seconds"""
+        if self._backend is None:
+            return self.warm()
+        if self.reload_interval is not None and time.monotonic() - self._last_check >= self.reload_interval:
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                # Keep serving the previously opened store if the new files cannot be read yet
+                self._last_error = str(e)
+                logger.warning("Vector store reload failed: %s", e)
+        return self._backend
+
+    @property
+    def vector_store(self):
+        """The underlying Chroma store (None when serving from the NumPy index)"""
+        return getattr(self.backend, "vector_store", None)
+
+    @property
+    def filter_index(self) -> FilterIndex:
+        return self.backend.filter_index
+
+    @property
+    def keyphrase_extractor(self) -> KeyphraseExtractor:
+        """Local job-description-to-query builder over the loaded catalog vocabulary"""
+        return self.backend.keyphrase_extractor
+
+    @property
+    def facet_extractor(self) -> FacetExtractor:
+        """Query facet matcher built from the vocabulary of the loaded catalog"""
+        return self.backend.facet_extractor
+
+    def search(self, query: str, k: int = 5, filter: Optional[Dict[str, Any]] = None,
+               hybrid: Optional[bool] = None, facets: Optional[QueryFacets] = None,
+               rerank: Optional[bool] = None, vector: Optional[List[float]] = None,
+               vector_hits: Optional[List[Tuple[Document, float]]] = None) -> Tuple[List[Tuple[Document, float]], SearchPlan]:
+        """Top-k (document, score) pairs, best first, and the plan used to find them.
+
+        The filter is planned against the bitset FilterIndex: narrow filters restrict the
+        vector search to the candidate rows, broad ones over-fetch and post-filter. Either
+        way k hits come back whenever at least k documents match. When no document matches
+        every facet, facets are dropped until some do (plan.relaxed), so the closest
+        assessments are returned rather than nothing.
+
+        In hybrid mode (HYBRID_SEARCH) the vector ranking and a BM25 ranking over the
+        documents' search keywords are each taken HYBRID_DEPTH deep and merged with
+        reciprocal rank fusion. Short keyword queries ("SQL", ".NET") are answered from the
+        BM25 index alone, without embedding the query.
+
+        With RERANK the first stage fetches RERANK_DEPTH candidates and the Reranker orders
+        them by rank, facet matches, duration fit and keyword overlap, unless the search has
+        already used up RERANK_BUDGET_MS, in which case the first-stage order stands. Scores
+        are then re-rank scores; otherwise fused RRF scores in hybrid mode, Chroma distances
+        or NumPy cosine similarities. Per-stage timings are recorded on the plan.
+
+        batch_search passes a `vector` already computed for the query, used instead of embedding
+        it, and `vector_hits`, the vector stage's result for this plan, scored with the rest
+        of the batch.
+        """
+        start = time.perf_counter()
+        backend = self.backend
+        hybrid = config.HYBRID_SEARCH if hybrid is None else hybrid
+        rerank = config.RERANK if rerank is None else rerank
+        plan = plan_search(backend.filter_index, filter, self._depth(k, hybrid, rerank))
+        mark = _record_stage(plan, "plan", start)
+        if plan.strategy == EMPTY:
+            return [], plan
+        # A filter nothing matched comes back relaxed
+        filter = plan.where
+
+        if hybrid:
+            results = self._hybrid_search(backend, query, filter, plan, k, vector, vector_hits)
+        else:
+            results = vector_hits if vector_hits is not None else self._vector_search(backend, query, filter, plan, vector)
+
+        if rerank and len(results) > 1:
+            mark = time.perf_counter()
+            if (mark - start) * 1000 < config.RERANK_BUDGET_MS:
+                if facets is None:
+                    facets = backend.facet_extractor.extract(query)
+                results = self.reranker.rerank(results, query, facets, backend.filter_index,
+                                               backend.lexical_index, k)
+                plan.reranked = True
+                _record_stage(plan, "rerank", mark)
+            else:
+                # Over budget: keep the first-stage order rather than add latency
+                plan.rerank_skipped = True
+        plan.timings["total"] = round((time.perf_counter() - start) * 1000, 3)
+        return results[:k], plan
+
+    @staticmethod
+    def _depth(k: int, hybrid: bool, rerank: bool) -> int:
+        """How deep the first stage ranks: enough for fusion and re-ranking to choose from"""
+        depth = k
+        if hybrid:
+            depth = max(depth, config.HYBRID_DEPTH)
+        if rerank:
+            depth = max(depth, config.RERANK_DEPTH)
+        return depth
+
+    def _hybrid_search(self, backend, query: str, filter: Optional[Dict[str, Any]],
+                       plan: SearchPlan, k: int, vector: Optional[List[float]] = None,
+                       vector_hits: Optional[List[Tuple[Document, float]]] = None) -> List[Tuple[Document, float]]:
+        mark = time.perf_counter()
+        wanted = k if plan.strategy == UNFILTERED else min(k, plan.candidate_count)
+        lexical_hits = backend.lexical_index.search(query, plan.k, plan.candidates)
+        mark = _record_stage(plan, "lexical", mark)
+        if self._is_keyword_query(backend, query) and len(lexical_hits) >= wanted:
+            plan.strategy = LEXICAL
+            return [(backend.document(row), score) for row, score in lexical_hits]
+
+        plan.hybrid = True
+        if vector_hits is None:
+            vector_hits = self._vector_search(backend, query, filter, plan, vector)
+        mark = time.perf_counter()
+        documents = {document_key(doc.metadata): doc for doc, _ in vector_hits}
+        lexical_keys = []
+        for row, _ in lexical_hits:
+            key = backend.lexical_index.ids[row]
+            if key not in documents:
+                documents[key] = backend.document(row)
+            lexical_keys.append(key)
+        fused = reciprocal_rank_fusion([document_key(doc.metadata) for doc, _ in vector_hits], lexical_keys,
+                                       k=config.RRF_K)
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:plan.k]
+        _record_stage(plan, "fuse", mark)
+        return [(documents[key], score) for key, score in ranked]
+
+    @staticmethod
+    def _is_keyword_query(backend, query: str) -> bool:
+        """Short keyword queries the lexical fast path may answer without embedding"""
+        return bool(config.LEXICAL_FAST_PATH_MAX_TERMS
+                    and backend.lexical_index.is_keyword_query(query, config.LEXICAL_FAST_PATH_MAX_TERMS))
+
+    def _vector_search(self, backend, query: str, filter: Optional[Dict[str, Any]],
+                       plan: SearchPlan, vector: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        # The query is embedded once, also when a short post-filter falls back to a second search
+        mark = time.perf_counter()
+        if vector is None:
+            vector = self.embeddings.embed_query(query)
+            mark = _record_stage(plan, "embedding", mark)
+        if plan.strategy == UNFILTERED:
+            results = backend.similarity_search_by_vector(vector, k=plan.k)
+            _record_stage(plan, "vector_search", mark)
+            return results
+        if plan.strategy == POSTFILTER:
+            hits = backend.similarity_search_by_vector(vector, k=plan.fetch_k)
+            mark = _record_stage(plan, "vector_search", mark)
+            results = [(doc, score) for doc, score in hits
+                       if backend.filter_index.contains(plan.candidates, doc.metadata.get('assessment_id'))][:plan.k]
+            mark = _record_stage(plan, "post_filter", mark)
+            if len(results) >= plan.expected_results:
+                return results
+            # The over-fetch came up short; the candidate-restricted search is exact
+            plan.fallback = True
+        results = backend.similarity_search_by_vector(
+            vector, k=plan.expected_results, filter=filter, candidates=plan.candidates)
+        _record_stage(plan, "vector_search", mark)
+        return results
+
+    def batch_search(self, queries: List[str], ks: List[int], filters: List[Optional[Dict[str, Any]]],
+                     facets: Optional[List[Optional[QueryFacets]]] = None) -> List[List[Tuple[Document, float]]]:
+        """Search many queries at once, each ranked exactly as search() ranks it.
+
+        The queries that need a vector are embedded together, BATCH_EMBED_SIZE per call and
+        with repeats served from the query-embedding cache; keyword queries the lexical fast
+        path may answer are left out and only embedded if it does not. On the numpy backend
+        the vector stage of every embedded query is then one matrix product, each row masked
+        to its planned candidates. Each query finally goes through search() with its vector
+        and vector hits: lexical ranking, fusion and re-ranking as for a single query.
+        """
+        if not queries:
+            return []
+        backend = self.backend
+        facets = facets or [None] * len(queries)
+        hybrid, rerank = config.HYBRID_SEARCH, config.RERANK
+        embed = [i for i, query in enumerate(queries) if not (hybrid and self._is_keyword_query(backend, query))]
+        vectors: List[Optional[List[float]]] = [None] * len(queries)
+        embedded = self.embeddings.embed_queries([queries[i] for i in embed], batch_size=config.BATCH_EMBED_SIZE)
+        for i, vector in zip(embed, embedded):
+            vectors[i] = vector
+
+        vector_hits: List[Optional[List[Tuple[Document, float]]]] = [None] * len(queries)
+        search_batch = getattr(backend, "similarity_search_batch", None)
+        if search_batch is not None:
+            plans = {i: plan_search(backend.filter_index, filters[i], self._depth(ks[i], hybrid, rerank))
+                     for i in embed}
+            rows = [i for i in embed if plans[i].strategy != EMPTY]
+            if rows:
+                hits = search_batch([vectors[i] for i in rows], [plans[i].expected_results for i in rows],
+                                    [plans[i].candidates for i in rows])
+                for i, query_hits in zip(rows, hits):
+                    vector_hits[i] = query_hits
+        return [self.search(query, k=k, filter=filter, facets=query_facets, vector=vector, vector_hits=hits)[0]
+                for query, k, filter, query_facets, vector, hits
+                in zip(queries, ks, filters, facets, vectors, vector_hits)]
+
+    def similar(self, assessment_id: str, k: int = 5,
+                filter: Optional[Dict[str, Any]] = None) -> Optional[Tuple[Document, List[Tuple[Document, float]]]]:
+        """The document with this assessment_id and up to k (document, cosine score) pairs most
+        similar to it, best first; None when no document has the id.
+
+        Neighbors are read from the precomputed NeighborGraph and a filter keeps the matching
+        ones. When fewer than k stored neighbors match but more documents do, the matches are
+        scored against the document's stored vector instead. No query is embedded either way.
+        """
+        from vector_index import bitset_mask
+        backend = self.backend
+        index, filter_index = backend.matrix_index
+        row = filter_index.row(assessment_id)
+        if row is None:
+            return None
+        candidates = filter_index.evaluate(filter) & ~(1 << row) if filter else None
+        hits = backend.neighbor_graph.similar(row, k, candidates)
+        if candidates is not None and len(hits) < k and len(hits) < filter_index.count(candidates):
+            hits = index.search_by_vector(index.vectors[row], k, mask=bitset_mask(candidates, len(index)))
+        return index.document(row), [(index.document(neighbor), score) for neighbor, score in hits]
+
+    def similarity_search_with_score(self, query: str, k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """Top-k (document, score) pairs, best first; see search()"""
+        return self.search(query, k=k, filter=filter)[0]
+
+    def close(self):
+        with self._lock:
+            self._release()
+            self._close_embeddings()
+
+    def _close_embeddings(self):
+        if self._embeddings is not None and self._embeddings.store is not None:
+            self._embeddings.store.close()
+        self._embeddings = None
+
+    def status(self) -> Dict[str, Any]:
+        """Warm/cold state for readiness probes"""
+        return {
+            "warm": self.is_warm,
+            "backend": self.backend_name,
+            "embedding_provider": self.provider,
+            "persist_directory": self.persist_directory,
+            "data_directory": self.data_directory,
+            "embedding_model": self.embedding_model,
+            "loaded_at": self._loaded_at,
+            "reloads": self._reload_count,
+            "index_version": self.index_version,
+            "last_error": self._last_error,
+            "embedding_cache": self._embeddings.stats() if self._embeddings is not None else None,
+        }
+
+
+_retrievers: Dict[str, AssessmentRetriever] = {}
+_retrievers_lock = threading.Lock()
+
+
+def get_retriever(persist_directory: str = DEFAULT_PERSIST_DIRECTORY) -> AssessmentRetriever:
+    """Return the process-wide retriever for a persist directory, creating it on first use"""
+    key = os.path.abspath(persist_directory)
+    with _retrievers_lock:
+        retriever = _retrievers.get(key)
+        if retriever is None:
+            retriever = AssessmentRetriever(persist_directory)
+            _retrievers[key] = retriever
+        return retriever
+
+
+def close_retrievers():
+    """Release every open retriever, used at application shutdown"""
+    with _retrievers_lock:
+        for retriever in _retrievers.values():
+            retriever.close()
+        _retrievers.clear()
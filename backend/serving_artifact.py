@@ -0,0 +1,200 @@
+"""Single-file serving artifact: everything the NumPy backend needs, opened with one mmap.
+
+Layout: an 8-byte magic, a little-endian uint64 header length, the JSON header, then
+64-byte aligned sections whose offset, dtype and shape the header lists:
+
+- vectors: the normalized float32 embedding matrix
+- documents, document_offsets: each row's [page_content, metadata] as compact JSON, back to
+  back; a row is decoded only when it is returned
+- filter_bitsets, durations: the FilterIndex, one packed bitset per facet value
+- lexical_*: the BM25 postings and per-row terms in CSR form (LexicalIndex.packed())
+- knn_neighbors, knn_scores: the item-to-item NeighborGraph (int32 rows, float16 scores)
+
+The header carries the row ids, embedding model, facet keys and labels, the BM25 vocabulary
+and the keyphrase skill terms, so opening the artifact decodes no document metadata and
+recomputes no index; the sections stay in the page cache, shared by every process mapping
+the file.
+"""
+import json
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from filter_index import FilterIndex
+from lexical import LexicalIndex
+from neighbors import NeighborGraph
+
+ARTIFACT_FILE = "serving.idx"
+MAGIC = b"SHLSRV01"
+ARTIFACT_VERSION = 1
+ALIGNMENT = 64
+LEXICAL_DTYPES = {"offsets": np.uint64, "rows": np.uint32, "frequencies": np.uint32, "weights": np.float64,
+                  "idf": np.float64, "row_offsets": np.uint64, "row_terms": np.uint32}
+
+
+def artifact_path(index_path: str) -> str:
+    """The artifact lives in the NumPy index directory it was built from"""
+    return os.path.join(index_path, ARTIFACT_FILE)
+
+
+def is_current(path: str, sources: List[Optional[str]]) -> bool:
+    """True when the artifact exists and is at least as new as every existing source file"""
+    try:
+        built = os.stat(path).st_mtime_ns
+    except OSError:
+        return False
+    return all(os.stat(source).st_mtime_ns <= built for source in sources if source and os.path.exists(source))
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_artifact(path: str, vectors: np.ndarray, ids: List[str], page_contents: List[str],
+                   metadatas: List[Dict[str, Any]], model: Optional[str], filter_index: FilterIndex,
+                   lexical_index: LexicalIndex, skill_terms: List[str],
+                   neighbor_graph: Optional[NeighborGraph] = None):
+    """Write the artifact atomically; vectors are expected normalized, rows in index order"""
+    rows = [json.dumps([page_content, metadata], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            for page_content, metadata in zip(page_contents, metadatas)]
+    offsets = np.zeros(len(rows) + 1, dtype=np.uint64)
+    np.cumsum([len(row) for row in rows], out=offsets[1:])
+    keys, bitsets = filter_index.packed()
+    lexical_header, lexical_arrays = lexical_index.packed()
+    sections = {
+        "vectors": np.ascontiguousarray(vectors, dtype=np.float32),
+        "document_offsets": offsets,
+        "documents": np.frombuffer(b"".join(rows), dtype=np.uint8),
+        "filter_bitsets": np.frombuffer(bitsets, dtype=np.uint8),
+        "durations": np.asarray(filter_index.durations, dtype=np.float64),
+    }
+    for name, values in lexical_arrays.items():
+        sections[f"lexical_{name}"] = np.asarray(values, dtype=LEXICAL_DTYPES[name])
+    if neighbor_graph is not None:
+        sections["knn_neighbors"] = np.asarray(neighbor_graph.neighbors, dtype=np.int32)
+        sections["knn_scores"] = np.asarray(neighbor_graph.scores, dtype=np.float16)
+
+    layout, offset = {}, 0
+    for name, array in sections.items():
+        offset = _align(offset)
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += array.nbytes
+    header = json.dumps({
+        "version": ARTIFACT_VERSION,
+        "model": model,
+        "ids": list(ids),
+        "filter": {"ids": filter_index.ids, "keys": keys, "labels": filter_index.labels},
+        "lexical": lexical_header,
+        "skill_terms": list(skill_terms),
+        "sections": layout,
+    }, separators=(",", ":")).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Written beside the target and renamed, so a serving process never maps a half-written file
+    with open(path + ".tmp", "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, array in sections.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(path + ".tmp", path)
+
+
+class PackedDocuments:
+    """Rows of the documents section, each decoded once on first access"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self._offsets = offsets
+        self._data = data
+        self._decoded: List[Optional[Tuple[str, Dict[str, Any]]]] = [None] * (len(offsets) - 1)
+
+    def row(self, row: int) -> Tuple[str, Dict[str, Any]]:
+        decoded = self._decoded[row]
+        if decoded is None:
+            start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+            page_content, metadata = json.loads(self._data[start:end].tobytes())
+            decoded = self._decoded[row] = (page_content, metadata)
+        return decoded
+
+    def __len__(self):
+        return len(self._decoded)
+
+
+class PackedColumn(Sequence):
+    """page_contents or metadatas of PackedDocuments, as the list NumpyIndex expects"""
+
+    def __init__(self, documents: PackedDocuments, field: int):
+        self._documents = documents
+        self._field = field
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        return self._documents.row(row)[self._field]
+
+    def __len__(self):
+        return len(self._documents)
+
+
+class ServingArtifact:
+    """An opened artifact. Arrays are read-only views into one mmap of the file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a serving artifact: {path}")
+        (length,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._mmap[start:start + length])
+        if self.header.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported serving artifact version: {self.header.get('version')}")
+        data_start = _align(start + length)
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in self.header["sections"].items():
+            dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            count = int(np.prod(shape))
+            self.arrays[name] = (np.frombuffer(self._mmap, dtype=dtype, count=count,
+                                               offset=data_start + spec["offset"]).reshape(shape)
+                                 if count else np.empty(shape, dtype=dtype))
+        documents = PackedDocuments(self.arrays["document_offsets"], self.arrays["documents"])
+        self.page_contents = PackedColumn(documents, 0)
+        self.metadatas = PackedColumn(documents, 1)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.arrays["vectors"]
+
+    @property
+    def ids(self) -> List[str]:
+        return self.header["ids"]
+
+    @property
+    def model(self) -> Optional[str]:
+        return self.header.get("model")
+
+    @property
+    def skill_terms(self) -> List[str]:
+        return self.header["skill_terms"]
+
+    def filter_index(self) -> FilterIndex:
+        spec = self.header["filter"]
+        return FilterIndex.from_packed(spec["ids"], [tuple(key) for key in spec["keys"]],
+                                       self.arrays["filter_bitsets"].tobytes(),
+                                       self.arrays["durations"].tolist(), spec["labels"])
+
+    def neighbor_graph(self) -> Optional[NeighborGraph]:
+        """The precomputed neighbor graph; None for artifacts written without one"""
+        if "knn_neighbors" not in self.arrays:
+            return None
+        return NeighborGraph(self.arrays["knn_neighbors"], self.arrays["knn_scores"])
+
+    def lexical_index(self) -> LexicalIndex:
+        arrays = {name[len("lexical_"):]: array for name, array in self.arrays.items() if name.startswith("lexical_")}
+        return LexicalIndex.from_packed(self.header["lexical"], arrays)
@@ -0,0 +1,73 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Backend modules are imported by their top-level names, as main.py and the benchmarks do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main.py opens its caches at import time, so the persistent ones must point away from
+# database/cache before config is first imported
+_CACHE_DIR = tempfile.mkdtemp(prefix="shl-tests-")
+_CACHE_PATHS = {
+    "EMBEDDING_CACHE_PATH": "embeddings.sqlite3",
+    "PAGE_CACHE_PATH": "pages.sqlite3",
+    "QUERY_CACHE_PATH": "queries.sqlite3",
+}
+for _name, _file in _CACHE_PATHS.items():
+    os.environ[_name] = os.path.join(_CACHE_DIR, _file)
+os.environ["SHARED_CACHE_PATH"] = ""
+
+import config  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_CACHE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_paths(tmp_path, monkeypatch):
+    """Caches a test creates itself persist under its own tmp_path"""
+    for name, file in _CACHE_PATHS.items():
+        monkeypatch.setattr(config, name, str(tmp_path / file))
+    monkeypatch.setattr(config, "SHARED_CACHE_PATH", "")
+
+# (id, name, description, test type, duration, languages)
+CATALOG = [
+    ("java-8-new", "Java 8 (New)", "Knowledge of Java 8 programming, collections and streams", "K", 18,
+     "English (USA)"),
+    ("python-new", "Python (New)", "Python programming: data structures, modules and testing", "K", 11,
+     "English International"),
+    ("sql-server-new", "SQL Server (New)", "Querying and administering Microsoft SQL Server databases", "K", 15,
+     "English (USA),German"),
+    ("opq32r", "Occupational Personality Questionnaire OPQ32r", "Personality and working styles", "P", 25,
+     "German,Spanish"),
+    ("verify-numerical", "Verify - Numerical Ability", "Numerical reasoning with tables and charts", "A", 18,
+     "English International"),
+    ("sales-scenarios", "Sales Scenarios", "Situational judgement for sales representatives", "B", 30,
+     "Latin American Spanish"),
+]
+
+
+@pytest.fixture
+def catalog_retriever(tmp_path, monkeypatch):
+    """A numpy-backend retriever over CATALOG, embedded offline with hashed TF-IDF"""
+    from embedding_providers import create_embeddings
+    from retriever import AssessmentRetriever, numpy_index_path
+    from vector_index import NumpyIndex
+
+    monkeypatch.setattr(config, "EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setattr(config, "NUMPY_INDEX_PATH", "")
+    retriever = AssessmentRetriever(str(tmp_path / "db"), backend="numpy", provider="hashed-tfidf")
+    texts = [f"{name}. {description}" for _, name, description, *_ in CATALOG]
+    embeddings, model = create_embeddings("hashed-tfidf", retriever.persist_directory, fit_texts=texts)
+    metadatas = [{"assessment_id": id_, "name": name, "url": f"https://www.shl.com/products/view/{id_}/",
+                  "test_types": test_type, "duration": duration, "languages": languages,
+                  "job_levels": "Graduate", "remote_testing": True, "adaptive_irt": False}
+                 for id_, name, _, test_type, duration, languages in CATALOG]
+    NumpyIndex.save(numpy_index_path(retriever.persist_directory), embeddings.embed_documents(texts),
+                    [id_ for id_, *_ in CATALOG], texts, metadatas, model)
+    yield retriever
+    retriever.close()
@@ -0,0 +1,45 @@
+import pytest
+
+import config
+
+
+def ids(hits):
+    return [(doc.metadata["assessment_id"], round(score, 6)) for doc, score in hits]
+
+
+@pytest.mark.parametrize("hybrid,rerank", [(False, False), (True, True)])
+def test_batch_search_ranks_like_search(catalog_retriever, monkeypatch, hybrid, rerank):
+    monkeypatch.setattr(config, "HYBRID_SEARCH", hybrid)
+    monkeypatch.setattr(config, "RERANK", rerank)
+    retriever = catalog_retriever
+    queries = ["java", "python developer who writes tests", "numerical reasoning under 20 minutes",
+               "personality questionnaire for sales representatives"]
+    facets = [retriever.facet_extractor.extract(query) for query in queries]
+    filters = [f.to_filter() for f in facets]
+    batched = retriever.batch_search(queries, [3] * len(queries), filters, facets)
+    single = [retriever.search(query, k=3, filter=filter, facets=f)[0]
+              for query, filter, f in zip(queries, filters, facets)]
+    assert [ids(hits) for hits in batched] == [ids(hits) for hits in single]
+    assert all(batched)
+
+
+def test_batch_search_embeds_query_batches_in_one_call(catalog_retriever, monkeypatch):
+    retriever = catalog_retriever
+    client = retriever.embeddings.embeddings
+    calls = []
+    monkeypatch.setattr(client, "embed_query", lambda text: calls.append(text))
+    retriever.batch_search(["python developer who writes tests", "numerical reasoning with charts"],
+                           [3, 3], [None, None])
+    assert calls == []
+
+
+def test_batch_vector_stage_is_one_matrix_product(catalog_retriever, monkeypatch):
+    retriever = catalog_retriever
+    index = retriever.backend.index
+    calls = []
+    search_batch = index.search_batch
+    monkeypatch.setattr(index, "search_batch", lambda *args: calls.append(args) or search_batch(*args))
+    queries = ["python developer who writes tests", "numerical reasoning with charts", "personality questionnaire for sales"]
+    results = retriever.batch_search(queries, [3, 3, 3], [None, {"test_type_a": True}, None])
+    assert len(calls) == 1 and len(calls[0][0]) == 3
+    assert all(results)
@@ -0,0 +1,55 @@
+import copy
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCH_DIR)
+
+# The benchmark configures the process environment at import; keep that out of the other tests
+with mock.patch.dict(os.environ):
+    import bench_pipeline  # noqa: E402
+
+
+@pytest.fixture
+def baseline():
+    with open(os.path.join(BENCH_DIR, "fixtures", "pipeline_baseline.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_recall_and_reciprocal_rank():
+    record = bench_pipeline.score(["a", "x", "b", "y"], ["b", "a", "c", "d"], [2, 4])
+    assert record == {"recall@2": 0.25, "recall@4": 0.5, "rr": 1.0, "first_relevant_rank": 1}
+    assert bench_pipeline.score(["x", "y"], ["a"], [2])["rr"] == 0.0
+    summary = bench_pipeline.relevance([
+        {"info": {"id": "1"}, "ranked": ["x", "a"], "relevant": ["a"]},
+        {"info": {"id": "2"}, "ranked": ["b"], "relevant": ["b", "c"]},
+    ], [1])["summary"]
+    assert summary == {"recall@1": 0.25, "mrr": 0.75}
+
+
+def test_baseline_compares_clean_against_itself(baseline):
+    assert bench_pipeline.compare(baseline, baseline, 0.5, 0.5, 0.0) == []
+
+
+def test_relevance_drops_and_latency_regressions_are_reported(baseline):
+    results = copy.deepcopy(baseline)
+    results["relevance"]["queries"]["summary"]["mrr"] -= 0.01
+    results["stages"]["search"]["p50_ms"] *= 3
+    results["throughput"]["query"][0]["throughput_per_s"] /= 3
+    failures = bench_pipeline.compare(results, baseline, 0.5, 0.5, 0.0)
+    assert [failure.split(":")[0] for failure in failures] == [
+        "relevance queries mrr", "latency search p50_ms", "throughput query x1"]
+    # Within the tolerances nothing is reported
+    assert bench_pipeline.compare(results, baseline, 5.0, 0.5, 0.02) == []
+
+
+def test_labelled_job_pages_exist():
+    with open(bench_pipeline.LABELS, encoding="utf-8") as f:
+        labels = json.load(f)
+    assert labels["queries"] and labels["job_pages"]
+    for case in labels["job_pages"]:
+        assert os.path.exists(os.path.join(bench_pipeline.PAGES, case["page"]))
@@ -0,0 +1,65 @@
+from caching import CachedEmbeddings, TTLCache
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.queries = []
+        self.batches = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts, task_type=None):
+        self.batches.append((list(texts), task_type))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_their_ttl():
+    now = [0.0]
+    cache = TTLCache(ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=30)
+    now[0] = 10
+    assert cache.get("a") is None and cache.get("b") == 2
+    assert cache.touch("b", ttl=30)
+    now[0] = 35
+    assert cache.get("b") == 2
+    assert cache.expirations == 1
+
+
+def test_queries_are_cached_on_normalized_text():
+    client = CountingEmbeddings()
+    embeddings = CachedEmbeddings(client, "model-a")
+    assert embeddings.embed_query("Java  Developer") == embeddings.embed_query("java developer ")
+    assert client.queries == ["Java  Developer"]
+    # Another model never reads these vectors
+    assert CachedEmbeddings(client, "model-b").cache_key("java") != embeddings.cache_key("java")
+
+
+def test_vectors_persist_across_processes(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    client = CountingEmbeddings()
+    CachedEmbeddings(client, "model", persist_path=path).embed_query("sql server")
+    restarted = CachedEmbeddings(client, "model", persist_path=path)
+    assert restarted.embed_query("SQL server") == [10.0, 1.0]
+    assert client.queries == ["sql server"] and restarted.persistent_hits == 1
+
+
+def test_query_batches_embed_each_miss_once():
+    client = CountingEmbeddings()
+    embeddings = CachedEmbeddings(client, "model", query_task_type="retrieval_query")
+    embeddings.embed_query("java")
+    vectors = embeddings.embed_queries(["java", "python", "Python", "sql"], batch_size=1)
+    assert vectors == [[4.0, 1.0], [6.0, 1.0], [6.0, 1.0], [3.0, 1.0]]
+    assert client.batches == [(["python"], "retrieval_query"), (["sql"], "retrieval_query")]
@@ -0,0 +1,91 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from embedding_job import MANIFEST_FILE, EmbeddingJob, HashEmbeddings, text_key
+
+MODEL = "hash-64"
+TEXTS = [f"assessment {i}: numerical reasoning and Java" for i in range(10)]
+
+
+class CountingEmbeddings(HashEmbeddings):
+    """HashEmbeddings that records every text it embeds and can fail after N calls"""
+
+    def __init__(self, fail_after=None):
+        super().__init__()
+        self.fail_after = fail_after
+        self.calls = 0
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise RuntimeError("simulated rate limit")
+        self.texts.extend(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        raise AssertionError("the job embeds documents only")
+
+
+def job(checkpoint_dir, embeddings):
+    # One worker makes the failing chunk deterministic; no retries, no rate limit
+    return EmbeddingJob(str(checkpoint_dir), embeddings, MODEL, chunk_size=3, workers=1,
+                        rate_limit=0, retries=0, backoff=0)
+
+
+def manifest(checkpoint_dir):
+    with open(os.path.join(checkpoint_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_failed_chunk_leaves_earlier_chunks_checkpointed(tmp_path):
+    with pytest.raises(RuntimeError):
+        job(tmp_path, CountingEmbeddings(fail_after=2)).run(TEXTS)
+    chunks = manifest(tmp_path)["chunks"]
+    assert len(chunks) == 2
+    checkpointed = [key for keys in chunks.values() for key in keys]
+    assert checkpointed == [text_key(MODEL, text) for text in TEXTS[:6]]
+    for name, keys in chunks.items():
+        assert np.load(os.path.join(tmp_path, name)).shape == (len(keys), 64)
+
+
+def test_rerun_embeds_only_uncovered_texts(tmp_path):
+    with pytest.raises(RuntimeError):
+        job(tmp_path, CountingEmbeddings(fail_after=2)).run(TEXTS)
+    embeddings = CountingEmbeddings()
+    rerun = job(tmp_path, embeddings)
+    rerun.run(TEXTS)
+    assert embeddings.texts == TEXTS[6:]
+    assert rerun.reused == 6
+    assert rerun.embedded == 4
+
+
+def test_assemble_matches_an_uninterrupted_run_without_embedding(tmp_path):
+    with pytest.raises(RuntimeError):
+        job(tmp_path / "resumed", CountingEmbeddings(fail_after=1)).run(TEXTS)
+    job(tmp_path / "resumed", CountingEmbeddings()).run(TEXTS)
+    expected = job(tmp_path / "uninterrupted", CountingEmbeddings()).run(TEXTS)
+
+    embeddings = CountingEmbeddings()
+    keys = [text_key(MODEL, text) for text in TEXTS]
+    assembled = job(tmp_path / "resumed", embeddings).assemble(keys)
+    assert embeddings.calls == 0
+    np.testing.assert_array_equal(assembled, expected)
+
+
+def test_prune_keeps_only_referenced_vectors(tmp_path):
+    first = job(tmp_path, CountingEmbeddings())
+    vectors = first.run(TEXTS)
+    kept = TEXTS[1:5]
+    assert first.prune(kept) == len(TEXTS) - len(kept)
+
+    chunks = manifest(tmp_path)["chunks"]
+    assert sorted(key for keys in chunks.values() for key in keys) == sorted(text_key(MODEL, t) for t in kept)
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith("chunk-")) == sorted(chunks)
+
+    embeddings = CountingEmbeddings()
+    np.testing.assert_array_equal(job(tmp_path, embeddings).run(kept), vectors[1:5])
+    assert embeddings.calls == 0
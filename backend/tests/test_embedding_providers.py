@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from embedding_providers import HashedTfidfEmbeddings, create_embeddings, embedder_state_path, provider_directory
+
+CATALOG = ["Java 8 programming with collections and streams", "Python programming and testing",
+           "Numerical reasoning with tables", "Personality and working styles questionnaire"]
+
+
+def cosine(a, b):
+    return float(np.dot(a, b))
+
+
+def test_similar_texts_embed_close_together():
+    embeddings = HashedTfidfEmbeddings.fit(CATALOG, dimensions=256)
+    vectors = embeddings.encode(CATALOG)
+    query = np.array(embeddings.embed_query("java streams developer"))
+    assert vectors.shape == (4, 256) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert int(np.argmax(vectors @ query)) == 0
+    # Character trigrams match spelling variants
+    assert cosine(embeddings.embed_query("programing"), embeddings.embed_query("programming")) > 0.5
+
+
+def test_vectors_are_stable_across_processes(tmp_path):
+    embeddings = HashedTfidfEmbeddings.fit(CATALOG, dimensions=256)
+    path = str(tmp_path / "embedder.json")
+    embeddings.save(path)
+    loaded = HashedTfidfEmbeddings.load(path)
+    assert loaded.model_name == embeddings.model_name
+    assert loaded.embed_query("python") == embeddings.embed_query("python")
+
+
+def test_async_encoding_matches_sync():
+    embeddings = HashedTfidfEmbeddings.fit(CATALOG, dimensions=64)
+    assert asyncio.run(embeddings.aembed_query("sql")) == embeddings.embed_query("sql")
+
+
+def test_fitted_state_is_saved_at_ingestion_and_loaded_at_query_time(tmp_path):
+    directory = provider_directory(str(tmp_path / "db"), "hashed-tfidf")
+    fitted, model = create_embeddings("hashed-tfidf", directory, fit_texts=CATALOG)
+    assert os.path.exists(embedder_state_path(directory))
+    loaded, loaded_model = create_embeddings("hashed-tfidf", directory)
+    assert loaded_model == model
+    assert loaded.embed_query("numerical") == fitted.embed_query("numerical")
+
+
+def test_providers_get_their_own_collections():
+    assert provider_directory("database/shl_vector_db", "google") == "database/shl_vector_db"
+    assert provider_directory("database/shl_vector_db/", "hashed-tfidf") == "database/shl_vector_db_hashed-tfidf"
+    with pytest.raises(ValueError):
+        create_embeddings("openai", "database/shl_vector_db")
@@ -0,0 +1,45 @@
+from facets import FacetExtractor, QueryFacets
+
+VOCABULARY = {
+    "job_level": ["Entry-Level", "Graduate", "Mid-Professional", "Manager", "Default"],
+    "language": ["English (USA)", "English International", "German", "Spanish", "Latin American Spanish"],
+}
+
+
+def test_one_pass_finds_every_facet():
+    facets = FacetExtractor(VOCABULARY).extract(
+        "Remote adaptive personality test for an entry level manager, German, at most 40 mins")
+    assert facets.job_levels == ["entry_level", "manager"]
+    assert facets.languages == ["german"]
+    assert facets.categories == ["personality"]
+    assert facets.max_duration == 40
+    assert facets.remote_testing and facets.adaptive_irt
+
+
+def test_base_language_names_match_every_variant():
+    extractor = FacetExtractor(VOCABULARY)
+    assert extractor.extract("english speakers").languages == ["english_(usa)", "english_international"]
+    assert extractor.extract("English (USA) only").languages == ["english_(usa)"]
+    assert extractor.extract("spanish").languages == ["latin_american_spanish", "spanish"]
+
+
+def test_terms_match_whole_words_only():
+    extractor = FacetExtractor(VOCABULARY)
+    facets = extractor.extract("germane managerial default skills")
+    assert facets.languages == [] and facets.job_levels == []
+    assert facets.categories == ["technical"]
+
+
+def test_soft_skills_win_over_skills():
+    assert FacetExtractor(VOCABULARY).extract("soft skills").categories == ["soft_skill"]
+
+
+def test_filter_ands_facets_and_ors_values():
+    facets = QueryFacets(job_levels=["graduate", "manager"], max_duration=30, remote_testing=True)
+    assert facets.to_filter() == {"$and": [
+        {"$or": [{"job_level_graduate": True}, {"job_level_manager": True}]},
+        {"duration": {"$gt": 0}},
+        {"duration": {"$lte": 30}},
+        {"remote_testing": True},
+    ]}
+    assert QueryFacets().to_filter() is None
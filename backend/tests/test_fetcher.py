@@ -0,0 +1,256 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import httpx
+import pytest
+
+import config
+import fetcher
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from stub_server import StubServer  # noqa: E402
+
+CONCURRENCY = 3
+THRESHOLD = 3
+RESET = 0.3
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(config, "HOST_MAX_CONCURRENCY", CONCURRENCY)
+    monkeypatch.setattr(config, "HOST_RATE_LIMIT", 0)
+    monkeypatch.setattr(config, "BREAKER_FAILURE_THRESHOLD", THRESHOLD)
+    monkeypatch.setattr(config, "BREAKER_RESET_TIMEOUT", RESET)
+    fetcher.reset_host_policies()
+    with StubServer(delay=0) as server:
+        yield server
+    fetcher.reset_host_policies()
+
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await fetcher.close_http_client()
+    return asyncio.run(main())
+
+
+async def attempt(url, timeout=None):
+    """Outcome of one fetch: "ok", or the exception class it raised"""
+    try:
+        await fetcher.fetch_text(url, timeout=timeout)
+        return "ok"
+    except Exception as e:
+        return type(e)
+
+
+def test_in_flight_requests_stay_within_the_host_limit(stub):
+    stub.delay = 0.05
+
+    async def scenario():
+        return await asyncio.gather(*(attempt(stub.url) for _ in range(4 * CONCURRENCY)))
+
+    results = run(scenario())
+    assert results == ["ok"] * (4 * CONCURRENCY)
+    assert stub.max_active <= CONCURRENCY
+    assert fetcher.host_policy(stub.url).in_flight == 0
+
+
+def test_blocking_fetches_share_the_host_limit(stub):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def fetch(_):
+        with fetcher.stream_page(stub.url) as response:
+            return response.status_code
+
+    stub.delay = 0.05
+    with ThreadPoolExecutor(max_workers=4 * CONCURRENCY) as pool:
+        assert list(pool.map(fetch, range(4 * CONCURRENCY))) == [200] * (4 * CONCURRENCY)
+    assert stub.max_active <= CONCURRENCY
+
+
+def test_breaker_opens_after_timeouts_and_fails_fast(stub):
+    stub.delay = 0.5
+
+    async def scenario():
+        failures = [await attempt(stub.url, timeout=0.1) for _ in range(THRESHOLD)]
+        start = time.perf_counter()
+        rejected = await attempt(stub.url, timeout=0.1)
+        return failures, rejected, time.perf_counter() - start
+
+    failures, rejected, elapsed = run(scenario())
+    assert all(issubclass(failure, httpx.TimeoutException) for failure in failures)
+    assert rejected is fetcher.CircuitOpenError
+    assert elapsed < 0.05
+    assert stub.requests == THRESHOLD
+    assert fetcher.host_policy(stub.url).stats()["state"] == fetcher.OPEN
+
+
+def test_breaker_opens_after_server_errors(stub):
+    stub.status = 503
+
+    async def scenario():
+        return [await attempt(stub.url) for _ in range(THRESHOLD + 2)]
+
+    outcomes = run(scenario())
+    assert outcomes[:THRESHOLD] == [httpx.HTTPStatusError] * THRESHOLD
+    assert outcomes[THRESHOLD:] == [fetcher.CircuitOpenError] * 2
+    assert stub.requests == THRESHOLD
+
+
+def test_one_half_open_trial_closes_the_breaker(stub):
+    stub.status = 503
+
+    async def scenario():
+        for _ in range(THRESHOLD):
+            await attempt(stub.url)
+        stub.status = 200
+        await asyncio.sleep(RESET)
+        return await attempt(stub.url)
+
+    assert run(scenario()) == "ok"
+    policy = fetcher.host_policy(stub.url)
+    assert policy.state == fetcher.CLOSED
+    assert policy.consecutive_failures == 0
+    assert stub.requests == THRESHOLD + 1
+
+
+def test_half_open_trial_failure_reopens_the_breaker(stub):
+    stub.status = 503
+
+    async def scenario():
+        for _ in range(THRESHOLD):
+            await attempt(stub.url)
+        await asyncio.sleep(RESET)
+        return await attempt(stub.url), await attempt(stub.url)
+
+    assert run(scenario()) == (httpx.HTTPStatusError, fetcher.CircuitOpenError)
+    assert stub.requests == THRESHOLD + 1
+
+
+def test_only_host_answers_count_as_success():
+    policy = fetcher.HostPolicy("example.test", concurrency=1, rate_limit=0, failure_threshold=3,
+                                reset_timeout=RESET)
+    with pytest.raises(httpx.ConnectError):
+        with policy.slot():
+            raise httpx.ConnectError("refused")
+    with pytest.raises(ValueError):
+        with policy.slot():
+            raise ValueError("parsing failed")
+
+    async def cancelled():
+        async def hold():
+            async with policy.slot_async():
+                await asyncio.sleep(10)
+        task = asyncio.ensure_future(hold())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled())
+    assert policy.consecutive_failures == 1
+    assert policy.counts["successes"] == 0
+    assert policy.counts["aborted"] == 2
+
+    with policy.slot():
+        pass
+    assert policy.consecutive_failures == 0
+    assert policy.counts["successes"] == 1
+
+
+def policy_with_one_slot():
+    return fetcher.HostPolicy("example.test", concurrency=1, rate_limit=0, failure_threshold=3,
+                              reset_timeout=RESET)
+
+
+def test_waiting_coroutines_get_the_slot_in_arrival_order_without_polling():
+    policy = policy_with_one_slot()
+
+    async def scenario():
+        order, waits = [], []
+
+        async def request(i, hold):
+            queued = time.perf_counter()
+            async with policy.slot_async():
+                waits.append(time.perf_counter() - queued - hold * i)
+                order.append(i)
+                await asyncio.sleep(hold)
+
+        hold = 0.02
+        tasks = []
+        for i in range(6):
+            tasks.append(asyncio.ensure_future(request(i, hold)))
+            # Fixes the arrival order
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order, waits
+
+    order, waits = asyncio.run(scenario())
+    assert order == list(range(6))
+    # Handed over as soon as the slot frees, not at the next poll
+    assert max(waits) < 0.015
+    assert policy.in_flight == 0 and not policy._async_waiters
+
+
+def test_cancelled_waiters_never_keep_a_slot():
+    policy = policy_with_one_slot()
+
+    async def scenario():
+        release = asyncio.Event()
+        entered = []
+
+        async def request(name, wait_for=None):
+            async with policy.slot_async():
+                entered.append(name)
+                if wait_for is not None:
+                    await wait_for.wait()
+
+        holder = asyncio.ensure_future(request("holder", release))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(request("queued"))
+        granted = asyncio.ensure_future(request("granted"))
+        last = asyncio.ensure_future(request("last"))
+        await asyncio.sleep(0.01)
+        # Cancelled while still queued
+        queued.cancel()
+        await asyncio.sleep(0)
+        # The slot is handed to "granted", which is cancelled before it runs; the slot goes on to "last"
+        release.set()
+        await holder
+        granted.cancel()
+        await asyncio.gather(queued, granted, last, return_exceptions=True)
+        return entered
+
+    assert asyncio.run(scenario()) == ["holder", "last"]
+    assert policy.in_flight == 0 and not policy._async_waiters
+
+
+def test_a_thread_releasing_its_slot_wakes_a_waiting_coroutine():
+    policy = policy_with_one_slot()
+    taken, release = threading.Event(), threading.Event()
+
+    def blocking_request():
+        with policy.slot():
+            taken.set()
+            release.wait()
+
+    thread = threading.Thread(target=blocking_request)
+    thread.start()
+    taken.wait()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.02, release.set)
+        start = time.perf_counter()
+        async with policy.slot_async():
+            return time.perf_counter() - start
+
+    waited = asyncio.run(scenario())
+    thread.join()
+    assert 0.015 < waited < 0.05
+    assert policy.in_flight == 0
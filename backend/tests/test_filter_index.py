@@ -0,0 +1,72 @@
+import pytest
+
+from filter_index import FilterIndex, facet_key, join_list, split_list
+
+
+def catalog():
+    return FilterIndex.from_metadatas([
+        {"assessment_id": "java-8", "job_levels": "Graduate,Mid-Professional", "languages": "English (USA)",
+         "test_types": "K", "duration": 18, "remote_testing": True},
+        {"assessment_id": "opq32r", "job_levels": "Manager", "languages": "German,Spanish",
+         "test_types": "P", "duration": 25, "remote_testing": True, "adaptive_irt": True},
+        {"assessment_id": "verify-numerical", "job_levels": "Graduate", "languages": "English (USA)",
+         "test_types": "A,S", "duration": 30},
+        # Legacy per-value flag metadata still indexes the same facets
+        {"assessment_id": "sales-scenarios", "job_level_manager": True, "language_spanish": True,
+         "test_type_b": True, "duration": 45},
+    ])
+
+
+def ids(index, bits):
+    return [index.ids[row] for row in index.rows(bits)]
+
+
+def test_list_fields_round_trip():
+    assert split_list(join_list(["English (USA)", " German ", ""])) == ["English (USA)", "German"]
+    assert facet_key("Entry-Level") == "entry_level"
+    assert facet_key("C#") == "csharp"
+
+
+def test_facet_values_and_categories():
+    index = catalog()
+    assert ids(index, index.facet("language", "Spanish")) == ["opq32r", "sales-scenarios"]
+    assert ids(index, index.facet("job_level", "Mid-Professional")) == ["java-8"]
+    assert ids(index, index.facet("test_type", "s")) == ["verify-numerical"]
+    assert ids(index, index.facet("category", "technical")) == ["java-8", "verify-numerical"]
+    assert index.labels["language"]["english_(usa)"] == "English (USA)"
+
+
+def test_and_across_facets_or_within_a_facet():
+    index = catalog()
+    where = {"$and": [{"$or": [{"job_level_graduate": True}, {"job_level_manager": True}]},
+                      {"remote_testing": True}]}
+    assert ids(index, index.evaluate(where)) == ["java-8", "opq32r"]
+    assert ids(index, index.evaluate({"adaptive_irt": False})) == ["java-8", "verify-numerical", "sales-scenarios"]
+    assert index.evaluate(None) == index.all
+
+
+@pytest.mark.parametrize("where, expected", [
+    ({"duration": {"$lte": 25}}, ["java-8", "opq32r"]),
+    ({"duration": {"$lt": 25}}, ["java-8"]),
+    ({"duration": {"$gt": 25, "$lte": 45}}, ["verify-numerical", "sales-scenarios"]),
+    ({"duration_under_30": True}, ["java-8", "opq32r", "verify-numerical"]),
+    ({"duration_range": "short"}, ["java-8", "opq32r", "verify-numerical"]),
+])
+def test_duration_ranges(where, expected):
+    index = catalog()
+    assert ids(index, index.evaluate(where)) == expected
+
+
+def test_unsupported_conditions_are_rejected():
+    with pytest.raises(ValueError):
+        catalog().evaluate({"duration": {"$ne": 10}})
+
+
+def test_packed_index_evaluates_the_same():
+    index = catalog()
+    keys, blob = index.packed()
+    restored = FilterIndex.from_packed(index.ids, keys, blob, index.durations, index.labels)
+    where = {"$and": [{"language_spanish": True}, {"duration": {"$gte": 30}}]}
+    assert restored.evaluate(where) == index.evaluate(where)
+    assert restored.bitsets == index.bitsets
+    assert restored.contains(restored.evaluate(where), "sales-scenarios")
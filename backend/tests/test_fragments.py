@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+
+from fragments import ResultFragments, dumps
+
+
+class Result(BaseModel):
+    url: str
+    description: str
+
+
+def make_table():
+    built = []
+
+    def build(page_content, metadata):
+        built.append(metadata["url"])
+        return Result(url=metadata["url"], description=page_content)
+
+    return ResultFragments(build, "v1"), built
+
+
+def test_results_are_built_on_first_use_and_reused():
+    table, built = make_table()
+    metadata = {"url": "https://example.com/java"}
+    assert built == [] and len(table) == 0
+    first = table.result("Java 8", metadata)
+    assert table.result("Java 8", metadata) is first
+    fragment, digest = table.encode(first)
+    assert fragment == dumps(first.model_dump())
+    assert table.encode(first) == (fragment, digest)
+    assert built == ["https://example.com/java"] and len(table) == 1
+
+
+def test_documents_sharing_a_url_are_built_per_hit():
+    table, built = make_table()
+    first = table.result("Java 8", {"url": "https://example.com/java"})
+    other = table.result("Java 11", {"url": "https://example.com/java"})
+    assert other.description == "Java 11"
+    assert table.result("Java 8", {"url": "https://example.com/java"}) is first
+    assert table.encode(other)[0] == dumps(other.model_dump())
+    assert table.encode(first)[0] == dumps(first.model_dump())
+    assert len(built) == 2
@@ -0,0 +1,37 @@
+import pytest
+
+from html_extract import StreamingExtractor, etree, iter_chunks
+
+PARSERS = [False] + ([True] if etree is not None else [])
+
+
+def extract(html, use_lxml, chunk_size=32):
+    """(text, bytes read before feed() asked to stop)"""
+    extractor = StreamingExtractor(use_lxml=use_lxml)
+    for chunk in iter_chunks(html, chunk_size):
+        if extractor.feed(chunk):
+            break
+    return extractor.text(), extractor.bytes_read
+
+
+@pytest.mark.parametrize("use_lxml", PARSERS)
+def test_sidebar_for_a_later_selector_does_not_win(use_lxml):
+    html = ('<html><body><div class="details">Similar jobs sidebar</div>'
+            '<div class="job-description">Main job description</div></body></html>')
+    assert extract(html, use_lxml)[0] == "Main job description"
+
+
+@pytest.mark.parametrize("use_lxml", PARSERS)
+def test_most_preferred_selector_stops_reading(use_lxml):
+    html = ('<div class="job-description">Secondary</div><div class="description">Preferred</div>'
+            + '<p>' + 'boilerplate ' * 500 + '</p>')
+    text, bytes_read = extract(html, use_lxml)
+    assert text == "Preferred"
+    assert bytes_read < len(html)
+
+
+@pytest.mark.parametrize("use_lxml", PARSERS)
+def test_first_match_in_document_order_wins_for_one_selector(use_lxml):
+    html = ('<div class="description">Outer<div class="description">Inner</div></div>'
+            '<div class="description">Later</div>')
+    assert extract(html, use_lxml)[0] == "Outer\nInner"
@@ -0,0 +1,95 @@
+import pandas as pd
+
+from embedding_job import HashEmbeddings
+from ingestion import document_ids, parse_list_columns, prepare_documents, sync_vector_store
+
+MODEL = "hash-64"
+
+
+class MemoryStore:
+    """The slice of the Chroma vector store sync_vector_store uses"""
+
+    def __init__(self):
+        self.rows = {}
+        self._collection = self
+
+    def get(self, include):
+        return {"ids": list(self.rows), "metadatas": [row["metadata"] for row in self.rows.values()]}
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.rows[doc_id]
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for doc_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+            self.rows[doc_id] = {"embedding": embedding, "document": document, "metadata": dict(metadata)}
+
+
+class CountingEmbeddings(HashEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return super().embed_documents(texts)
+
+
+def catalog(**changes):
+    rows = [
+        {"name": "Java 8 (New)", "url": "https://www.shl.com/products/view/java-8-new/",
+         "description": "Java programming", "duration": "18", "remote_testing": "Yes", "adaptive_irt": False,
+         "job_levels": "['Graduate', 'Mid-Professional']", "languages": "English (USA)", "test_type": "K"},
+        {"name": "OPQ32r", "url": "https://www.shl.com/products/view/opq32r/",
+         "description": "Personality", "duration": None, "remote_testing": True, "adaptive_irt": "true",
+         "job_levels": "", "languages": "German,Spanish", "test_type": "['P']"},
+        {"name": "Verify Numerical", "url": "https://www.shl.com/products/view/verify-numerical/",
+         "description": "Numerical reasoning", "duration": 20, "remote_testing": "no", "adaptive_irt": True,
+         "job_levels": "Graduate", "languages": "English (USA)", "test_type": "A"},
+    ]
+    for index, row in changes.items():
+        rows[int(index[1:])].update(row)
+    return prepare_documents(parse_list_columns(pd.DataFrame(rows)))
+
+
+def test_catalog_rows_become_compact_documents():
+    java, opq, _ = catalog()
+    assert java.metadata["assessment_id"] == "java-8-new"
+    assert java.metadata["job_levels"] == "Graduate,Mid-Professional"
+    assert java.metadata["remote_testing"] is True and java.metadata["duration"] == 18.0
+    assert opq.metadata["test_types"] == "P" and opq.metadata["duration"] == 0.0
+    assert opq.metadata["adaptive_irt"] is True and opq.metadata["languages"] == "German,Spanish"
+    assert "various job levels" in opq.page_content
+
+
+def test_repeated_slugs_get_distinct_ids():
+    documents = catalog() + catalog()[:1]
+    assert document_ids(documents) == ["java-8-new", "opq32r", "verify-numerical", "java-8-new-2"]
+
+
+def test_unchanged_catalog_embeds_nothing():
+    store = MemoryStore()
+    report = sync_vector_store(store, catalog(), CountingEmbeddings(), MODEL)
+    assert (report.added, report.updated, report.deleted) == (3, 0, 0)
+    embeddings = CountingEmbeddings()
+    report = sync_vector_store(store, catalog(), embeddings, MODEL)
+    assert not report.changed and report.unchanged == 3
+    assert embeddings.texts == []
+
+
+def test_only_changed_and_new_rows_are_embedded():
+    store = MemoryStore()
+    sync_vector_store(store, catalog(), CountingEmbeddings(), MODEL)
+    documents = catalog(r1={"description": "Personality and working styles"})[:2]
+    embeddings = CountingEmbeddings()
+    report = sync_vector_store(store, documents, embeddings, MODEL)
+    assert (report.added, report.updated, report.deleted, report.unchanged) == (0, 1, 1, 1)
+    assert embeddings.texts == [documents[1].page_content]
+    assert sorted(store.rows) == ["java-8-new", "opq32r"]
+
+
+def test_a_new_embedding_model_re_embeds_everything():
+    store = MemoryStore()
+    sync_vector_store(store, catalog(), CountingEmbeddings(), MODEL)
+    report = sync_vector_store(store, catalog(), CountingEmbeddings(), "another-model")
+    assert report.updated == 3
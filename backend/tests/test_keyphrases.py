@@ -0,0 +1,68 @@
+import pytest
+
+import config
+import main
+from keyphrases import KeyphraseExtractor, KeyphraseQuery
+from lexical import LexicalIndex
+
+METADATAS = [
+    {"name": "Java 8 (New)", "search_keywords": "java 8 programming collections streams"},
+    {"name": "SQL Server (New)", "search_keywords": "sql server databases queries"},
+    {"name": "Microsoft Excel 365", "search_keywords": "microsoft excel spreadsheets formulas"},
+    {"name": "Verify Numerical Ability", "search_keywords": "numerical reasoning tables charts"},
+    {"name": "Sales Scenarios", "search_keywords": "sales situational judgement customers"},
+    {"name": "Customer Service Simulation", "search_keywords": "customer service calls customers"},
+]
+JOB = """We are looking for a Java developer to join our team. You will write Java services,
+tune SQL Server queries and build Excel reports with strong numerical reasoning."""
+
+
+@pytest.fixture
+def extractor():
+    index = LexicalIndex.from_metadatas(METADATAS)
+    return KeyphraseExtractor.from_catalog(index, METADATAS)
+
+
+def test_skills_come_from_catalog_names(extractor):
+    assert {"java", "sql_server", "excel"} <= extractor.skill_terms
+    # Product words in names are not skills
+    assert "new" not in extractor.skill_terms
+
+
+def test_query_leads_with_skills_found_in_the_text(extractor):
+    query = extractor.extract(JOB)
+    assert query.skills[0] == "java" and {"sql_server", "excel", "numerical"} <= set(query.skills)
+    assert query.query.startswith("java ")
+    assert "sql server" in query.query
+    assert "team" not in query.terms and "looking" not in query.terms
+    assert query.confidence >= 0.7
+
+
+def test_text_without_catalog_skills_has_low_confidence(extractor):
+    query = extractor.extract("Friendly barista wanted for our downtown coffee shop.")
+    assert query.skills == [] and query.confidence < 0.3
+
+
+@pytest.mark.parametrize("policy, confidence, expected, llm_calls", [
+    ("local", 0.1, "java sql", 0),
+    ("auto", 0.9, "java sql", 0),
+    ("auto", 0.1, "gemini query", 1),
+    ("llm", 0.9, "gemini query", 1),
+])
+def test_policy_decides_when_gemini_is_asked(monkeypatch, policy, confidence, expected, llm_calls):
+    calls = []
+    monkeypatch.setattr(main, "local_search_query",
+                        lambda text: KeyphraseQuery("java sql", ["java"], ["sql"], confidence))
+    monkeypatch.setattr(main, "generate_llm_search_query", lambda text: calls.append(text) or "gemini query")
+    monkeypatch.setattr(config, "QUERY_LOCAL_MIN_CONFIDENCE", 0.7)
+    assert main.generate_search_query(JOB, policy) == expected
+    assert len(calls) == llm_calls
+
+
+def test_auto_falls_back_to_the_local_query_when_gemini_fails(monkeypatch):
+    def fail(text):
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(main, "local_search_query", lambda text: KeyphraseQuery("java", ["java"], [], 0.2))
+    monkeypatch.setattr(main, "generate_llm_search_query", fail)
+    assert main.generate_search_query(JOB, "auto") == "java"
@@ -0,0 +1,73 @@
+import config
+from lexical import LexicalIndex, reciprocal_rank_fusion, tokenize
+from planner import LEXICAL
+
+METADATAS = [
+    {"assessment_id": "java-8", "search_keywords": "java 8 programming collections streams"},
+    {"assessment_id": "dotnet", "search_keywords": ".net framework c# programming"},
+    {"assessment_id": "sql-server", "search_keywords": "sql server databases queries"},
+    {"assessment_id": "javascript", "search_keywords": "javascript node.js programming"},
+]
+
+
+def test_tokens_keep_skill_names_whole():
+    assert tokenize("The C# and .NET developer, Node.js") == [
+        "c#", ".net", "developer", "node.js", "c#_.net", ".net_developer", "developer_node.js"]
+
+
+def test_bm25_ranks_rare_terms_higher_and_honours_candidates():
+    index = LexicalIndex.from_metadatas(METADATAS)
+    hits = index.search("java programming", k=3)
+    assert [index.ids[row] for row, _ in hits][0] == "java-8"
+    assert len(hits) == 3
+    # Only rows 1 and 3 are candidates
+    filtered = index.search("java programming", k=3, candidates=0b1010)
+    assert {index.ids[row] for row, _ in filtered} == {"dotnet", "javascript"}
+
+
+def test_keyword_queries_are_short_and_fully_indexed():
+    index = LexicalIndex.from_metadatas(METADATAS)
+    assert index.is_keyword_query("SQL", 2)
+    assert index.is_keyword_query(".NET c#", 2)
+    assert not index.is_keyword_query("sql server databases", 2)
+    assert not index.is_keyword_query("cobol", 2)
+    assert not index.is_keyword_query("sql", 0)
+
+
+def test_saved_index_is_reused_only_for_the_same_documents(tmp_path):
+    path = str(tmp_path / "lexical.json")
+    LexicalIndex.from_metadatas(METADATAS).save(path)
+    loaded = LexicalIndex.load_or_build(path, METADATAS)
+    assert loaded.search("sql", k=1) == LexicalIndex.from_metadatas(METADATAS).search("sql", k=1)
+    changed = METADATAS[:2]
+    assert LexicalIndex.load_or_build(path, changed).ids == ["java-8", "dotnet"]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion(["a", "b", "c"], ["b", "c"], k=60)
+    assert max(fused, key=fused.get) == "b"
+    assert fused["a"] == 1 / 61
+
+
+def test_hybrid_search_is_opt_in(catalog_retriever):
+    _, plan = catalog_retriever.search("python programming", k=3)
+    assert not plan.hybrid
+
+
+def test_short_keyword_queries_skip_the_embedding(catalog_retriever, monkeypatch):
+    monkeypatch.setattr(config, "HYBRID_SEARCH", True)
+    monkeypatch.setattr(config, "LEXICAL_FAST_PATH_MAX_TERMS", 2)
+    client = catalog_retriever.embeddings.embeddings
+    calls = []
+    monkeypatch.setattr(client, "embed_query", lambda text: calls.append(text))
+    hits, plan = catalog_retriever.search("python", k=1)
+    assert plan.strategy == LEXICAL and calls == []
+    assert hits[0][0].metadata["assessment_id"] == "python-new"
+
+
+def test_hybrid_search_fuses_both_rankings(catalog_retriever, monkeypatch):
+    monkeypatch.setattr(config, "HYBRID_SEARCH", True)
+    hits, plan = catalog_retriever.search("sql server databases for developers", k=3)
+    assert plan.hybrid and plan.strategy != LEXICAL
+    assert hits[0][0].metadata["assessment_id"] == "sql-server-new"
+    assert "lexical" in plan.timings and "fuse" in plan.timings
@@ -0,0 +1,123 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from metrics import Registry, request_timings, span
+
+
+def worker_registry(path, process_id):
+    registry = Registry()
+    requests = registry.counter("requests", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    breakers = []
+    registry.add_collector(lambda: [("circuit_open", "gauge", "Breaker open", list(breakers))])
+    registry.share(str(path), flush_interval=0, process_id=process_id, run_id="run")
+    return registry, requests, latency, breakers
+
+
+def sample_values(text):
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            values[name] = float(value)
+    return values
+
+
+def test_any_worker_renders_the_totals_of_all(tmp_path):
+    path = tmp_path / "shared.sqlite3"
+    first, first_requests, first_latency, first_breakers = worker_registry(path, "1")
+    second, second_requests, second_latency, second_breakers = worker_registry(path, "2")
+    first_requests.inc("/search")
+    first_requests.inc("/search")
+    second_requests.inc("/search")
+    second_requests.inc("/health")
+    first_latency.observe(0.05)
+    second_latency.observe(0.5)
+    second_breakers.append(("circuit_open_value", {"host": "jobs.example"}, 1))
+    second.flush()
+
+    values = sample_values(first.render())
+    assert values['requests_total{route="/search"}'] == 3
+    assert values['requests_total{route="/health"}'] == 1
+    assert values['latency_seconds_bucket{le="0.1"}'] == 1
+    assert values['latency_seconds_bucket{le="1"}'] == 2
+    assert values['latency_seconds_bucket{le="+Inf"}'] == 2
+    assert values['latency_seconds_count'] == 2
+    assert values['circuit_open_value{host="jobs.example"}'] == 1
+    assert sample_values(second.render()) == values
+
+    first.unshare()
+    second.unshare()
+
+
+def test_exited_worker_counts_stay_in_the_totals(tmp_path):
+    path = tmp_path / "shared.sqlite3"
+    exited, exited_requests, _, _ = worker_registry(path, "1")
+    exited_requests.inc("/search")
+    exited.unshare()
+
+    live, live_requests, _, _ = worker_registry(path, "2")
+    live_requests.inc("/search")
+    assert sample_values(live.render())['requests_total{route="/search"}'] == 2
+    live.unshare()
+
+
+def test_derived_families_use_the_merged_totals(tmp_path):
+    path = tmp_path / "shared.sqlite3"
+    registries = []
+    for process_id, (hits, misses) in (("1", (3, 1)), ("2", (1, 3))):
+        registry = Registry()
+        registry.add_collector(lambda hits=hits, misses=misses: [
+            ("hits", "counter", "Hits", [("hits_total", {}, hits)]),
+            ("misses", "counter", "Misses", [("misses_total", {}, misses)]),
+        ])
+        registry.add_derived(lambda families: [("ratio", "gauge", "Hit ratio", [
+            ("ratio", {}, families["hits"][3][0][2] / (families["hits"][3][0][2] + families["misses"][3][0][2]))
+        ])])
+        registry.share(str(path), flush_interval=0, process_id=process_id, run_id="run")
+        registry.flush()
+        registries.append(registry)
+    assert sample_values(registries[0].render())["ratio"] == 0.5
+    for registry in registries:
+        registry.unshare()
+
+
+def test_render_uses_the_text_exposition_format():
+    registry = Registry()
+    requests = registry.counter("requests", "Requests by route", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.inc('/search "q"')
+    latency.observe(0.5)
+    latency.observe(2.0)
+    text = registry.render()
+    assert "# TYPE requests counter\n" in text and "# TYPE latency_seconds histogram\n" in text
+    assert 'requests_total{route="/search \\"q\\""} 1\n' in text
+    values = sample_values(text)
+    assert values['latency_seconds_bucket{le="1"}'] == 1 and values['latency_seconds_bucket{le="+Inf"}'] == 2
+    assert values["latency_seconds_sum"] == 2.5
+
+
+def test_spans_time_stages_and_count_failures():
+    with request_timings() as timings:
+        with span("vector_search"):
+            pass
+        with pytest.raises(ValueError):
+            with span("llm"):
+                raise ValueError("quota")
+        timings.describe("cache", "MISS")
+    header = timings.server_timing()
+    assert header.startswith('cache;desc="MISS", vector_search;dur=')
+    assert ", llm;dur=" in header and ", total;dur=" in header
+    assert sample_values(main.REGISTRY.render())['assessment_stage_errors_total{stage="llm"}'] >= 1
+
+
+def test_requests_are_counted_per_route_and_timed_on_request():
+    client = TestClient(main.app)
+    before = sample_values(client.get("/metrics").text).get(
+        'assessment_http_requests_total{method="GET",route="/health",status="200"}', 0)
+    response = client.get("/health", params={"timing": "1"})
+    assert "total;dur=" in response.headers["Server-Timing"]
+    assert "Server-Timing" not in client.get("/health").headers
+    after = sample_values(client.get("/metrics").text)
+    assert after['assessment_http_requests_total{method="GET",route="/health",status="200"}'] == before + 2
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import config
+import main
+from metrics import record_stage, request_timings
+
+
+def slow_search(query, persist_directory, k, facets=None, debug=None):
+    time.sleep(0.2)
+    return []
+
+
+def test_search_runs_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(main, "search_assessments", slow_search)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        responses = await asyncio.gather(*(main.run_search(f"java {i}", False, 5) for i in range(3)))
+        task.cancel()
+        return responses, ticks
+
+    start = time.perf_counter()
+    responses, ticks = asyncio.run(scenario())
+    assert all(response.results == [] and response.search_query.startswith("java") for response in responses)
+    # Three 200 ms searches overlap on the worker pool while the loop keeps ticking
+    assert time.perf_counter() - start < 0.5
+    assert ticks >= 10
+
+
+def test_slow_search_times_out_with_an_error_response(monkeypatch):
+    monkeypatch.setattr(main, "search_assessments", slow_search)
+    monkeypatch.setattr(config, "SEARCH_TIMEOUT", 0.05)
+    response = asyncio.run(main.run_search("java", False, 5))
+    assert response.results == []
+    assert response.search_query == "Error searching for assessments: timed out after 0.05s"
+    assert not main.is_cacheable_response(response)
+
+
+def test_worker_calls_record_into_the_request_timings():
+    async def scenario():
+        with request_timings() as timings:
+            await main.run_blocking(record_stage, "vector_search", 0.004)
+        return timings
+
+    assert asyncio.run(scenario()).stages == {"vector_search": 0.004}
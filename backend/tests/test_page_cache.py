@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+import config
+import fetcher
+import main
+from caching import PersistentCache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from stub_server import StubServer  # noqa: E402
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    pages = PersistentCache("job_pages", persist_path=str(tmp_path / "pages.sqlite3"))
+    queries = PersistentCache("generated_queries", persist_path=str(tmp_path / "queries.sqlite3"))
+    monkeypatch.setattr(main, "page_cache", pages)
+    monkeypatch.setattr(main, "query_cache", queries)
+    yield pages, queries
+    pages.close()
+    queries.close()
+
+
+def test_fresh_pages_are_not_fetched_again(caches):
+    fetcher.reset_host_policies()
+    with StubServer(delay=0) as server:
+        first = main.extract_job_description(server.url)
+        second = main.extract_job_description(server.url)
+    fetcher.reset_host_policies()
+    assert "Build Java services" in first and second == first
+    assert server.requests == 1
+
+
+def test_pages_outlive_the_process_in_the_persistent_tier(caches, tmp_path, monkeypatch):
+    main.store_page("https://example.com/job", "Java developer")
+    restarted = PersistentCache("job_pages", persist_path=str(tmp_path / "pages.sqlite3"))
+    monkeypatch.setattr(main, "page_cache", restarted)
+    # A fresh entry is served without touching the network
+    monkeypatch.setattr(main, "stream_page", None)
+    assert main.extract_job_description("https://example.com/job") == "Java developer"
+    assert restarted.persistent_hits == 1
+    restarted.close()
+
+
+def test_generated_queries_are_cached_by_page_text(caches, monkeypatch):
+    prompts = []
+
+    class Model:
+        def invoke(self, prompt):
+            prompts.append(prompt)
+            return " java developer sql \n"
+
+    monkeypatch.setattr(main, "get_query_model", Model)
+    assert main.generate_llm_search_query("Senior Java developer") == "java developer sql"
+    assert main.generate_llm_search_query("Senior Java developer") == "java developer sql"
+    main.generate_llm_search_query("Python data engineer")
+    assert len(prompts) == 2
+
+
+def test_stale_pages_are_fetched_again(caches, monkeypatch):
+    monkeypatch.setattr(config, "PAGE_CACHE_FRESH_TTL", 0)
+    fetcher.reset_host_policies()
+    with StubServer(delay=0) as server:
+        main.extract_job_description(server.url)
+        main.extract_job_description(server.url)
+    fetcher.reset_host_policies()
+    assert server.requests == 2
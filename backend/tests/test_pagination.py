@@ -0,0 +1,65 @@
+import asyncio
+
+import main
+from caching import CursorStore
+
+
+def ranked_response(count):
+    results = [main.AssessmentResult(name=f"Test {i}", url=f"https://example.com/{i}", description="",
+                                     duration=10.0, test_types=["K"]) for i in range(count)]
+    return main.SearchResponse(search_query="java", original_query="java", is_url=False,
+                               job_description_url=None, results=results)
+
+
+def cursor_store(shared_path=None):
+    return CursorStore(max_entries=8, ttl=900, shared_path=shared_path,
+                       dumps=lambda response: response.model_dump_json(),
+                       loads=main.SearchResponse.model_validate_json)
+
+
+def test_cached_response_renews_its_cursor(monkeypatch):
+    now = [1000.0]
+    cursors = cursor_store()
+    cursors.entries._clock = lambda: now[0]
+    monkeypatch.setattr(main, "result_cursors", cursors)
+
+    async def scenario():
+        # attach_cursor runs once when the response cache is filled; first_page on every hit
+        ranked = await main.attach_cursor(ranked_response(12), 5)
+        pages = []
+        for _ in range(2):
+            now[0] += 800
+            pages.append(await main.first_page(ranked, 5))
+        return ranked, pages
+
+    ranked, pages = asyncio.run(scenario())
+    cursor_id, offset = CursorStore.decode(ranked.next_cursor)
+    assert offset == 5 and len(ranked.results) == 12
+    assert all(page.next_cursor == ranked.next_cursor for page in pages)
+    assert [r.url for r in pages[0].results] == [r.url for r in ranked.results[:5]]
+    # 1600s after it was created, past CURSOR_TTL, but within one ttl of the last hit
+    now[0] += 800
+    assert cursors.get(cursor_id).results == ranked.results
+
+
+def test_evicted_cursor_is_restored_under_the_same_id(tmp_path, monkeypatch):
+    cursors = cursor_store(str(tmp_path / "shared.sqlite3"))
+    monkeypatch.setattr(main, "result_cursors", cursors)
+
+    async def scenario():
+        ranked = await main.attach_cursor(ranked_response(12), 5)
+        cursors.entries.clear()
+        cursors.shared.clear()
+        await main.first_page(ranked, 5)
+        return ranked
+
+    ranked = asyncio.run(scenario())
+    cursor_id, _ = CursorStore.decode(ranked.next_cursor)
+    assert cursor_store(str(tmp_path / "shared.sqlite3")).get(cursor_id).results == ranked.results
+
+
+def test_short_result_lists_have_no_cursor(monkeypatch):
+    monkeypatch.setattr(main, "result_cursors", cursor_store())
+    ranked = ranked_response(3)
+    assert asyncio.run(main.attach_cursor(ranked, 5)) is ranked
+    assert asyncio.run(main.first_page(ranked, 5)) is ranked
@@ -0,0 +1,52 @@
+from filter_index import FilterIndex
+from planner import EMPTY, PREFILTER, UNFILTERED, plan_search
+
+
+def catalog():
+    documents = [
+        ("java-graduate", "Graduate", "English (USA)", "K", 20, True),
+        ("java-manager", "Manager", "English (USA)", "K", 45, True),
+        ("opq-graduate", "Graduate", "German", "P", 25, False),
+        ("verify-manager", "Manager", "English (USA)", "A", 60, False),
+    ]
+    return FilterIndex.from_metadatas([
+        {"assessment_id": id_, "job_levels": level, "languages": language, "test_types": test_type,
+         "duration": duration, "remote_testing": remote}
+        for id_, level, language, test_type, duration, remote in documents
+    ])
+
+
+def test_matching_filter_is_not_relaxed():
+    where = {"$and": [{"job_level_graduate": True}, {"remote_testing": True}]}
+    plan = plan_search(catalog(), where, k=5)
+    assert plan.strategy == PREFILTER
+    assert plan.candidate_count == 1
+    assert plan.where == where
+    assert plan.relaxed == []
+
+
+def test_over_constrained_filter_drops_the_least_selective_facet():
+    index = catalog()
+    # Graduate + German + remote matches nothing; remote (2 rows) is broader than German (1 row)
+    # but dropping it alone is enough, so the language the query asked for is kept
+    where = {"$and": [{"job_level_graduate": True}, {"language_german": True}, {"remote_testing": True}]}
+    plan = plan_search(index, where, k=5)
+    assert plan.strategy != EMPTY
+    assert plan.relaxed == [{"remote_testing": True}]
+    assert plan.where == {"$and": [{"job_level_graduate": True}, {"language_german": True}]}
+    assert [index.ids[row] for row in index.rows(index.evaluate(plan.where))] == ["opq-graduate"]
+
+
+def test_duration_range_is_dropped_as_one_facet():
+    where = {"$and": [{"language_german": True}, {"duration": {"$gt": 0}}, {"duration": {"$lte": 10}}]}
+    plan = plan_search(catalog(), where, k=5)
+    assert plan.relaxed == [{"$and": [{"duration": {"$gt": 0}}, {"duration": {"$lte": 10}}]}]
+    assert plan.where == {"language_german": True}
+    assert plan.candidate_count == 1
+
+
+def test_filter_relaxed_to_nothing_searches_the_whole_catalog():
+    plan = plan_search(catalog(), {"duration": {"$lte": 5}}, k=5)
+    assert plan.strategy == UNFILTERED
+    assert plan.where is None
+    assert plan.relaxed == [{"duration": {"$lte": 5}}]
@@ -0,0 +1,63 @@
+from langchain_core.documents import Document
+
+import config
+from facets import QueryFacets
+from filter_index import FilterIndex
+from lexical import LexicalIndex
+from reranker import Reranker
+
+METADATAS = [
+    {"assessment_id": "java-8", "search_keywords": "java programming", "job_levels": "Graduate",
+     "test_types": "K", "duration": 60, "remote_testing": True},
+    {"assessment_id": "java-manager", "search_keywords": "java team leadership", "job_levels": "Manager",
+     "test_types": "K", "duration": 28, "remote_testing": True},
+    {"assessment_id": "opq32r", "search_keywords": "personality styles", "job_levels": "Manager",
+     "test_types": "P", "duration": 0},
+]
+
+
+def hits():
+    return [(Document(page_content="", metadata=m), 0.0) for m in METADATAS]
+
+
+def rerank(query, facets, weights, k=3):
+    reranker = Reranker(weights)
+    return [doc.metadata["assessment_id"] for doc, _ in reranker.rerank(
+        hits(), query, facets, FilterIndex.from_metadatas(METADATAS), LexicalIndex.from_metadatas(METADATAS), k)]
+
+
+def only(feature):
+    return {name: float(name == feature) for name in ("rank", "facets", "duration", "lexical")}
+
+
+def test_first_stage_order_stands_on_rank_alone():
+    assert rerank("java", QueryFacets(), only("rank")) == ["java-8", "java-manager", "opq32r"]
+
+
+def test_requested_facets_move_matches_up():
+    assert rerank("test", QueryFacets(job_levels=["manager"]), only("facets"), k=2) == ["java-manager", "opq32r"]
+
+
+def test_duration_fit_prefers_the_longest_test_within_the_limit():
+    features = Reranker(only("duration")).features(
+        hits(), "", QueryFacets(max_duration=30), FilterIndex.from_metadatas(METADATAS),
+        LexicalIndex.from_metadatas(METADATAS))
+    assert features[1, 2] > features[0, 2] == 0.0
+    # An unknown duration cannot be shown to fit
+    assert features[2, 2] == 0.0
+
+
+def test_keyword_overlap_ignores_stopwords():
+    assert rerank("the java team", QueryFacets(), only("lexical"))[0] == "java-manager"
+
+
+def test_search_skips_reranking_over_budget(catalog_retriever, monkeypatch):
+    monkeypatch.setattr(config, "RERANK", True)
+    _, plan = catalog_retriever.search("python programming", k=3)
+    assert plan.reranked and not plan.rerank_skipped
+    monkeypatch.setattr(config, "RERANK_BUDGET_MS", 0)
+    _, plan = catalog_retriever.search("python programming", k=3)
+    assert plan.rerank_skipped and not plan.reranked
+    monkeypatch.setattr(config, "RERANK", False)
+    _, plan = catalog_retriever.search("python programming", k=3)
+    assert not plan.reranked and not plan.rerank_skipped
@@ -0,0 +1,98 @@
+import asyncio
+
+from caching import ResponseCache, normalize_query
+
+
+def counter(results=None):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if results:
+            result = results[len(calls) - 1]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return len(calls)
+
+    return compute, calls
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResponseCache(ttl=60)
+    compute, calls = counter()
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("java", compute) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert calls == [1]
+    assert [value for value, _, _ in results] == [1] * 5
+    assert sorted(status for _, status, _ in results) == ["COALESCED"] * 4 + ["MISS"]
+
+
+def test_stale_entries_are_served_while_refreshing():
+    cache = ResponseCache(ttl=0.05, stale_ttl=60)
+    compute, calls = counter()
+
+    async def scenario():
+        await cache.get_or_compute("java", compute, allow_stale=True)
+        await asyncio.sleep(0.06)
+        stale = await cache.get_or_compute("java", compute, allow_stale=True)
+        await asyncio.sleep(0.03)
+        fresh = await cache.get_or_compute("java", compute, allow_stale=True)
+        return stale, fresh
+
+    (stale, status, _), (fresh, fresh_status, _) = asyncio.run(scenario())
+    assert (stale, status) == (1, "STALE")
+    assert (fresh, fresh_status) == (2, "HIT")
+    assert cache.refreshes == 1
+
+
+def test_without_allow_stale_expired_entries_are_recomputed():
+    cache = ResponseCache(ttl=0.01, stale_ttl=60)
+    compute, calls = counter()
+
+    async def scenario():
+        await cache.get_or_compute("java", compute)
+        await asyncio.sleep(0.02)
+        return await cache.get_or_compute("java", compute)
+
+    assert asyncio.run(scenario())[:2] == (2, "MISS")
+
+
+def test_failures_and_uncacheable_values_are_not_kept():
+    cache = ResponseCache(ttl=60)
+    compute, calls = counter([RuntimeError("scrape failed"), {"results": []}, {"results": [1]}])
+
+    async def scenario():
+        outcomes = []
+        for _ in range(3):
+            try:
+                value, status, _ = await cache.get_or_compute("job", compute,
+                                                               cacheable=lambda value: bool(value["results"]))
+                outcomes.append((value, status))
+            except RuntimeError:
+                outcomes.append("error")
+        outcomes.append((await cache.get_or_compute("job", compute))[:2])
+        return outcomes
+
+    assert asyncio.run(scenario()) == ["error", ({"results": []}, "MISS"), ({"results": [1]}, "MISS"),
+                                       ({"results": [1]}, "HIT")]
+
+
+def test_invalidate_drops_every_entry():
+    cache = ResponseCache(ttl=60)
+    compute, calls = counter()
+
+    async def scenario():
+        await cache.get_or_compute("java", compute)
+        cache.invalidate()
+        return await cache.get_or_compute("java", compute)
+
+    assert asyncio.run(scenario())[:2] == (2, "MISS")
+
+
+def test_keys_ignore_case_and_spacing():
+    assert normalize_query("  Java   Developer ") == normalize_query("java developer")
@@ -0,0 +1,66 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import config
+import retriever as retriever_module
+from conftest import CATALOG
+from retriever import AssessmentRetriever, close_retrievers, get_retriever, numpy_index_path
+from vector_index import DOCUMENTS_FILE, NumpyIndex
+
+
+def test_one_retriever_per_directory_across_threads(tmp_path, monkeypatch):
+    created, closed = [], []
+
+    class Retriever:
+        def __init__(self, persist_directory):
+            created.append(persist_directory)
+
+        def close(self):
+            closed.append(self)
+
+    monkeypatch.setattr(retriever_module, "AssessmentRetriever", Retriever)
+    monkeypatch.setattr(retriever_module, "_retrievers", {})
+    directory = str(tmp_path / "db")
+    with ThreadPoolExecutor(8) as pool:
+        retrievers = list(pool.map(lambda _: get_retriever(directory), range(32)))
+    assert len(created) == 1 and all(r is retrievers[0] for r in retrievers)
+    assert get_retriever(directory + "/") is retrievers[0]
+    assert get_retriever(str(tmp_path / "other")) is not retrievers[0]
+    close_retrievers()
+    assert len(closed) == 2 and retriever_module._retrievers == {}
+
+
+def test_backend_and_embeddings_are_opened_once(catalog_retriever):
+    assert not catalog_retriever.is_warm
+    catalog_retriever.search("java", k=2)
+    backend, embeddings = catalog_retriever.backend, catalog_retriever.embeddings
+    for query in ("python", "sql server", "personality"):
+        catalog_retriever.search(query, k=2)
+    assert catalog_retriever.backend is backend and catalog_retriever.embeddings is embeddings
+    assert catalog_retriever.status()["warm"] and catalog_retriever.status()["reloads"] == 0
+
+
+def test_changed_index_files_are_reloaded(catalog_retriever):
+    reloads = []
+    catalog_retriever.add_reload_listener(lambda: reloads.append(1))
+    backend = catalog_retriever.warm()
+    path = numpy_index_path(catalog_retriever.persist_directory)
+    assert not catalog_retriever.reload_if_changed()
+
+    index = backend.index
+    NumpyIndex.save(path, np.asarray(index.vectors)[:-1], index.ids[:-1], index.page_contents[:-1],
+                    index.metadatas[:-1], index.model)
+    stamp = os.stat(os.path.join(path, DOCUMENTS_FILE)).st_mtime_ns + 10 ** 9
+    os.utime(os.path.join(path, DOCUMENTS_FILE), ns=(stamp, stamp))
+    assert catalog_retriever.reload_if_changed()
+    assert catalog_retriever.backend is not backend and len(catalog_retriever.backend.index) == len(CATALOG) - 1
+    assert reloads == [1]
+
+
+def test_unknown_backends_are_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RETRIEVAL_BACKEND", "faiss")
+    with pytest.raises(ValueError, match="faiss"):
+        AssessmentRetriever(str(tmp_path / "db"))
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import CATALOG
+from retriever import numpy_index_path
+from serving_artifact import PackedColumn, ServingArtifact
+from vector_index import NumpyBackend, write_serving_artifact
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def index_path(catalog_retriever):
+    return numpy_index_path(catalog_retriever.persist_directory)
+
+
+def test_artifact_backend_answers_like_the_index_directory(catalog_retriever, index_path):
+    write_serving_artifact(index_path)
+    embeddings = catalog_retriever.embeddings
+    rebuilt = NumpyBackend(index_path, embeddings, use_artifact=False)
+    mapped = NumpyBackend(index_path, embeddings)
+    assert isinstance(mapped.index.metadatas, PackedColumn)
+    assert mapped.filter_index.bitsets == rebuilt.filter_index.bitsets
+    assert mapped.keyphrase_extractor.skill_terms == rebuilt.keyphrase_extractor.skill_terms
+    np.testing.assert_array_equal(mapped.neighbor_graph.neighbors, rebuilt.neighbor_graph.neighbors)
+    for query, filter in (("java programming", None), ("personality", {"language_spanish": True})):
+        assert [(doc.metadata, score) for doc, score in mapped.similarity_search_with_score(query, 3, filter)] == \
+               [(doc.metadata, score) for doc, score in rebuilt.similarity_search_with_score(query, 3, filter)]
+    assert mapped.lexical_index.search("sql server", 2) == rebuilt.lexical_index.search("sql server", 2)
+
+
+def test_documents_are_decoded_only_when_returned(catalog_retriever, index_path):
+    artifact = ServingArtifact(write_serving_artifact(index_path))
+    assert artifact.ids == [id_ for id_, *_ in CATALOG]
+    assert artifact.metadatas._documents._decoded == [None] * len(CATALOG)
+    assert artifact.metadatas[1]["assessment_id"] == "python-new"
+    assert sum(row is not None for row in artifact.metadatas._documents._decoded) == 1
+
+
+def test_stale_artifact_is_ignored(catalog_retriever, index_path):
+    path = write_serving_artifact(index_path)
+    stale = os.stat(path).st_mtime_ns - 10 ** 9
+    os.utime(path, ns=(stale, stale))
+    backend = NumpyBackend(index_path, None)
+    assert isinstance(backend.index.metadatas, list)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "serving.idx"
+    path.write_bytes(b"not an artifact")
+    with pytest.raises(ValueError):
+        ServingArtifact(str(path))
+
+
+def test_importing_the_api_loads_no_heavy_clients():
+    env = dict(os.environ, EMBEDDING_CACHE_PATH="", PAGE_CACHE_PATH="", QUERY_CACHE_PATH="")
+    code = ("import sys, main; print(','.join(m for m in ('chromadb', 'langchain_chroma', "
+            "'langchain_google_genai', 'pandas') if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True,
+                            text=True, check=True).stdout.strip()
+    assert loaded == ""
@@ -0,0 +1,32 @@
+import asyncio
+
+from caching import CursorStore, ResponseCache
+
+
+def test_workers_answer_each_others_repeats(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    first, second = ResponseCache(shared_path=path), ResponseCache(shared_path=path)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"results": ["java-8"]}
+
+    async def scenario():
+        assert (await first.get_or_compute("java", compute))[1] == "MISS"
+        return await second.get_or_compute("java", compute)
+
+    value, status, _ = asyncio.run(scenario())
+    assert value == {"results": ["java-8"]} and status == "HIT"
+    assert calls == [1] and second.shared_hits == 1
+
+
+def test_cursors_are_readable_from_another_worker(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    first, second = CursorStore(shared_path=path), CursorStore(shared_path=path)
+
+    async def scenario():
+        cursor_id = await first.put_async(["java-8", "python"])
+        return await second.get_async(cursor_id)
+
+    assert asyncio.run(scenario()) == ["java-8", "python"]
@@ -0,0 +1,41 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(catalog_retriever, monkeypatch):
+    monkeypatch.setattr(main, "get_retriever", lambda *args: catalog_retriever)
+    monkeypatch.setattr(main, "_result_fragments", {})
+    return TestClient(main.app)
+
+
+def similar_ids(client, assessment_id, **params):
+    response = client.get(f"/assessments/{assessment_id}/similar", params={"max_results": 10, **params})
+    assert response.status_code == 200
+    return {result["url"].rstrip("/").rsplit("/", 1)[-1] for result in response.json()["results"]}
+
+
+def test_neighbors_exclude_the_assessment_itself(client):
+    ids = similar_ids(client, "java-8-new")
+    assert "java-8-new" not in ids and len(ids) == 5
+
+
+def test_language_base_name_matches_every_variant(client):
+    # "English" covers "English (USA)" and "English International"
+    assert similar_ids(client, "java-8-new", language="English") == {
+        "python-new", "sql-server-new", "verify-numerical"}
+    assert similar_ids(client, "java-8-new", language="English (USA)") == {"sql-server-new"}
+    # A qualified label also answers to its plain language name
+    assert similar_ids(client, "java-8-new", language="spanish") == {"opq32r", "sales-scenarios"}
+
+
+def test_facets_are_and_ed_and_unknown_ids_are_404(client):
+    assert similar_ids(client, "java-8-new", language="English", test_type=["K"], max_duration=12) == {"python-new"}
+    assert client.get("/assessments/no-such-test/similar").status_code == 404
+
+
+def test_similar_filter_resolves_language_names(catalog_retriever):
+    where = main.similar_filter(languages=["english usa"], facet_extractor=catalog_retriever.facet_extractor)
+    assert where == {"language_english_(usa)": True}
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from vector_index import NumpyIndex, bitset_mask
+
+VECTORS = np.array([[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 2.0]])
+METADATAS = [
+    {"assessment_id": "java-8", "remote_testing": True, "duration": 18, "test_types": "K"},
+    {"assessment_id": "python", "remote_testing": False, "duration": 11, "test_types": "K"},
+    {"assessment_id": "opq32r", "remote_testing": True, "duration": 25, "test_types": "P"},
+    {"assessment_id": "verify", "remote_testing": True, "duration": None, "test_types": "A"},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "index")
+    NumpyIndex.save(path, VECTORS, [m["assessment_id"] for m in METADATAS], ["", "", "", ""], METADATAS, "model")
+    return NumpyIndex.load(path)
+
+
+def test_saved_vectors_are_normalized_and_mapped(index):
+    assert isinstance(index.vectors, np.memmap)
+    assert np.allclose(np.linalg.norm(index.vectors, axis=1), 1.0)
+    assert index.model == "model"
+
+
+def test_search_ranks_by_cosine_similarity(index):
+    hits = index.search_by_vector([2.0, 0.0, 0.0], k=3)
+    assert [row for row, _ in hits] == [0, 1, 2]
+    assert hits[0][1] == pytest.approx(1.0) and hits[1][1] == pytest.approx(0.8)
+
+
+def test_filters_restrict_rows(index):
+    where = {"$and": [{"remote_testing": True}, {"duration": {"$lte": 20}}]}
+    assert [row for row, _ in index.search_by_vector([0.0, 1.0, 0.0], k=5, where=where)] == [0]
+    assert [row for row, _ in index.search_by_vector([0.0, 1.0, 0.0], k=5,
+                                                      where={"test_types": {"$in": ["K", "A"]}})] == [1, 0, 3]
+    with pytest.raises(ValueError):
+        index.filter_mask({"duration": {"$regex": "1"}})
+
+
+def test_batch_search_matches_single_searches(index):
+    queries = [[1.0, 0.1, 0.0], [0.0, 0.2, 1.0]]
+    masks = [None, bitset_mask(0b0110, len(index))]
+    batch = index.search_batch(queries, k=2, masks=masks)
+    assert [[row for row, _ in hits] for hits in batch] == [
+        [row for row, _ in index.search_by_vector(queries[0], k=2)],
+        [row for row, _ in index.search_by_vector(queries[1], k=2, mask=masks[1])],
+    ]
+
+
+def test_masked_out_rows_never_fill_the_top_k(index):
+    assert index.search_batch([[1.0, 0.0, 0.0]], k=3, masks=[bitset_mask(0b1000, 4)]) == [[(3, 0.0)]]
+
+
+def test_bitset_mask_expands_rows():
+    assert bitset_mask(0b1000000101, 10).tolist() == [True, False, True] + [False] * 6 + [True]
@@ -0,0 +1,277 @@
+import os
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+import config
+from facets import FacetExtractor
+from filter_index import FilterIndex
+from keyphrases import KeyphraseExtractor
+from lexical import LexicalIndex
+from neighbors import NeighborGraph
+from serving_artifact import ServingArtifact, artifact_path, is_current, write_artifact
+
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.json"
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so a dot product is the cosine similarity"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyIndex:
+    """Brute-force cosine index over one contiguous float32 matrix.
+
+    The matrix is memory-mapped from `vectors.npy`; documents and metadata live in
+    `documents.json` next to it, or everything comes from the serving artifact. Metadata
+    filters use the Chroma filter syntax and are evaluated as boolean masks over the rows,
+    with the masks for every boolean metadata key precomputed at load time (on first use
+    for an artifact, whose metadata is only decoded when needed).
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: List[str], page_contents: List[str],
+                 metadatas: List[Dict[str, Any]], model: Optional[str] = None, precompute_masks: bool = True):
+        self.vectors = vectors
+        self.ids = ids
+        self.page_contents = page_contents
+        self.metadatas = metadatas
+        self.model = model
+        self._masks: Dict[Tuple[str, Any], np.ndarray] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        if precompute_masks:
+            self._precompute_masks()
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "NumpyIndex":
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r" if mmap else None)
+        with open(os.path.join(path, DOCUMENTS_FILE), encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(vectors, data["ids"], data["page_contents"], data["metadatas"], data.get("model"))
+
+    @classmethod
+    def from_artifact(cls, artifact: ServingArtifact) -> "NumpyIndex":
+        return cls(artifact.vectors, artifact.ids, artifact.page_contents, artifact.metadatas,
+                   artifact.model, precompute_masks=False)
+
+    @staticmethod
+    def save(path: str, vectors, ids: List[str], page_contents: List[str],
+             metadatas: List[Dict[str, Any]], model: Optional[str] = None):
+        """Write an index directory; vectors are normalized and stored as float32"""
+        os.makedirs(path, exist_ok=True)
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        documents_path = os.path.join(path, DOCUMENTS_FILE)
+        # Write to temporary files first so a serving process never maps a half-written index
+        with open(vectors_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(normalize_rows(vectors)))
+        with open(documents_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"model": model, "ids": ids, "page_contents": page_contents, "metadatas": metadatas}, f)
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(documents_path + ".tmp", documents_path)
+
+    @classmethod
+    def from_vector_store(cls, vector_store, model: Optional[str] = None) -> "NumpyIndex":
+        """Build an in-memory index from the embeddings stored in a Chroma collection"""
+        data = vector_store.get(include=["embeddings", "documents", "metadatas"])
+        return cls(np.ascontiguousarray(normalize_rows(np.asarray(data["embeddings"], dtype=np.float32))),
+                   list(data["ids"]), list(data["documents"]), list(data["metadatas"]), model)
+
+    @classmethod
+    def from_chroma(cls, vector_store, path: str, model: Optional[str] = None) -> "NumpyIndex":
+        """Export the embeddings already stored in a Chroma collection, without re-embedding"""
+        data = vector_store.get(include=["embeddings", "documents", "metadatas"])
+        cls.save(path, np.asarray(data["embeddings"], dtype=np.float32), list(data["ids"]),
+                 list(data["documents"]), list(data["metadatas"]), model)
+        return cls.load(path)
+
+    def _column(self, key: str) -> np.ndarray:
+        column = self._columns.get(key)
+        if column is None:
+            column = np.array([metadata.get(key) for metadata in self.metadatas], dtype=object)
+            self._columns[key] = column
+        return column
+
+    def _precompute_masks(self):
+        keys = {key for metadata in self.metadatas for key, value in metadata.items() if isinstance(value, bool)}
+        for key in keys:
+            column = self._column(key)
+            self._masks[(key, True)] = column == True  # noqa: E712 - elementwise comparison
+            self._masks[(key, False)] = column == False  # noqa: E712
+
+    def _eq_mask(self, key: str, value) -> np.ndarray:
+        mask = self._masks.get((key, value))
+        if mask is None:
+            mask = self._column(key) == value
+            self._masks[(key, value)] = mask
+        return mask
+
+    def _condition_mask(self, key: str, condition) -> np.ndarray:
+        if not isinstance(condition, dict):
+            return self._eq_mask(key, condition)
+        mask = np.ones(len(self), dtype=bool)
+        for op, value in condition.items():
+            if op == "$eq":
+                mask &= self._eq_mask(key, value)
+            elif op == "$ne":
+                mask &= ~self._eq_mask(key, value)
+            elif op == "$in":
+                mask &= np.logical_or.reduce([self._eq_mask(key, v) for v in value]) if value else False
+            elif op == "$nin":
+                mask &= ~np.logical_or.reduce([self._eq_mask(key, v) for v in value]) if value else True
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                numbers = np.array([v if isinstance(v, (int, float)) else np.nan for v in self._column(key)], dtype=np.float64)
+                with np.errstate(invalid="ignore"):
+                    mask &= {"$gt": numbers > value, "$gte": numbers >= value,
+                             "$lt": numbers < value, "$lte": numbers <= value}[op]
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+        return mask
+
+    def filter_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Evaluate a Chroma-style `where` filter to a boolean row mask (None means no filter)"""
+        if not where:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        for key, condition in where.items():
+            if key == "$or":
+                mask &= np.logical_or.reduce([self.filter_mask(c) for c in condition])
+            elif key == "$and":
+                mask &= np.logical_and.reduce([self.filter_mask(c) for c in condition])
+            else:
+                mask &= self._condition_mask(key, condition)
+        return mask
+
+    def search_by_vector(self, vector, k: int = 5, where: Optional[Dict[str, Any]] = None,
+                         mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (row, cosine score) pairs, best first, restricted to rows allowed by the filter"""
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = self.vectors @ query
+        if mask is None:
+            mask = self.filter_mask(where)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def search_batch(self, vectors, k: int = 5, masks: Optional[List[Optional[np.ndarray]]] = None) -> List[List[Tuple[int, float]]]:
+        """Top-k (row, cosine score) pairs for many queries, scored with one matrix product"""
+        queries = normalize_rows(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        scores = queries @ self.vectors.T
+        if masks is not None:
+            for i, mask in enumerate(masks):
+                if mask is not None:
+                    scores[i, ~mask] = -np.inf
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [[(int(r), float(sc)) for r, sc in zip(rows, row_scores) if sc != -np.inf]
+                for rows, row_scores in zip(top, top_scores)]
+
+    def document(self, row: int) -> Document:
+        return Document(page_content=self.page_contents[row], metadata=self.metadatas[row])
+
+
+def bitset_mask(bits: int, size: int) -> np.ndarray:
+    """Expand a FilterIndex bitset into a boolean row mask"""
+    packed = np.frombuffer(bits.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, bitorder="little")[:size].astype(bool)
+
+
+class NumpyBackend:
+    """Retrieval backend that embeds the query and scores it against a NumpyIndex.
+
+    When the index directory holds a serving artifact at least as new as the index and
+    lexical files, everything is opened from it with one mmap; otherwise the filter,
+    lexical and keyphrase indexes are rebuilt from the documents.
+    """
+
+    name = "numpy"
+
+    def __init__(self, index_path: str, embeddings, lexical_path: Optional[str] = None,
+                 use_artifact: bool = True):
+        self.index_path = index_path
+        self.embeddings = embeddings
+        path = artifact_path(index_path)
+        sources = [os.path.join(index_path, VECTORS_FILE), os.path.join(index_path, DOCUMENTS_FILE), lexical_path]
+        if use_artifact and is_current(path, sources):
+            artifact = ServingArtifact(path)
+            self.index = NumpyIndex.from_artifact(artifact)
+            self.filter_index = artifact.filter_index()
+            self.lexical_index = artifact.lexical_index()
+            self.keyphrase_extractor = KeyphraseExtractor(self.lexical_index, artifact.skill_terms)
+            self._neighbor_graph = artifact.neighbor_graph()
+        else:
+            self.index = NumpyIndex.load(index_path)
+            self.filter_index = FilterIndex.from_metadatas(self.index.metadatas)
+            self.lexical_index = LexicalIndex.load_or_build(lexical_path, self.index.metadatas)
+            self.keyphrase_extractor = KeyphraseExtractor.from_catalog(self.lexical_index, self.index.metadatas)
+            self._neighbor_graph = None
+        self.facet_extractor = FacetExtractor.from_filter_index(self.filter_index)
+
+    def document(self, row: int) -> Document:
+        return self.index.document(row)
+
+    @property
+    def neighbor_graph(self) -> NeighborGraph:
+        """Item-to-item neighbors aligned with matrix_index, from the artifact or built on first use"""
+        if self._neighbor_graph is None:
+            self._neighbor_graph = NeighborGraph.build(self.index.vectors, config.KNN_NEIGHBORS)
+        return self._neighbor_graph
+
+    @property
+    def matrix_index(self) -> Tuple[NumpyIndex, FilterIndex]:
+        """Matrix index and the filter index aligned with its rows, for batch scoring"""
+        return self.index, self.filter_index
+
+    def similarity_search_by_vector(self, vector, k: int = 5, filter: Optional[Dict[str, Any]] = None,
+                                    candidates: Optional[int] = None) -> List[Tuple[Document, float]]:
+        if candidates is not None:
+            hits = self.index.search_by_vector(vector, k, mask=bitset_mask(candidates, len(self.index)))
+        else:
+            hits = self.index.search_by_vector(vector, k, filter)
+        return [(self.index.document(row), score) for row, score in hits]
+
+    def similarity_search_with_score(self, query: str, k: int = 5, filter: Optional[Dict[str, Any]] = None,
+                                     candidates: Optional[int] = None) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k, filter, candidates)
+
+    def similarity_search_batch(self, vectors, ks: List[int],
+                                candidates: List[Optional[int]]) -> List[List[Tuple[Document, float]]]:
+        """Top-ks[i] hits for each query vector among its candidate rows (None for all), scored
+        together with one matrix product"""
+        masks = [bitset_mask(bits, len(self.index)) if bits is not None else None for bits in candidates]
+        hits = self.index.search_batch(vectors, max(ks), masks)
+        return [[(self.index.document(row), score) for row, score in rows[:k]] for rows, k in zip(hits, ks)]
+
+
+def write_serving_artifact(index_path: str, lexical_path: Optional[str] = None) -> str:
+    """Pack an exported NumPy index and its filter, lexical, keyphrase and neighbor indexes into the
+    serving artifact in the same directory; returns its path"""
+    backend = NumpyBackend(index_path, None, lexical_path, use_artifact=False)
+    index = backend.index
+    path = artifact_path(index_path)
+    write_artifact(path, index.vectors, index.ids, index.page_contents, index.metadatas, index.model,
+                   backend.filter_index, backend.lexical_index, sorted(backend.keyphrase_extractor.skill_terms),
+                   backend.neighbor_graph)
+    return path
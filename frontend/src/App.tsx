@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import './App.css';
 import { Assessment } from './types/Assessment';
+import { SearchPage } from './types/Search';
 import SearchForm from './components/SearchForms';
 import Navbar from './components/Navbar';
 import LoadingSpinner from './components/LoadingSpinner';
@@ -8,27 +9,35 @@ import ErrorMessage from './components/ErrorMessage';
 import ResultsTable from './components/ResultTable';
 import Footer from './components/Footer';
 
+const API = import.meta.env.VITE_BACKEND_DOMAIN;
+
 const App: React.FC = () => {
   const [results, setResults] = useState<Assessment[]>([]);
   const [loading, setLoading] = useState<boolean>(false);
   const [error, setError] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = useState<string>('');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [pageSize, setPageSize] = useState<number>(5);
+  const [loadingMore, setLoadingMore] = useState<boolean>(false);
 
   const handleSearch = async (query: string, isUrl: boolean, maxResults: number) => {
     setLoading(true);
     setError(null);
+    setNextCursor(null);
+    setPageSize(maxResults);
     setSearchQuery(query);
     try {
       
-      const response = await fetch(`${import.meta.env.VITE_BACKEND_DOMAIN}/search?query=${encodeURIComponent(query)}&is_url=${isUrl}&max_results=${maxResults}`);
+      const response = await fetch(`${API}/search?query=${encodeURIComponent(query)}&is_url=${isUrl}&max_results=${maxResults}`);
       
       if (!response.ok) {
         throw new Error(`API error: ${response.status}`);
       }
       
-      const data = await response.json();
+      const data: SearchPage = await response.json();
       console.log(data);
       setResults(data.results);
+      setNextCursor(data.next_cursor);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'An unknown error occurred');
       setResults([]);
@@ -37,6 +46,29 @@ const App: React.FC = () => {
     }
   };
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await fetch(`${API}/search/page?cursor=${encodeURIComponent(nextCursor)}&max_results=${pageSize}`);
+      if (response.status === 410) {
+        // The ranked list expired server-side; the search has to be run again
+        setNextCursor(null);
+        throw new Error('These results have expired, please search again.');
+      }
+      if (!response.ok) {
+        throw new Error(`API error: ${response.status}`);
+      }
+      const page: SearchPage = await response.json();
+      setResults(previous => [...previous, ...page.results]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'An unknown error occurred');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <div className="flex flex-col min-h-screen bg-gray-50">
       <Navbar />
@@ -59,7 +91,7 @@ const App: React.FC = () => {
           
           {loading ? (
             <LoadingSpinner />
-          ) : error ? (
+          ) : error && results.length === 0 ? (
             <ErrorMessage message={error} />
           ) : results.length > 0 ? (
             <div className="bg-white p-6 rounded-lg shadow-sm border border-gray-200">
@@ -70,6 +102,23 @@ const App: React.FC = () => {
                 Based on: "{searchQuery}"
               </p>
               <ResultsTable assessments={results} />
+              {nextCursor && (
+                <div className="mt-4 flex justify-center">
+                  <button
+                    type="button"
+                    onClick={handleLoadMore}
+                    disabled={loadingMore}
+                    className="py-2 px-4 border border-[#1a4a9e] rounded-md text-sm font-medium text-[#1a4a9e] hover:bg-blue-50 disabled:opacity-50"
+                  >
+                    {loadingMore ? 'Loading...' : 'Show more assessments'}
+                  </button>
+                </div>
+              )}
+              {error && (
+                <div className="mt-4">
+                  <ErrorMessage message={error} />
+                </div>
+              )}
             </div>
           ) : searchQuery ? (
             <div className="bg-white rounded-lg shadow-sm border border-gray-200 p-6 text-center">
@@ -0,0 +1,10 @@
+import { Assessment } from './Assessment';
+
+export interface SearchPage {
+    search_query: string;
+    original_query: string;
+    is_url: boolean;
+    job_description_url: string | null;
+    results: Assessment[];
+    next_cursor: string | null;
+  }